@@ -0,0 +1,298 @@
+###############################################################################
+# NAME:             Corpus.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      Generates synthetic projects for the benchmarks, and the
+#                   output the stub toolchain writes for their documents.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+import itertools
+import os
+import random
+import struct
+import zlib
+
+# Pages per folder
+FOLDER_SIZE = 20
+
+PARAGRAPH = (
+    'The quick brown fox jumps over the lazy dog, and then considers the'
+    ' consequences of its actions at some length. Some of this text is in'
+    ' \\textcolor{{red}}{{colour}}, and some of it refers to'
+    ' Section~\\ref{{sec:{}}}.')
+
+DOCUMENT_FORMAT = r"""\documentclass{}
+{}
+\begin{{document}}
+\title{{{}}}
+\maketitle
+{}
+\end{{document}}
+"""
+
+SECTION_FORMAT = r"""\section{{Section {}}}\label{{sec:{}}}
+{}
+
+\begin{{equation}}
+  E_{{{}}} = \sum_{{i=0}}^{{n}} a_i x^i
+\end{{equation}}
+"""
+
+BOOK_FORMAT = r"""\documentclass{{book}}
+\usepackage{{subfiles}}
+\input{{Shared/preamble}}
+\begin{{document}}
+{}
+\end{{document}}
+"""
+
+PREAMBLE = r"""\usepackage{xcolor}
+\usepackage{graphicx}
+\usepackage{amsmath}
+\usepackage{local}
+"""
+
+###############################################################################
+# Layout
+###
+
+def getDocumentPath(index, depth):
+    """Obtain the path of the index'th page, FOLDER_SIZE pages per folder,
+    nested depth folders deep"""
+    name = f'Page{index:05}.tex'
+    if not depth:
+        return name
+    folder = [f'Folder{index // FOLDER_SIZE:04}'] \
+        + [f'Level{level}' for level in range(1, depth)]
+    return os.path.join(*folder, name)
+
+def getBookPath(index):
+    return f'Book{index:02}.tex'
+
+def getSourcesDirectory(documentPath):
+    directory, filename = os.path.split(documentPath)
+    return os.path.join(directory,
+                        'sources-' + os.path.splitext(filename)[0])
+
+###############################################################################
+# Generation
+###
+
+def getPng(width, height):
+    """Obtain a greyscale PNG of a gradient"""
+    def chunk(chunkType, data):
+        return (struct.pack('>I', len(data)) + chunkType + data
+                + struct.pack('>I', zlib.crc32(chunkType + data)))
+    rows = b''.join(b'\x00' + bytes((x * 255 // width) for x in range(width))
+                    for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0,
+                                         0, 0))
+            + chunk(b'IDAT', zlib.compress(rows))
+            + chunk(b'IEND', b''))
+
+def getDocumentText(index, documentPath, sections, book=None, figure=None):
+    body = ''
+    for section in range(sections):
+        label = f'{index}-{section}'
+        body += SECTION_FORMAT.format(
+            section, label, '\n\n'.join(PARAGRAPH.format(label)
+                                        for _ in range(3)), section)
+    if figure:
+        body += f'\\includegraphics{{{figure}}}\n'
+    if book:
+        bookPath = os.path.relpath(book, os.path.dirname(documentPath) or '.')
+        return DOCUMENT_FORMAT.format(f'[{bookPath}]{{subfiles}}', '',
+                                      f'Page {index}', body)
+    return DOCUMENT_FORMAT.format('{article}', r'\input{Shared/preamble}',
+                                  f'Page {index}', body)
+
+def writeFile(filename, data):
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(filename, 'wb' if isinstance(data, bytes) else 'w') \
+         as outputFile:
+        outputFile.write(data)
+
+def generateProject(directory, documents, depth=1, fanout=10, sourcesEvery=5,
+                    pageDataEvery=10, books=1, sections=3):
+    """Write a project of documents pages into directory. Each of the books
+    includes the next fanout pages with \\subfile. Every sourcesEvery'th page
+    has a sources directory with a figure, and every pageDataEvery'th page
+    has PageData."""
+    config = {'WebIndex': getDocumentPath(0, depth), 'Books': {},
+              'PageData': {}, 'BuildExclude': ['Shared']}
+    writeFile(os.path.join(directory, 'Shared', 'preamble.tex'), PREAMBLE)
+    writeFile(os.path.join(directory, 'local.sty'),
+              '\\ProvidesPackage{local}\n')
+    figure = getPng(64, 48)
+
+    chapters = {}
+    for book in range(books):
+        bookPath = getBookPath(book)
+        config['Books'][bookPath] = {}
+        bookChapters = [getDocumentPath(index, depth) for index in
+                        range(book * fanout, min((book + 1) * fanout,
+                                                 documents))]
+        for chapter in bookChapters:
+            chapters[chapter] = bookPath
+        writeFile(os.path.join(directory, bookPath), BOOK_FORMAT.format(
+            '\n'.join(f'\\subfile{{{os.path.splitext(chapter)[0]}}}'
+                      for chapter in bookChapters)))
+
+    for index in range(documents):
+        documentPath = getDocumentPath(index, depth)
+        figurePath = None
+        if sourcesEvery and index % sourcesEvery == 0:
+            sourcesDirectory = getSourcesDirectory(documentPath)
+            writeFile(os.path.join(directory, sourcesDirectory, 'figure.png'),
+                      figure)
+            writeFile(os.path.join(directory, sourcesDirectory, 'data.csv'),
+                      ''.join(f'{x},{x * x}\n' for x in range(50)))
+            figurePath = os.path.basename(sourcesDirectory) + '/figure'
+        if pageDataEvery and index % pageDataEvery == 0:
+            config['PageData'][documentPath] = {'layout': 'wide',
+                                                'weight': str(index)}
+        writeFile(os.path.join(directory, documentPath), getDocumentText(
+            index, documentPath, sections, chapters.get(documentPath),
+            figurePath))
+
+    # Not needed by the stub tools, which import this module.
+    import yaml # pylint: disable=import-outside-toplevel
+    with open(os.path.join(directory, 'web-publishing.yaml'), 'w') \
+         as configFile:
+        yaml.safe_dump(config, configFile)
+    return config
+
+###############################################################################
+# Toolchain output
+#
+# What make4ht, pdflatex and middleman would write, in miniature. The stub
+# tools write these, and the benchmarks of the later stages write them
+# directly, rather than running the stubs once per page.
+###
+
+HTML_FORMAT = """<!DOCTYPE html>
+<html lang="en-US" xml:lang="en-US">
+<head>
+<title>{title}</title>
+<meta charset="utf-8" />
+<meta content="TeX4ht (https://tug.org/tex4ht/)" name="generator" />
+<meta content="width=device-width,initial-scale=1" name="viewport" />
+<link href="{name}.css" rel="stylesheet" type="text/css" />
+<meta content="{name}.tex" name="src" />
+</head>
+<body>
+<div class="maketitle">
+<h2 class="titleHead">{title}</h2>
+</div>
+{sections}
+</body>
+</html>
+"""
+
+HTML_SECTION_FORMAT = """\
+<h3 class="sectionHead"><span class="titlemark">{number}</span> \
+<a id="x1-{number}000"></a>Section {number}</h3>
+<!--  l. {number}  -->
+<p class="noindent">{paragraph}</p>
+<p class="indent">{prose}</p>
+<p class="indent"><span style="font-family:monospace;font-size:90%">\
+{paragraph}</span></p>
+<p class="indent"><span class="textcolor-red">colour</span> and \
+<span class="textcolor-blue">more colour</span></p>
+<table class="equation"><tr><td>
+<img alt="E = sum a x" class="math-display" src="{name}{number}x.svg" />
+</td><td class="equation-label">({number})</td></tr></table>
+<p class="indent"><span class="cmti-10"></span></p>
+"""
+
+# The words of the prose, which vary from page to page as a site's do, for the
+# search index. Like a natural language, a few words are very common and most
+# are rare.
+SYLLABLES = ('ka', 'lo', 'mi', 'ne', 'ru', 'sta', 'ther', 'vi', 'quo', 'dex',
+             'pha', 'gor', 'lin', 'tre', 'bus', 'cel')
+VOCABULARY = [''.join(syllables) for length in (2, 3) for syllables
+              in itertools.product(SYLLABLES, repeat=length)]
+VOCABULARY_WEIGHTS = [1 / rank for rank in range(1, len(VOCABULARY) + 1)]
+PROSE_WORDS = 150
+
+def getProse(name, number):
+    generator = random.Random(f'{name}-{number}')
+    return ' '.join(generator.choices(VOCABULARY, VOCABULARY_WEIGHTS,
+                                      k=PROSE_WORDS)) + '.'
+
+CSS = """
+/* start css.sty */
+.cmr-10{font-size:100%;}
+.cmti-10{font-style: italic;}
+.cmbx-10{ font-weight: bold;}
+.cmtt-10{font-family: monospace,monospace;}
+p{margin-top:0;margin-bottom:0}
+p.indent{text-indent:0;}
+p + p{margin-top:1em;}
+.math-display{text-align:center;}
+table.equation {width:100%;}
+.equation td{text-align:center; }
+td.equation-label { width:5%; text-align:center; }
+h2.titleHead{text-align:center;}
+div.maketitle{ text-align:center;}
+.textcolor-red{color:#FF0000}
+.textcolor-blue{color:#0000FF}
+/* end css.sty */
+"""
+
+SVG_FORMAT = """<?xml version='1.0' encoding='UTF-8'?>
+<!-- This file was generated by dvisvgm 2.13.1 -->
+<svg version='1.1' xmlns='http://www.w3.org/2000/svg' width='{width}pt' \
+height='12pt' viewBox='0 0 {width} 12'>
+<g id='page1'>
+<path d='M0 6h{width}' stroke='#000'/>
+</g>
+</svg>
+"""
+
+# The smallest well-formed PDF of one empty page
+PDF = b"""%PDF-1.4
+1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj
+2 0 obj << /Type /Pages /Kids [3 0 R] /Count 1 >> endobj
+3 0 obj << /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] >> endobj
+trailer << /Root 1 0 R >>
+%%EOF
+"""
+
+def writeHtmlOutput(texFile, htmlFile, sections=3):
+    """Write what make4ht makes of texFile to htmlFile, and the stylesheet
+    and images beside it"""
+    name = os.path.splitext(os.path.basename(texFile))[0]
+    paragraph = ('The quick brown fox jumps over the lazy dog, and then'
+                 ' considers the consequences of its actions at some length.')
+    htmlSections = ''.join(HTML_SECTION_FORMAT.format(
+        number=number, name=name, paragraph=paragraph,
+        prose=getProse(name, number)) for number in range(sections))
+    sourcesDirectory = getSourcesDirectory(texFile)
+    if os.path.isdir(sourcesDirectory):
+        htmlSections += (f'<p class="noindent"><img alt="PIC" src='
+                         f'"{os.path.basename(sourcesDirectory)}'
+                         f'/figure.png" /></p>\n')
+    writeFile(htmlFile, HTML_FORMAT.format(title=name, name=name,
+                                           sections=htmlSections))
+    outputBase = os.path.splitext(htmlFile)[0]
+    writeFile(outputBase + '.css', CSS)
+    for number in range(sections):
+        writeFile(os.path.join(os.path.dirname(htmlFile),
+                               f'{name}{number}x.svg'),
+                  SVG_FORMAT.format(width=40 + number))
+
+def writePdfOutput(jobName):
+    writeFile(jobName + '.pdf', PDF)
+    writeFile(jobName + '.aux', '\\relax\n')
+    writeFile(jobName + '.log', 'This is pdfTeX (stub)\n')
+
+###############################################################################
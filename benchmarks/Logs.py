@@ -0,0 +1,114 @@
+###############################################################################
+# NAME:             Logs.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      Checks that wp-pdflatex only runs another pass when the
+#                   log of pdflatex asks for one, against excerpts of real
+#                   logs.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+import os
+import sys
+import tempfile
+
+from web_publishing.Pdflatex import logRequestsRerun
+
+# A converged pass of a document which loads hyperref. rerunfilecheck's
+# banner, and the overfull box, mention reruns without asking for one.
+HYPERREF_CONVERGED = (
+    b'This is pdfTeX, Version 3.141592653-2.6-1.40.24 (TeX Live 2022/Debian)'
+    b' (preloaded format=pdflatex 2023.4.13)  17 OCT 2026 10:21\n'
+    rb"""entering extended mode
+ restricted \write18 enabled.
+**Introduction.tex
+(./Introduction.tex
+LaTeX2e <2022-11-01> patch level 1
+(/usr/share/texlive/texmf-dist/tex/latex/hyperref/hyperref.sty
+Package: hyperref 2022-11-13 v7.00u Hypertext links for LaTeX
+(/usr/share/texlive/texmf-dist/tex/latex/kvsetkeys/kvsetkeys.sty
+Package: kvsetkeys 2022-10-05 v1.19 Key value parser (HO)
+)
+(/usr/share/texlive/texmf-dist/tex/latex/rerunfilecheck/rerunfilecheck.sty
+Package: rerunfilecheck 2022-07-10 v1.10 Rerun checks for auxiliary files (HO)
+(/usr/share/texlive/texmf-dist/tex/generic/uniquecounter/uniquecounter.sty
+Package: uniquecounter 2019/12/15 v1.4 Provide unlimited unique counter (HO)
+)
+Package uniquecounter Info: New unique counter `rerunfilecheck' on input line 2
+85.
+)
+Package hyperref Info: Driver (autodetected): hpdftex.
+(./Introduction.aux)
+Overfull \hbox (12.3pt too wide) in paragraph at lines 40--42
+[]\OT1/cmr/m/n/10 If the log asks for it, rerun the build with
+ []
+
+[1{/var/lib/texmf/fonts/map/pdftex/updmap/pdftex.map}] (./Introduction.aux)
+Package rerunfilecheck Info: File `Introduction.out' has not changed.
+(rerunfilecheck)             Checksum: 5E0E4B1C6D6D0C09E8A8B6C2F9A0A6C1;312.
+ )
+Output written on Introduction.pdf (1 page, 41236 bytes).
+""")
+
+# The same document after a section was added
+HYPERREF_CHANGED = rb"""(./Introduction.aux)
+Package rerunfilecheck Warning: File `Introduction.out' has changed.
+(rerunfilecheck)                Rerun to get outlines right
+(rerunfilecheck)                or use package `bookmark'.
+
+Package rerunfilecheck Info: Checksums for `Introduction.out':
+(rerunfilecheck)             Before: 5E0E4B1C6D6D0C09E8A8B6C2F9A0A6C1;312
+(rerunfilecheck)             After:  0B6F1D8A3C2E5B7D9F1A3C5E7B9D1F3A;401.
+ )
+Output written on Introduction.pdf (1 page, 41502 bytes).
+"""
+
+LABELS_CHANGED = rb"""[2] (./Introduction.aux)
+
+LaTeX Warning: Label(s) may have changed. Rerun to get cross-references right.
+
+ )
+"""
+
+BIBLATEX_RERUN = rb"""Package biblatex Warning: Please rerun LaTeX.
+(biblatex)                Page breaks have changed.
+
+"""
+
+# (log, whether it asks for another pass)
+LOGS = {
+    'hyperref, converged': (HYPERREF_CONVERGED, False),
+    'hyperref, outlines changed': (HYPERREF_CHANGED, True),
+    'labels changed': (LABELS_CHANGED, True),
+    'biblatex': (BIBLATEX_RERUN, True),
+}
+
+def checkLogs():
+    """Returns the names of the logs which were misread"""
+    failures = []
+    with tempfile.TemporaryDirectory(prefix='wp-logs-') as directory:
+        jobName = os.path.join(directory, 'job')
+        for name, (log, expected) in LOGS.items():
+            with open(jobName + '.log', 'wb') as logFile:
+                logFile.write(log)
+            requested = logRequestsRerun(jobName)
+            print(f'{name:28} {"rerun" if requested else "done":5}'
+                  + ('' if requested == expected else '  WRONG'))
+            if requested != expected:
+                failures.append(name)
+    return failures
+
+def main():
+    """Checks the detection of rerun requests in pdflatex logs"""
+    failures = checkLogs()
+    if failures:
+        sys.exit(f'{len(failures)} log(s) misread')
+
+if __name__ == '__main__':
+    main()
+
+###############################################################################
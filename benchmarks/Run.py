@@ -0,0 +1,329 @@
+###############################################################################
+# NAME:             Run.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      Times the entry points on synthetic projects of increasing
+#                   size, and compares the results with earlier runs.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+import argparse
+import copy
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from web_publishing.BuildStats import appendRecord, readRecords
+from web_publishing.Configuration import CONFIG_DEFAULTS, \
+    applyConfiguration, getConfiguration
+from web_publishing.Files import getPrepareManifest, getTermsPath
+from web_publishing.GenerateMakefile import addProjectRules, \
+    getDependencyGraph, getDocuments, locateLaTeXFiles, setUpMakefile, \
+    writeMakefile
+from web_publishing.Search import getSearchStatePath, writeTerms
+
+from .Corpus import generateProject, writeHtmlOutput
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUBS = os.path.join(REPOSITORY, 'benchmarks', 'stubs')
+RESULTS = os.path.join(REPOSITORY, 'benchmarks', 'results.jsonl')
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+
+###############################################################################
+# Measurement
+###
+
+def timeRepeatedly(function, repeats, setUp=None):
+    """Obtain the wall time of each of repeats calls to function. setUp is
+    called (untimed) before each one."""
+    times = []
+    for _ in range(repeats):
+        if setUp:
+            setUp()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return times
+
+def getEnvironment():
+    # Run the entry points from this tree, and the stubs instead of TeX.
+    pythonPath = os.environ.get('PYTHONPATH')
+    return dict(os.environ,
+                PYTHONPATH=REPOSITORY + (':' + pythonPath if pythonPath
+                                         else ''),
+                PATH=STUBS + ':' + os.environ.get('PATH', ''))
+
+def runEntryPoint(module, *arguments):
+    """Run a console script as it would be run from the Makefile"""
+    subprocess.run([sys.executable, '-m', f'web_publishing.{module}',
+                    *arguments], env=getEnvironment(), check=True,
+                   stdout=subprocess.DEVNULL)
+
+###############################################################################
+# Benchmarks
+#
+# Each one is run in the directory of the project, and returns the times.
+###
+
+def getConfig():
+    return applyConfiguration(getConfiguration('web-publishing.yaml'),
+                              copy.deepcopy(CONFIG_DEFAULTS))
+
+def getMakefile(config):
+    makefile = setUpMakefile(config, config['CopyFiles'])
+    addProjectRules(makefile, config, bookFiles=list(config['Books'].keys()),
+                    latexFiles=locateLaTeXFiles(config))
+    return makefile
+
+def benchmarkLocate(repeats):
+    config = getConfig()
+    return timeRepeatedly(lambda: locateLaTeXFiles(config), repeats)
+
+def benchmarkGenerateMakefileCold(repeats):
+    # Without the dependency cache, every document is scanned.
+    buildDirectory = getConfig()['BuildDirectory']
+    return timeRepeatedly(
+        lambda: runEntryPoint('GenerateMakefile'), repeats,
+        setUp=lambda: shutil.rmtree(buildDirectory, ignore_errors=True))
+
+def benchmarkGenerateMakefile(repeats):
+    runEntryPoint('GenerateMakefile')
+    return timeRepeatedly(
+        lambda: runEntryPoint('GenerateMakefile', '--force'), repeats)
+
+def benchmarkGenerateMakefileUnchanged(repeats):
+    # What make pays on every run to check that the Makefile is current
+    runEntryPoint('GenerateMakefile')
+    return timeRepeatedly(lambda: runEntryPoint('GenerateMakefile'), repeats)
+
+def benchmarkWriteMakefile(repeats):
+    makefile = getMakefile(getConfig())
+    return timeRepeatedly(lambda: writeMakefile(makefile), repeats)
+
+def getPages(config):
+    """Obtain the (tex, html, erb, pageData) of every page"""
+    documents = getDocuments(
+        locateLaTeXFiles(config), config, getDependencyGraph(config),
+        bookFiles=list(config['Books'].keys()))
+    return [(document.getPath(), document.files['html'],
+             document.files['erb'],
+             ','.join(f'{key}={value}' for key, value in
+                      document.conf['pagedata'].items()))
+            for document in documents if not document.conf['isbook']]
+
+def writeHtmlFiles(pages):
+    """Write what make4ht would, without running it once per page"""
+    for texFile, htmlFile, _, _ in pages:
+        writeHtmlOutput(texFile, htmlFile)
+
+def benchmarkPrepare(repeats):
+    config = getConfig()
+    pages = getPages(config)
+    writeHtmlFiles(pages)
+    manifestFilename = getPrepareManifest(config['BuildDirectory'])
+
+    def writeManifest():
+        with open(manifestFilename, 'w') as manifestFile:
+            for _, htmlFile, erbFile, pageData in pages:
+                manifestFile.write(
+                    f'{htmlFile}\t{htmlFile[:-len(".html")]}.css\t{erbFile}'
+                    f'\t{pageData}\n')
+    return timeRepeatedly(
+        lambda: runEntryPoint('Prepare', '--batch', manifestFilename,
+                              '--build-dir', config['BuildDirectory']),
+        repeats, setUp=writeManifest)
+
+def benchmarkNavigation(repeats):
+    # After benchmarkPrepare, the titles are read from the sidecars.
+    config = getConfig()
+    pages = getPages(config)
+    if not all(os.path.isfile(htmlFile) for _, htmlFile, _, _ in pages):
+        writeHtmlFiles(pages)
+    htmlFiles = [htmlFile for _, htmlFile, _, _ in pages]
+    output = os.path.join(config['BuildDirectory'], '_navigation.erb')
+    return timeRepeatedly(
+        lambda: runEntryPoint('Navigation', '-d', config['BuildDirectory'],
+                              '-o', output, *htmlFiles), repeats)
+
+def getSearchArguments(config, pages):
+    return ['-d', config['BuildDirectory'], '-o', config['MiddlemanDirectory'],
+            *(htmlFile for _, htmlFile, _, _ in pages)]
+
+def benchmarkSearch(repeats):
+    # After benchmarkPrepare, the terms are read from the sidecars.
+    config = getConfig()
+    arguments = getSearchArguments(config, getPages(config))
+
+    def clean():
+        shutil.rmtree(os.path.join(config['MiddlemanDirectory'], 'search'),
+                      ignore_errors=True)
+        searchState = getSearchStatePath(config['BuildDirectory'])
+        if os.path.isfile(searchState):
+            os.remove(searchState)
+    return timeRepeatedly(lambda: runEntryPoint('Search', *arguments),
+                          repeats, setUp=clean)
+
+def benchmarkSearchIncremental(repeats):
+    """Indexing again after one page has changed"""
+    config = getConfig()
+    pages = getPages(config)
+    arguments = getSearchArguments(config, pages)
+    runEntryPoint('Search', *arguments)
+    termsPath = getTermsPath(pages[0][1])
+    with open(termsPath, 'r') as termsFile:
+        terms = json.load(termsFile)
+
+    def changePage():
+        # A term gained, and one whose weight changed
+        terms['benchmark'] = terms.get('benchmark', 0) + 1
+        writeTerms(pages[0][1], terms)
+    return timeRepeatedly(lambda: runEntryPoint('Search', *arguments),
+                          repeats, setUp=changePage)
+
+def benchmarkBuild(repeats):
+    """The whole build, with the stub toolchain"""
+    config = getConfig()
+    jobs = str(os.cpu_count() or 1)
+    os.makedirs(config['MiddlemanDirectory'], exist_ok=True)
+
+    def clean():
+        for directory in (config['BuildDirectory'], config['CacheDirectory'],
+                          config['ServerPDFPath'], 'build'):
+            shutil.rmtree(directory, ignore_errors=True)
+        runEntryPoint('GenerateMakefile')
+    return timeRepeatedly(
+        lambda: subprocess.run(['make', '-j', jobs], env=getEnvironment(),
+                               check=True, stdout=subprocess.DEVNULL),
+        repeats, setUp=clean)
+
+# In the order they run: some depend on the output of the ones before them.
+BENCHMARKS = {
+    'locate': benchmarkLocate,
+    'genmakefile-cold': benchmarkGenerateMakefileCold,
+    'genmakefile': benchmarkGenerateMakefile,
+    'genmakefile-noop': benchmarkGenerateMakefileUnchanged,
+    'makefile-write': benchmarkWriteMakefile,
+    'prepare': benchmarkPrepare,
+    'navigation': benchmarkNavigation,
+    'search': benchmarkSearch,
+    'search-incremental': benchmarkSearchIncremental,
+    'build': benchmarkBuild,
+}
+
+###############################################################################
+# Results
+###
+
+def getCommit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPOSITORY,
+            check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+def getBaselines(resultsFileName):
+    """Obtain the latest {(benchmark, documents): seconds} recorded"""
+    baselines = {}
+    try:
+        records = readRecords(resultsFileName)
+    except FileNotFoundError:
+        return baselines
+    for record in sorted(records, key=lambda record: record['time']):
+        baselines[(record['benchmark'], record['documents'])] = \
+            record['seconds']
+    return baselines
+
+def runBenchmarks(sizes, names, repeats, resultsFileName, threshold,
+                  keep=False):
+    """Run the benchmarks at each size, recording the best time of each.
+    Returns the number of regressions against the previous results."""
+    baselines = getBaselines(resultsFileName)
+    common = {'commit': getCommit(), 'python': platform.python_version(),
+              'host': platform.node(), 'time': time.time()}
+    regressions = 0
+    currentDirectory = os.getcwd()
+    for size in sizes:
+        projectDirectory = tempfile.mkdtemp(prefix=f'wp-bench-{size}-')
+        try:
+            generateProject(projectDirectory, size)
+            os.chdir(projectDirectory)
+            for name in names:
+                times = BENCHMARKS[name](repeats)
+                record = dict(common, benchmark=name, documents=size,
+                              seconds=round(min(times), 4),
+                              median=round(statistics.median(times), 4),
+                              repeats=repeats)
+                appendRecord(resultsFileName, record)
+
+                report = f'{name:17} {size:6} documents {min(times):9.4f}s'
+                baseline = baselines.get((name, size))
+                if baseline:
+                    ratio = min(times) / baseline
+                    report += f'  {ratio:5.2f}x previous'
+                    if ratio > threshold:
+                        report += '  REGRESSION'
+                        regressions += 1
+                print(report, flush=True)
+        finally:
+            os.chdir(currentDirectory)
+            if keep:
+                print(f'Kept {projectDirectory}')
+            else:
+                shutil.rmtree(projectDirectory, ignore_errors=True)
+    return regressions
+
+def main():
+    """Benchmarks the entry points on synthetic projects"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--sizes', '-s', type=int, nargs='+', default=list(DEFAULT_SIZES),
+        help=('The numbers of documents in the projects'))
+    parser.add_argument(
+        '--benchmark', '-b', action='append', choices=list(BENCHMARKS),
+        help=('Run only this benchmark (may be given more than once). The'
+              ' whole build with the stub toolchain is only run if asked'
+              ' for.'))
+    parser.add_argument(
+        '--repeats', '-r', type=int, default=3,
+        help=('The number of times to run each benchmark. The best time is'
+              ' recorded.'))
+    parser.add_argument(
+        '--output', '-o', default=RESULTS,
+        help=('The results file to append to, and compare with'))
+    parser.add_argument(
+        '--threshold', '-t', type=float, default=1.25,
+        help=('Report a regression when a benchmark takes this many times'
+              ' as long as it did in the previous results'))
+    parser.add_argument(
+        '--check', action='store_true', default=False,
+        help=('Exit with an error if there are regressions'))
+    parser.add_argument(
+        '--keep', action='store_true', default=False,
+        help=('Keep the generated projects'))
+    arguments = parser.parse_args()
+
+    names = arguments.benchmark or [name for name in BENCHMARKS
+                                    if name != 'build']
+    # Keep the order, since some depend on the ones before them.
+    names = [name for name in BENCHMARKS if name in names]
+    regressions = runBenchmarks(arguments.sizes, names, arguments.repeats,
+                                os.path.abspath(arguments.output),
+                                arguments.threshold, arguments.keep)
+    if regressions and arguments.check:
+        sys.exit(f'{regressions} regression(s)')
+
+if __name__ == '__main__':
+    main()
+
+###############################################################################
@@ -0,0 +1,90 @@
+###############################################################################
+# NAME:             Startup.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      Checks that every console script starts quickly: that its
+#                   module imports within a budget, and without the modules
+#                   which are only needed by some of its code paths.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+from .Run import REPOSITORY, getEnvironment
+
+# Imported only by the code paths that need them
+DEFERRED_MODULES = ('bs4', 'yaml', 'cerberus', 'multiprocessing')
+
+# The time to import each module, in milliseconds, not counting the
+# interpreter's own startup
+DEFAULT_BUDGET = 75
+
+CONSOLE_SCRIPT = re.compile(r"'(wp-[\w-]+)=(web_publishing\.\w+):main'")
+IMPORT_TIME = re.compile(r'^import time:\s+\d+ \|\s+(\d+) \| (\S+)\s*$')
+
+def getConsoleScripts():
+    """Obtain the {script: module} of every console script in setup.py"""
+    with open(os.path.join(REPOSITORY, 'setup.py'), 'r') as setupFile:
+        return dict(CONSOLE_SCRIPT.findall(setupFile.read()))
+
+def measureImport(module):
+    """Obtain the time to import module in microseconds, and the modules it
+    imports, in a fresh interpreter"""
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c',
+         f'import sys, {module}; print(" ".join(sys.modules))'],
+        env=getEnvironment(), check=True, capture_output=True, text=True)
+    cumulative = 0
+    for line in process.stderr.splitlines():
+        match = IMPORT_TIME.match(line)
+        if match and match.group(2) == module:
+            cumulative = int(match.group(1))
+    return cumulative, set(process.stdout.split())
+
+def checkStartup(budget, repeats):
+    """Check the module of every console script. Returns the failures."""
+    failures = []
+    for script, module in sorted(getConsoleScripts().items()):
+        results = [measureImport(module) for _ in range(repeats)]
+        milliseconds = min(cumulative for cumulative, _ in results) / 1000
+        deferred = sorted(name for name in DEFERRED_MODULES
+                          if name in results[0][1])
+        problems = []
+        if milliseconds > budget:
+            problems.append(f'over the budget of {budget}ms')
+        if deferred:
+            problems.append(f'imports {", ".join(deferred)}')
+        print(f'{script:15} {module:32} {milliseconds:7.1f}ms'
+              + (f'  FAIL: {"; ".join(problems)}' if problems else ''))
+        if problems:
+            failures.append(script)
+    return failures
+
+def main():
+    """Checks the import time of every console script"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--budget', '-b', type=float, default=DEFAULT_BUDGET,
+        help=('The most time each module may take to import, in'
+              ' milliseconds'))
+    parser.add_argument(
+        '--repeats', '-r', type=int, default=3,
+        help=('The number of times to import each module. The best time is'
+              ' compared with the budget.'))
+    arguments = parser.parse_args()
+    failures = checkStartup(arguments.budget, arguments.repeats)
+    if failures:
+        sys.exit(f'{len(failures)} console script(s) start too slowly')
+
+if __name__ == '__main__':
+    main()
+
+###############################################################################
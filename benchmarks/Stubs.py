@@ -0,0 +1,76 @@
+###############################################################################
+# NAME:             Stubs.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      Stand-ins for pdflatex, make4ht and middleman, so that the
+#                   generated Makefile can be run without a TeX installation.
+#                   The scripts in stubs/ run these.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+import os
+import shutil
+import sys
+
+from .Corpus import writeFile, writeHtmlOutput, writePdfOutput
+
+def getTexFile(arguments):
+    """The last argument which isn't an option is the document"""
+    for argument in reversed(arguments):
+        if not argument.startswith('-'):
+            return argument
+    return None
+
+def pdflatex(arguments):
+    texFile = getTexFile(arguments)
+    if not texFile:
+        return 1
+    jobName = os.path.splitext(os.path.basename(texFile))[0]
+    for argument in arguments:
+        if argument.startswith(('-jobname=', '--jobname=')):
+            jobName = argument.split('=', 1)[1]
+    if '-ini' in arguments:
+        writeFile(jobName + '.fmt', b'format')
+    else:
+        writePdfOutput(jobName)
+    return 0
+
+def make4ht(arguments):
+    texFile = getTexFile(arguments)
+    if not texFile:
+        return 1
+    name = os.path.splitext(os.path.basename(texFile))[0]
+    writeHtmlOutput(texFile, name + '.html')
+    return 0
+
+def middleman(arguments):
+    """Render every template in source/ into build/, as it is"""
+    if arguments[:1] != ['build']:
+        return 0
+    for directory, _, filenames in os.walk('source'):
+        outputDirectory = os.path.join(
+            'build', os.path.relpath(directory, 'source'))
+        os.makedirs(outputDirectory, exist_ok=True)
+        for filename in filenames:
+            if filename.startswith('_'):
+                continue
+            shutil.copyfile(os.path.join(directory, filename),
+                            os.path.join(outputDirectory,
+                                         filename.replace('.erb', '')))
+    return 0
+
+TOOLS = {'pdflatex': pdflatex, 'make4ht': make4ht, 'middleman': middleman}
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in TOOLS:
+        sys.exit(f'usage: {sys.argv[0]} {{{",".join(TOOLS)}}} [ARGS...]')
+    sys.exit(TOOLS[sys.argv[1]](sys.argv[2:]))
+
+if __name__ == '__main__':
+    main()
+
+###############################################################################
@@ -0,0 +1,14 @@
+###############################################################################
+# NAME:             __init__.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      Benchmarks of the wp-* entry points on synthetic projects.
+#                   Not part of the installed package.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+###############################################################################
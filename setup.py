@@ -12,7 +12,8 @@ setuptools.setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/AmateurECE/web-publishing",
-    packages=setuptools.find_packages(),
+    packages=setuptools.find_packages(
+        exclude=['benchmarks', 'benchmarks.*', 'tests', 'tests.*']),
     include_package_data=True,
     classifiers=[
         "Programming Language :: Python :: 3",
@@ -31,6 +32,17 @@ setuptools.setup(
             'wp-genmakefile=web_publishing.GenerateMakefile:main',
             'wp-navigation=web_publishing.Navigation:main',
             'wp-prepare=web_publishing.Prepare:main',
+            'wp-pdflatex=web_publishing.Pdflatex:main',
+            'wp-watch=web_publishing.Watch:main',
+            'wp-build=web_publishing.Build:main',
+            'wp-deploy=web_publishing.Deploy:main',
+            'wp-compress=web_publishing.Compress:main',
+            'wp-images=web_publishing.Images:main',
+            'wp-timeit=web_publishing.Timer:main',
+            'wp-buildstats=web_publishing.BuildStats:main',
+            'wp-pygmentize=web_publishing.Highlight:main',
+            'wp-draft=web_publishing.Draft:main',
+            'wp-search=web_publishing.Search:main',
         ]
     }
 )
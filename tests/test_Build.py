@@ -0,0 +1,113 @@
+###############################################################################
+# NAME:             test_Build.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      Tests for deciding which targets wp-build remakes.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+from pathlib import Path
+
+from web_publishing.Build import BuildState, Executor
+from web_publishing.Makefile import Makefile, Rule
+
+STATE = 'build-state.json'
+
+# Each recipe records that it ran in runs.log.
+COPY_RULE = """
+{}: {}
+	echo $@ >>runs.log
+	cp $< $@
+"""
+
+# As the ERB rules do, this only queues the page, which the site's recipe
+# then writes (if pages.ok exists).
+QUEUE_RULE = """
+{}: {}
+	echo $@ >>runs.log
+	echo $< >>queue
+"""
+SITE_RULE = """
+site: {}
+	echo $@ >>runs.log
+	test -f pages.ok
+	cp page.html page.erb
+"""
+
+def getMakefile(*rules):
+    makefile = Makefile()
+    for rule in rules:
+        makefile.addRule(rule)
+    return makefile
+
+def build(makefile, goals):
+    """Build goals as one run of wp-build would. Returns the targets that
+    failed, and those whose recipes ran."""
+    runs = Path('runs.log')
+    runs.write_text('')
+    state = BuildState(STATE)
+    failed = Executor(makefile, {}, state, jobs=2, silent=True).build(goals)
+    state.save()
+    return failed, runs.read_text().split()
+
+def test_up_to_date(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path('a.txt').write_text('a')
+    makefile = getMakefile(Rule.fromText(COPY_RULE.format('b.txt', 'a.txt')),
+                           Rule.fromText(COPY_RULE.format('c.txt', 'b.txt')))
+    assert build(makefile, ['c.txt']) == (set(), ['b.txt', 'c.txt'])
+    assert build(makefile, ['c.txt']) == (set(), [])
+
+    # Only the content of the prerequisites matters, not their mtime.
+    Path('a.txt').write_text('a')
+    assert build(makefile, ['c.txt']) == (set(), [])
+
+    Path('a.txt').write_text('changed')
+    assert build(makefile, ['c.txt']) == (set(), ['b.txt', 'c.txt'])
+    assert Path('c.txt').read_text() == 'changed'
+
+def test_missing_target(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path('a.txt').write_text('a')
+    makefile = getMakefile(Rule.fromText(COPY_RULE.format('b.txt', 'a.txt')))
+    build(makefile, ['b.txt'])
+    Path('b.txt').unlink()
+    assert build(makefile, ['b.txt']) == (set(), ['b.txt'])
+
+def test_failure(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    makefile = getMakefile(Rule.fromText(COPY_RULE.format('b.txt', 'a.txt')),
+                           Rule.fromText(COPY_RULE.format('c.txt', 'b.txt')))
+    assert build(makefile, ['c.txt']) == ({'a.txt', 'b.txt', 'c.txt'}, [])
+
+    Path('a.txt').write_text('a')
+    assert build(makefile, ['c.txt']) == (set(), ['b.txt', 'c.txt'])
+
+def test_queued_target(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path('page.html').write_text('page')
+    Path('pages.ok').write_text('')
+    makefile = getMakefile(
+        Rule.fromText(QUEUE_RULE.format('page.erb', 'page.html'),
+                      kind='erb'),
+        Rule.fromText(SITE_RULE.format('page.erb')))
+    assert build(makefile, ['site']) == (set(), ['page.erb', 'site'])
+    assert build(makefile, ['site']) == (set(), ['site'])
+
+    # The page isn't written, so it must be queued again next time, even
+    # though the last one is there.
+    Path('page.html').write_text('changed')
+    Path('pages.ok').unlink()
+    assert build(makefile, ['site']) == ({'site'}, ['page.erb', 'site'])
+    assert build(makefile, ['site']) == ({'site'}, ['page.erb', 'site'])
+
+    Path('pages.ok').write_text('')
+    assert build(makefile, ['site']) == (set(), ['page.erb', 'site'])
+    assert Path('page.erb').read_text() == 'changed'
+    assert build(makefile, ['site']) == (set(), ['site'])
+
+###############################################################################
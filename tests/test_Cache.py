@@ -0,0 +1,90 @@
+###############################################################################
+# NAME:             test_Cache.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      Tests for the output cache, and its eviction.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+import os
+import time
+
+from web_publishing.Cache import MANIFEST, OutputCache, getKey
+
+def storeEntries(cache, directory, names):
+    """Store an entry of one 1000 byte output for each name, each used a
+    minute after the last. Returns the {name: key} of the entries."""
+    keys = {}
+    for age, name in enumerate(reversed(names)):
+        output = os.path.join(directory, name)
+        with open(output, 'w') as outputFile:
+            outputFile.write(name[0] * 1000)
+        keys[name] = getKey(name)
+        cache.store(keys[name], [output])
+        lastUsed = time.time() - 60 * (age + 1)
+        os.utime(os.path.join(cache.getEntryDirectory(keys[name]), MANIFEST),
+                 (lastUsed, lastUsed))
+    return keys
+
+def getEntrySize(cache):
+    return max(size for _, size, _ in cache.getEntries())
+
+def test_restore(tmp_path):
+    cache = OutputCache(str(tmp_path / 'cache'))
+    keys = storeEntries(cache, str(tmp_path), ['a'])
+    os.remove(tmp_path / 'a')
+    assert cache.restore(keys['a'], [str(tmp_path / 'a')])
+    assert (tmp_path / 'a').read_text() == 'a' * 1000
+    assert not cache.restore(getKey('b'), [str(tmp_path / 'b')])
+    assert (cache.hits, cache.misses, cache.stored) == (1, 1, 1)
+
+def test_restore_extra_outputs(tmp_path):
+    cache = OutputCache(str(tmp_path / 'cache'))
+    for name in ('page.html', 'image.svg'):
+        (tmp_path / name).write_text(name)
+    outputs = [str(tmp_path / 'page.html'), str(tmp_path / 'image.svg')]
+    cache.store(getKey('page'), outputs)
+    for output in outputs:
+        os.remove(output)
+
+    assert not cache.restore(getKey('page'), outputs[:1])
+    assert cache.restore(getKey('page'), outputs[:1], extraOutputs=True)
+    assert (tmp_path / 'image.svg').read_text() == 'image.svg'
+
+def test_evict_least_recently_used(tmp_path):
+    cache = OutputCache(str(tmp_path / 'cache'))
+    keys = storeEntries(cache, str(tmp_path), ['a', 'b', 'c'])
+    cache.maxSize = 2 * getEntrySize(cache)
+    # Restoring an entry makes it the most recently used.
+    assert cache.restore(keys['a'], [str(tmp_path / 'a')])
+
+    assert cache.evict() == 1
+    assert not os.path.isdir(cache.getEntryDirectory(keys['b']))
+    assert os.path.isdir(cache.getEntryDirectory(keys['a']))
+    assert os.path.isdir(cache.getEntryDirectory(keys['c']))
+    assert cache.evict() == 0
+
+def test_evict_unlimited(tmp_path):
+    cache = OutputCache(str(tmp_path / 'cache'))
+    storeEntries(cache, str(tmp_path), ['a', 'b', 'c'])
+    assert cache.evict() == 0
+    assert len(cache.getEntries()) == 3
+
+def test_evict_unused(tmp_path):
+    cache = OutputCache(str(tmp_path / 'cache'))
+    keys = storeEntries(cache, str(tmp_path), ['a', 'b', 'c'])
+    # a and b were last used three and two minutes ago.
+    assert cache.evictUnused(90, keep={keys['a']}) == 1
+    assert not os.path.isdir(cache.getEntryDirectory(keys['b']))
+    assert len(cache.getEntries()) == 2
+
+def test_evict_missing_directory(tmp_path):
+    cache = OutputCache(str(tmp_path / 'cache'), maxSize=1)
+    assert cache.evict() == 0
+    assert cache.evictUnused(0) == 0
+
+###############################################################################
@@ -0,0 +1,74 @@
+###############################################################################
+# NAME:             test_Prepare.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      Tests for preparing a batch of pages from a manifest.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+import os
+
+from web_publishing.Prepare import prepareBatch, readManifest
+
+PAGE = """<html><head><title>{title}</title></head>
+<body><p>The words of {title}.</p></body></html>
+"""
+# make4ht always writes a title, so a page without one is broken.
+BROKEN_PAGE = """<html><head></head><body><p>No title.</p></body></html>
+"""
+
+def writeManifest(directory, pages):
+    """Write the {name: html} pages, and a manifest listing them"""
+    entries = []
+    for name, html in pages.items():
+        (directory / f'{name}.html').write_text(html)
+        (directory / f'{name}.css').write_text('')
+        entries.append('\t'.join([f'{name}.html', f'{name}.css',
+                                  f'{name}.html.erb', '']))
+    (directory / 'manifest').write_text('\n'.join(entries) + '\n')
+    return 'manifest'
+
+def test_prepare(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manifest = writeManifest(tmp_path, {
+        'a': PAGE.format(title='Page A'), 'b': PAGE.format(title='Page B')})
+    assert prepareBatch(manifest, jobs=2) == []
+    assert 'Page A' in (tmp_path / 'a.html.erb').read_text()
+    assert (tmp_path / 'b.html.erb').is_file()
+    assert not os.path.exists(manifest)
+
+def test_failures_stay_in_manifest(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manifest = writeManifest(tmp_path, {
+        'a': PAGE.format(title='Page A'), 'b': BROKEN_PAGE,
+        'c': PAGE.format(title='Page C')})
+    assert prepareBatch(manifest, jobs=2) == ['b.html.erb']
+    assert (tmp_path / 'a.html.erb').is_file()
+    assert not (tmp_path / 'b.html.erb').exists()
+    assert readManifest(manifest) == [
+        ('b.html', 'b.css', 'b.html.erb', '')]
+
+    # Once it's fixed, the page is prepared by the next build.
+    (tmp_path / 'b.html').write_text(PAGE.format(title='Page B'))
+    assert prepareBatch(manifest) == []
+    assert (tmp_path / 'b.html.erb').is_file()
+    assert not os.path.exists(manifest)
+
+def test_over_budget(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manifest = writeManifest(tmp_path, {'a': PAGE.format(title='Page A')})
+    assert prepareBatch(manifest, options={
+        'pageBudget': 10, 'budgetAction': 'error'}) == ['a.html.erb']
+    # Otherwise, make would take the page to be up to date.
+    assert not (tmp_path / 'a.html.erb').exists()
+    assert len(readManifest(manifest)) == 1
+
+def test_empty_manifest(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert prepareBatch('manifest') == []
+
+###############################################################################
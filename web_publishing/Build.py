@@ -0,0 +1,451 @@
+###############################################################################
+# NAME:             Build.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      Builds the project without make, deciding what is out of
+#                   date by content hash instead of modification time.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+
+from .BuildStats import RUN_VARIABLE
+from .Cache import OutputCache, getKey, getToolVersion
+from .Images import getGeneratedImages
+from .GenerateMakefile import addArguments, addProjectRules, getConfig, \
+    locateLaTeXFiles, setUpMakefile
+
+BUILD_STATE = 'build-state.json'
+def getBuildStatePath(buildDirectory):
+    return os.path.join(buildDirectory, BUILD_STATE)
+
+# The value of $(redirect) in the generated Makefile, unless V=1
+REDIRECT = '2>&1 >/dev/null'
+
+# The kinds of rule whose outputs are cached, and the tools whose versions
+# are part of the cache key.
+CACHED_RULES = {
+    'pdf': ('pdflatex',),
+    'html': ('make4ht', 'pdflatex'),
+}
+# Increment this whenever what's stored for a rule changes.
+CACHE_VERSION = '2'
+
+# The kinds of rule whose recipes only queue the target, which a dependent's
+# recipe (the build rule's `wp-prepare --batch') then writes
+QUEUED_RULES = ('erb',)
+
+###############################################################################
+# Expansion
+#
+# The generated rules use a small subset of make's syntax, which is all we
+# need to understand.
+###
+
+class Expander:
+    def __init__(self, variables):
+        self.variables = variables
+        self.functions = {
+            'basename': lambda argument: ' '.join(
+                os.path.splitext(word)[0] for word in argument.split()),
+            'dir': lambda argument: ' '.join(
+                os.path.dirname(word) + os.sep if os.path.dirname(word)
+                else './' for word in argument.split()),
+            'notdir': lambda argument: ' '.join(
+                os.path.basename(word) for word in argument.split()),
+            'realpath': lambda argument: ' '.join(
+                os.path.realpath(word) for word in argument.split()),
+            'shell': self.shell,
+        }
+
+    @classmethod
+    def shell(cls, command):
+        words = command.split()
+        if words and words[0] == 'realpath':
+            # By far the most common use in the rules: save a process.
+            return ' '.join(os.path.realpath(word) for word in words[1:])
+        output = subprocess.run(command, shell=True, check=False,
+                                stdout=subprocess.PIPE, text=True).stdout
+        return ' '.join(output.split('\n')).strip()
+
+    def expand(self, text, context):
+        """Expand variable and function references in text. context holds
+        the automatic variables."""
+        output = []
+        index = 0
+        while index < len(text):
+            character = text[index]
+            if character != '$' or index + 1 == len(text):
+                output.append(character)
+                index += 1
+                continue
+            following = text[index + 1]
+            if following == '$':
+                output.append('$')
+                index += 2
+            elif following in '({':
+                opening, closing = following, ')' if following == '(' else '}'
+                depth, end = 1, index + 2
+                while end < len(text) and depth:
+                    if text[end] == opening:
+                        depth += 1
+                    elif text[end] == closing:
+                        depth -= 1
+                    end += 1
+                output.append(self.expandReference(
+                    text[index + 2:end - 1], context))
+                index = end
+            else:
+                output.append(self.expandReference(following, context))
+                index += 2
+        return ''.join(output)
+
+    def expandReference(self, reference, context):
+        name, separator, argument = reference.partition(' ')
+        if separator and name in self.functions:
+            return self.functions[name](self.expand(argument, context))
+        name = self.expand(reference, context)
+        if name in context:
+            return context[name]
+        if len(name) == 2 and name[0] in context and name[1] in 'DF':
+            function = 'dir' if name[1] == 'D' else 'notdir'
+            value = self.functions[function](context[name[0]])
+            return value.rstrip(os.sep) if name[1] == 'D' else value
+        if name in self.variables:
+            return self.expand(self.variables[name], context)
+        return os.environ.get(name, '')
+
+###############################################################################
+# State
+###
+
+class BuildState:
+    """The signature of the inputs each target was last built from, and a
+    stat-keyed cache of file content hashes."""
+    def __init__(self, stateFileName):
+        self.stateFileName = stateFileName
+        self.signatures = {}
+        self.hashes = {}
+        self.memo = {}
+        try:
+            with open(stateFileName, 'r') as stateFile:
+                document = json.load(stateFile)
+            self.signatures = document.get('signatures', {})
+            self.hashes = document.get('hashes', {})
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def hashFile(self, filePath):
+        """Obtain the content hash of filePath, or None if it doesn't exist"""
+        if filePath in self.memo:
+            return self.memo[filePath]
+        try:
+            status = os.stat(filePath)
+        except FileNotFoundError:
+            return None
+        if os.path.isdir(filePath):
+            return 'directory'
+        key = [status.st_mtime_ns, status.st_size]
+        entry = self.hashes.get(filePath)
+        if entry and entry[:2] == key:
+            digest = entry[2]
+        else:
+            digest = hashlib.sha256()
+            with open(filePath, 'rb') as inputFile:
+                for block in iter(lambda: inputFile.read(1 << 20), b''):
+                    digest.update(block)
+            digest = digest.hexdigest()
+            self.hashes[filePath] = key + [digest]
+        self.memo[filePath] = digest
+        return digest
+
+    def forget(self, filePath):
+        self.memo.pop(filePath, None)
+
+    def save(self):
+        stateDirectory = os.path.dirname(self.stateFileName)
+        if stateDirectory:
+            os.makedirs(stateDirectory, exist_ok=True)
+        temporaryFileName = self.stateFileName + '.tmp'
+        with open(temporaryFileName, 'w') as stateFile:
+            json.dump({'signatures': self.signatures, 'hashes': self.hashes},
+                      stateFile)
+        os.replace(temporaryFileName, self.stateFileName)
+
+###############################################################################
+# Execution
+###
+
+class Executor:
+    def __init__(self, makefile, variables, state, jobs=None, keepGoing=True,
+                 silent=False, alwaysMake=False, cache=None):
+        self.rules = {}
+        for rule in makefile.getRules() + [makefile.getDefaultRule()]:
+            for target in rule.targets:
+                self.rules[target] = rule
+        self.expander = Expander(variables)
+        self.state = state
+        self.jobs = jobs or os.cpu_count() or 1
+        self.keepGoing = keepGoing
+        self.silent = silent
+        self.alwaysMake = alwaysMake
+        self.cache = cache
+        self.prerequisites = {}
+
+    def getPrerequisites(self, target):
+        if target not in self.prerequisites:
+            prerequisites = {}
+            rule = self.rules.get(target)
+            if rule:
+                for word in self.expander.expand(
+                        ' '.join(rule.prerequisites), {}).split():
+                    prerequisites.setdefault(word)
+            self.prerequisites[target] = list(prerequisites)
+        return self.prerequisites[target]
+
+    def getGraph(self, goals):
+        """Obtain the prerequisites of every target reachable from goals"""
+        graph = {}
+        for goal in goals:
+            stack = [(goal, iter(self.getPrerequisites(goal)))]
+            path = {goal}
+            graph.setdefault(goal, [])
+            while stack:
+                target, remaining = stack[-1]
+                prerequisite = next(remaining, None)
+                if prerequisite is None:
+                    stack.pop()
+                    path.discard(target)
+                    continue
+                if prerequisite in path:
+                    logging.warning('Circular %s <- %s dependency dropped.',
+                                    target, prerequisite)
+                    continue
+                graph[target].append(prerequisite)
+                if prerequisite not in graph:
+                    graph[prerequisite] = []
+                    path.add(prerequisite)
+                    stack.append((prerequisite,
+                                  iter(self.getPrerequisites(prerequisite))))
+        return graph
+
+    def getContext(self, target, prerequisites):
+        return {'@': target,
+                '<': prerequisites[0] if prerequisites else '',
+                '^': ' '.join(prerequisites)}
+
+    def getSignature(self, recipe, prerequisites):
+        """Hash the expanded recipe and the content of every prerequisite"""
+        digest = hashlib.sha256()
+        # Absolute paths from $(shell realpath ...) shouldn't make a build
+        # in another checkout look stale.
+        digest.update('\n'.join(recipe).replace(os.getcwd(), '.').encode())
+        for prerequisite in prerequisites:
+            contentHash = self.state.hashFile(prerequisite)
+            digest.update(f'\0{prerequisite}\0{contentHash}'.encode())
+        return digest.hexdigest()
+
+    def runRecipe(self, target, recipe):
+        for line in recipe:
+            ignoreErrors, silent = False, self.silent
+            while line[:1] in ('@', '-', '+'):
+                ignoreErrors = ignoreErrors or line[0] == '-'
+                silent = silent or line[0] == '@'
+                line = line[1:]
+            if not silent:
+                print(line, flush=True)
+            # As make does, strip the recipe prefix from continuation lines.
+            result = subprocess.run(line.replace('\\\n\t', '\\\n'),
+                                    shell=True, check=False)
+            if result.returncode != 0:
+                if ignoreErrors:
+                    print(f'wp-build: [{target}] Error {result.returncode}'
+                          ' (ignored)', flush=True)
+                    continue
+                logging.error('[%s] Error %d', target, result.returncode)
+                return False
+        return True
+
+    def getCacheKey(self, rule, signature):
+        if not self.cache or rule.kind not in CACHED_RULES:
+            return None
+        return getKey(CACHE_VERSION, signature, *[getToolVersion(tool)
+                                   for tool in CACHED_RULES[rule.kind]])
+
+    def runRule(self, target, rule, recipe, cacheKey):
+        outputs = [target] + rule.sideOutputs
+        if cacheKey and self.cache.restore(cacheKey, outputs,
+                                           extraOutputs=True):
+            return True
+        succeeded = self.runRecipe(target, recipe)
+        if succeeded and cacheKey:
+            if rule.kind == 'html':
+                # The images make4ht wrote beside the page aren't targets.
+                outputs += getGeneratedImages(target)
+            self.cache.store(cacheKey, outputs)
+        return succeeded
+
+    def build(self, goals):
+        """Build goals, returning the set of targets that failed"""
+        graph = self.getGraph(goals)
+        dependents = {target: [] for target in graph}
+        pending = {}
+        for target, prerequisites in graph.items():
+            pending[target] = len(prerequisites)
+            for prerequisite in prerequisites:
+                dependents[prerequisite].append(target)
+
+        ready = [target for target in graph if not pending[target]]
+        running = {}
+        failed = set()
+        stopping = False
+        # {target: signature} of the queued targets, until a dependent has
+        # written them
+        queued = {}
+
+        def finish(target, succeeded):
+            if not succeeded:
+                failed.add(target)
+            for dependent in dependents[target]:
+                pending[dependent] -= 1
+                if not pending[dependent]:
+                    ready.append(dependent)
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            while ready or running:
+                while ready and not stopping:
+                    target = ready.pop()
+                    prerequisites = graph[target]
+                    if any(prerequisite in failed
+                           for prerequisite in prerequisites):
+                        logging.error('Target %s not remade because of'
+                                      ' errors.', target)
+                        finish(target, False)
+                        continue
+                    rule = self.rules.get(target)
+                    if not rule:
+                        if self.state.hashFile(target) is None:
+                            logging.error('No rule to make target %s',
+                                          target)
+                        finish(target,
+                               self.state.hashFile(target) is not None)
+                        continue
+
+                    context = self.getContext(target, prerequisites)
+                    recipe = [self.expander.expand(line, context)
+                              for line in rule.recipe]
+                    signature = self.getSignature(recipe, prerequisites)
+                    if not self.alwaysMake \
+                       and self.state.hashFile(target) is not None \
+                       and self.state.signatures.get(target) == signature:
+                        finish(target, True)
+                        continue
+                    future = pool.submit(
+                        self.runRule, target, rule, recipe,
+                        self.getCacheKey(rule, signature))
+                    running[future] = (target, rule, signature)
+
+                if stopping:
+                    ready.clear()
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    target, rule, signature = running.pop(future)
+                    succeeded = future.result()
+                    self.state.forget(target)
+                    for prerequisite in graph[target]:
+                        # Written (or not, if this failed) by this recipe
+                        if prerequisite in queued:
+                            self.state.forget(prerequisite)
+                            if succeeded:
+                                self.state.signatures[prerequisite] = \
+                                    queued.pop(prerequisite)
+                    if succeeded and rule.kind in QUEUED_RULES:
+                        # Until it's written, the target must look stale, so
+                        # that it's queued again if writing it fails.
+                        self.state.signatures.pop(target, None)
+                        queued[target] = signature
+                    elif succeeded:
+                        self.state.signatures[target] = signature
+                    else:
+                        self.state.signatures.pop(target, None)
+                        stopping = stopping or not self.keepGoing
+                    finish(target, succeeded)
+        return failed
+
+def main():
+    """Builds the project with a native executor instead of make"""
+    parser = addArguments(argparse.ArgumentParser())
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help=('The number of recipes to run in parallel. Defaults to the'
+              ' number of CPUs.'))
+    parser.add_argument(
+        '-S', '--stop', dest='keep_going', action='store_false',
+        default=True,
+        help=('Stop at the first failure, instead of building every target'
+              ' that does not depend on it'))
+    parser.add_argument(
+        '-B', '--always-make', action='store_true', default=False,
+        help=('Rebuild every target, even if it is up to date'))
+    parser.add_argument(
+        '-s', '--silent', action='store_true', default=False,
+        help=('Do not print recipes as they are run'))
+    parser.add_argument(
+        '-V', '--verbose-tools', action='store_true', default=False,
+        help=('Show the output of the tools, like make V=1'))
+    parser.add_argument(
+        'targets', nargs='*', help=('The targets to build. Defaults to the'
+                                    ' default rule of the Makefile.'))
+    args = parser.parse_args()
+    if args.v:
+        logging.basicConfig(level=logging.DEBUG)
+
+    config = getConfig(args)
+    makefile = setUpMakefile(config, config['CopyFiles'])
+    addProjectRules(makefile, config,
+                    bookFiles=list(config['Books'].keys()),
+                    latexFiles=locateLaTeXFiles(config))
+
+    variables = {name: makefile.getVariable(name)
+                 for name in makefile.variables}
+    variables['redirect'] = '' if args.verbose_tools else REDIRECT
+    variables['CURDIR'] = os.getcwd()
+    os.environ.setdefault(RUN_VARIABLE, time.strftime('%Y%m%dT%H%M%S'))
+
+    state = BuildState(getBuildStatePath(config['BuildDirectory']))
+    cache = None
+    if config['CacheDirectory']:
+        cache = OutputCache(config['CacheDirectory'], config['CacheMaxSize'])
+    executor = Executor(makefile, variables, state, jobs=args.jobs,
+                        keepGoing=args.keep_going, silent=args.silent,
+                        alwaysMake=args.always_make, cache=cache)
+    try:
+        failed = executor.build(
+            args.targets or [makefile.defaultRule['target']])
+    finally:
+        state.save()
+        if cache:
+            evicted = cache.evict()
+            print(f'wp-build: cache: {cache.getSummary()}, {evicted}'
+                  ' evicted', flush=True)
+    if failed:
+        sys.exit(f'wp-build: {len(failed)} target(s) failed')
+
+if __name__ == '__main__':
+    main()
+
+###############################################################################
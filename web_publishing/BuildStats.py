@@ -0,0 +1,143 @@
+###############################################################################
+# NAME:             BuildStats.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      Records what each target costs to build, and reports on it.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+import argparse
+import collections
+import json
+import os
+import time
+
+BUILD_STATS = 'build-stats.jsonl'
+def getBuildStatsPath(buildDirectory):
+    return os.path.join(buildDirectory, BUILD_STATS)
+
+# Identifies the records of one invocation of make (or wp-build)
+RUN_VARIABLE = 'WP_BUILD_RUN'
+
+# wp-timeit points the tool it runs at a file in this variable, in which the
+# tool may leave fields for the record, e.g. the number of pdflatex passes.
+STATS_FILE_VARIABLE = 'WP_STATS_FILE'
+
+def getRunId():
+    return os.environ.get(RUN_VARIABLE) or time.strftime('%Y%m%dT%H%M%S')
+
+def reportStats(fields):
+    """Add fields to the record of the current tool, if it's being timed"""
+    statsFileName = os.environ.get(STATS_FILE_VARIABLE)
+    if not statsFileName:
+        return
+    with open(statsFileName, 'w') as statsFile:
+        json.dump(fields, statsFile)
+
+def appendRecord(logFileName, record):
+    # Appends of a single short line don't interleave between processes.
+    logDirectory = os.path.dirname(logFileName)
+    if logDirectory:
+        os.makedirs(logDirectory, exist_ok=True)
+    with open(logFileName, 'a') as logFile:
+        logFile.write(json.dumps(record) + '\n')
+
+def readRecords(logFileName):
+    records = []
+    with open(logFileName, 'r') as logFile:
+        for line in logFile:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+###############################################################################
+# Report
+###
+
+def formatSeconds(seconds):
+    return f'{seconds:9.2f}s'
+
+def getRuns(records):
+    """Group the records by run, in the order the runs started"""
+    runs = collections.OrderedDict()
+    for record in sorted(records, key=lambda record: record.get('time', 0)):
+        runs.setdefault(record.get('run', ''), []).append(record)
+    return runs
+
+def getSlowestTargets(records, count):
+    return sorted(records, key=lambda record: record['wall'],
+                  reverse=True)[:count]
+
+def getPhaseTotals(records):
+    """Obtain {phase: (count, wall, cpu)}"""
+    totals = {}
+    for record in records:
+        count, wall, cpu = totals.get(record['phase'], (0, 0.0, 0.0))
+        totals[record['phase']] = (count + 1, wall + record['wall'],
+                                   cpu + record['cpu'])
+    return totals
+
+def printReport(records, top, runCount):
+    runs = getRuns(records)
+    if not runs:
+        print('No builds recorded')
+        return
+    runId, latest = list(runs.items())[-1]
+    print(f'Run {runId}: {len(latest)} target(s)')
+
+    print('\nSlowest targets:')
+    for record in getSlowestTargets(latest, top):
+        details = f'{record["maxrss"] // 1024} MiB'
+        if 'passes' in record:
+            details += f', {record["passes"]} pass(es)'
+        if record['status']:
+            details += f', exit status {record["status"]}'
+        print(f'  {formatSeconds(record["wall"])}  {record["phase"]:5}'
+              f'  {record["target"]} ({details})')
+
+    print('\nTime per phase:')
+    for phase, (count, wall, cpu) in sorted(
+            getPhaseTotals(latest).items(), key=lambda item: -item[1][1]):
+        print(f'  {phase:5}  {count:6} target(s)  {formatSeconds(wall)} wall'
+              f'  {formatSeconds(cpu)} cpu')
+
+    print('\nRecent runs:')
+    for runId, runRecords in list(runs.items())[-runCount:]:
+        wall = sum(record['wall'] for record in runRecords)
+        failures = sum(1 for record in runRecords if record['status'])
+        slowest = max(runRecords, key=lambda record: record['wall'])
+        print(f'  {runId}  {len(runRecords):6} target(s)'
+              f'  {formatSeconds(wall)} total, {failures} failed,'
+              f' slowest: {slowest["target"]}')
+
+def main():
+    """Summarizes the build statistics recorded by wp-timeit"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--build-dir', '-d', default='.pdflatex',
+        help=('The path of the build directory, which holds the log'))
+    parser.add_argument(
+        '--top', '-n', type=int, default=10,
+        help=('The number of slowest targets to show'))
+    parser.add_argument(
+        '--runs', '-r', type=int, default=10,
+        help=('The number of recent runs to compare'))
+    arguments = parser.parse_args()
+    logFileName = getBuildStatsPath(arguments.build_dir)
+    try:
+        records = readRecords(logFileName)
+    except FileNotFoundError:
+        parser.exit(1, f'{logFileName}: No build statistics. Set BuildStats'
+                    ' in the configuration to record them.\n')
+    printReport(records, arguments.top, arguments.runs)
+
+if __name__ == '__main__':
+    main()
+
+###############################################################################
@@ -0,0 +1,172 @@
+###############################################################################
+# NAME:             Cache.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      A content-addressed cache of build outputs, which may be
+#                   shared between checkouts and machines.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+MANIFEST = 'manifest.json'
+
+def getKey(*parts):
+    """Obtain a cache key from the strings that determine an output"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode() + b'\0')
+    return digest.hexdigest()
+
+@functools.lru_cache(maxsize=None)
+def getToolVersion(tool):
+    """Obtain the first line of `tool --version', e.g. the TeX Live release"""
+    try:
+        result = subprocess.run([tool, '--version'], check=False,
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, text=True)
+    except FileNotFoundError:
+        return f'{tool}: missing'
+    return (result.stdout.splitlines() or [''])[0]
+
+class OutputCache:
+    """Entries live in <cacheDirectory>/<key[:2]>/<key>/, holding a copy of
+    each output and a manifest whose mtime records when it was last used."""
+    def __init__(self, cacheDirectory, maxSize=0):
+        self.cacheDirectory = cacheDirectory
+        self.maxSize = maxSize
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.lock = threading.Lock()
+
+    def getEntryDirectory(self, key):
+        return os.path.join(self.cacheDirectory, key[:2], key)
+
+    def count(self, counter):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def restore(self, key, outputs, extraOutputs=False):
+        """Copy the outputs for key into place. Returns False on a miss. With
+        extraOutputs, the entry may hold more outputs than those given (e.g.
+        the images of a page), which are copied to where they were stored
+        from."""
+        entryDirectory = self.getEntryDirectory(key)
+        manifestPath = os.path.join(entryDirectory, MANIFEST)
+        try:
+            with open(manifestPath, 'r') as manifestFile:
+                storedOutputs = json.load(manifestFile)['outputs']
+        except (FileNotFoundError, ValueError, KeyError):
+            self.count('misses')
+            return False
+        if len(storedOutputs) < len(outputs) or (
+                len(storedOutputs) > len(outputs) and not extraOutputs):
+            self.count('misses')
+            return False
+        outputs = list(outputs) + storedOutputs[len(outputs):]
+
+        for index, output in enumerate(outputs):
+            outputDirectory = os.path.dirname(output)
+            if outputDirectory:
+                os.makedirs(outputDirectory, exist_ok=True)
+            shutil.copyfile(os.path.join(entryDirectory, str(index)), output)
+        os.utime(manifestPath)
+        logging.info('Restored %s from the cache', ', '.join(outputs))
+        self.count('hits')
+        return True
+
+    def store(self, key, outputs):
+        """Store the outputs under key, if they all exist"""
+        outputs = list(outputs)
+        if not all(os.path.isfile(output) for output in outputs):
+            return
+        entryDirectory = self.getEntryDirectory(key)
+        if os.path.isdir(entryDirectory):
+            return
+        os.makedirs(os.path.dirname(entryDirectory), exist_ok=True)
+
+        # Entries are published with a rename, so that another process
+        # sharing the cache never sees one half-written.
+        temporaryDirectory = tempfile.mkdtemp(
+            dir=os.path.dirname(entryDirectory), prefix='.tmp-')
+        try:
+            for index, output in enumerate(outputs):
+                shutil.copyfile(output,
+                                os.path.join(temporaryDirectory, str(index)))
+            with open(os.path.join(temporaryDirectory, MANIFEST), 'w') \
+                 as manifestFile:
+                json.dump({'outputs': outputs}, manifestFile)
+            os.rename(temporaryDirectory, entryDirectory)
+            self.count('stored')
+        except OSError:
+            # Most likely, another process stored the same entry first.
+            shutil.rmtree(temporaryDirectory, ignore_errors=True)
+
+    def getEntries(self):
+        """Obtain (lastUsed, size, entryDirectory) for every entry"""
+        entries = []
+        if not os.path.isdir(self.cacheDirectory):
+            return entries
+        for prefix in os.scandir(self.cacheDirectory):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                if entry.name.startswith('.tmp-'):
+                    continue
+                try:
+                    lastUsed = os.stat(
+                        os.path.join(entry.path, MANIFEST)).st_mtime
+                    size = sum(item.stat().st_size
+                               for item in os.scandir(entry.path))
+                except FileNotFoundError:
+                    continue
+                entries.append((lastUsed, size, entry.path))
+        return entries
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits in
+        maxSize bytes. Returns the number of entries removed."""
+        if not self.maxSize:
+            return 0
+        entries = sorted(self.getEntries())
+        totalSize = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, entryDirectory in entries:
+            if totalSize <= self.maxSize:
+                break
+            shutil.rmtree(entryDirectory, ignore_errors=True)
+            totalSize -= size
+            evicted += 1
+        return evicted
+
+    def evictUnused(self, maxAge, keep=()):
+        """Remove the entries which haven't been used for maxAge seconds,
+        except for the keys in keep. Returns the number of entries removed."""
+        cutoff = time.time() - maxAge
+        evicted = 0
+        for lastUsed, _, entryDirectory in self.getEntries():
+            if lastUsed < cutoff \
+               and os.path.basename(entryDirectory) not in keep:
+                shutil.rmtree(entryDirectory, ignore_errors=True)
+                evicted += 1
+        return evicted
+
+    def getSummary(self):
+        return (f'{self.hits} hit(s), {self.misses} miss(es),'
+                f' {self.stored} stored')
+
+###############################################################################
@@ -0,0 +1,244 @@
+###############################################################################
+# NAME:             Compress.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      Writes precompressed copies of the site's assets, for the
+#                   web server to send as they are.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+import argparse
+import functools
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import sys
+
+from .Cache import OutputCache, getKey
+
+# Text assets are always compressed. Other assets only when it's worth it.
+TEXT_EXTENSIONS = ('.html', '.css', '.js', '.json', '.svg')
+OTHER_EXTENSIONS = ('.pdf',)
+
+# A compressed copy must be at most this fraction of the size of the original
+# to be kept.
+MAX_RATIO = 0.9
+
+FORMAT_EXTENSIONS = {'gzip': '.gz', 'brotli': '.br'}
+
+COMPRESS_STATE = 'compress-state.json'
+def getCompressStatePath(buildDirectory):
+    return os.path.join(buildDirectory, COMPRESS_STATE)
+
+def compressGzip(data):
+    # A fixed mtime, so that unchanged files compress to the same bytes
+    output = io.BytesIO()
+    with gzip.GzipFile(filename='', mode='wb', compresslevel=9,
+                       fileobj=output, mtime=0) as gzipFile:
+        gzipFile.write(data)
+    return output.getvalue()
+
+def compressBrotli(data):
+    import brotli # pylint: disable=import-outside-toplevel
+    return brotli.compress(data, quality=11)
+
+COMPRESSORS = {'gzip': compressGzip, 'brotli': compressBrotli}
+
+def writeAtomically(filename, data):
+    temporaryFileName = filename + '.tmp'
+    with open(temporaryFileName, 'wb') as outputFile:
+        outputFile.write(data)
+    os.replace(temporaryFileName, filename)
+
+def isUpToDate(filename, status, entry):
+    """Whether the state entry says filename hasn't changed, and all of its
+    compressed siblings are still there and newer than it."""
+    if not entry or entry[:2] != [status.st_mtime_ns, status.st_size]:
+        return False
+    for extension in entry[3]:
+        try:
+            if os.stat(filename + extension).st_mtime_ns \
+               < status.st_mtime_ns:
+                return False
+        except FileNotFoundError:
+            return False
+    return True
+
+def compressFile(options, job):
+    """Write the compressed siblings of one file, reporting instead of
+    raising. Returns (filename, stateEntry, error, compressed)."""
+    filename, entry = job
+    try:
+        status = os.stat(filename)
+        if isUpToDate(filename, status, entry):
+            return filename, entry, None, 0
+        with open(filename, 'rb') as inputFile:
+            data = inputFile.read()
+        digest = hashlib.sha256(data).hexdigest()
+        sameContent = entry is not None and entry[2] == digest
+        cache = None
+        if options['cacheDirectory']:
+            cache = OutputCache(options['cacheDirectory'])
+
+        written = []
+        compressed = 0
+        for outputFormat in options['formats']:
+            extension = FORMAT_EXTENSIONS[outputFormat]
+            sibling = filename + extension
+            if sameContent and extension not in entry[3] \
+               and not filename.endswith(TEXT_EXTENSIONS):
+                # We already found this one isn't worth compressing.
+                continue
+            if sameContent and os.path.isfile(sibling):
+                os.utime(sibling)
+                written.append(extension)
+                continue
+            key = getKey('compress', outputFormat, digest)
+            if cache and cache.restore(key, [sibling]):
+                written.append(extension)
+                continue
+
+            output = COMPRESSORS[outputFormat](data)
+            compressed += 1
+            if not filename.endswith(TEXT_EXTENSIONS) \
+               and len(output) > len(data) * MAX_RATIO:
+                if os.path.isfile(sibling):
+                    os.remove(sibling)
+                continue
+            writeAtomically(sibling, output)
+            written.append(extension)
+            if cache:
+                cache.store(key, [sibling])
+        entry = [status.st_mtime_ns, status.st_size, digest, written]
+    except Exception as e: # pylint: disable=broad-except
+        return filename, None, f'{type(e).__name__}: {e}', 0
+    return filename, entry, None, compressed
+
+def locateAssets(directories):
+    """Obtain the assets in directories, removing compressed copies of assets
+    that are no longer there"""
+    assets = []
+    for directory in directories:
+        for dirpath, _, filenames in os.walk(directory):
+            assets.extend(
+                os.path.join(dirpath, filename) for filename in filenames
+                if filename.endswith(TEXT_EXTENSIONS + OTHER_EXTENSIONS))
+            for filename in filenames:
+                base, extension = os.path.splitext(filename)
+                if extension in FORMAT_EXTENSIONS.values() \
+                   and base.endswith(TEXT_EXTENSIONS + OTHER_EXTENSIONS) \
+                   and base not in filenames:
+                    os.remove(os.path.join(dirpath, filename))
+    return assets
+
+def readState(stateFileName):
+    try:
+        with open(stateFileName, 'r') as stateFile:
+            return json.load(stateFile)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def writeState(stateFileName, state):
+    stateDirectory = os.path.dirname(stateFileName)
+    if stateDirectory:
+        os.makedirs(stateDirectory, exist_ok=True)
+    temporaryFileName = stateFileName + '.tmp'
+    with open(temporaryFileName, 'w') as stateFile:
+        json.dump(state, stateFile)
+    os.replace(temporaryFileName, stateFileName)
+
+def compressDirectories(directories, jobs=None, options=None):
+    """Compress every asset in directories. Returns the files that failed."""
+    options = {'formats': ['gzip'], 'stateFile': '', 'cacheDirectory': '',
+               'cacheMaxSize': 0, **(options if options else {})}
+    state = readState(options['stateFile']) if options['stateFile'] else {}
+    jobsList = [(filename, state.get(filename))
+                for filename in locateAssets(directories)]
+
+    fileOptions = {key: value for key, value in options.items()
+                   if key in ('formats', 'cacheDirectory')}
+    if len(jobsList) <= 1:
+        results = [compressFile(fileOptions, job) for job in jobsList]
+    else:
+        # multiprocessing is slow to import, and most runs have little to do.
+        # pylint: disable=import-outside-toplevel
+        from concurrent.futures import ProcessPoolExecutor
+        jobs = jobs or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(
+                functools.partial(compressFile, fileOptions), jobsList,
+                chunksize=max(1, len(jobsList) // (jobs * 4))))
+
+    failures = []
+    newState = {}
+    for filename, entry, error, _ in results:
+        if error:
+            logging.error('%s: %s', filename, error)
+            failures.append(filename)
+        else:
+            newState[filename] = entry
+    if options['stateFile']:
+        writeState(options['stateFile'], newState)
+
+    compressed = sum(result[3] for result in results)
+    summary = f'wp-compress: {len(results)} file(s), {compressed} compressed'
+    if options['cacheDirectory']:
+        evicted = OutputCache(options['cacheDirectory'],
+                              options['cacheMaxSize']).evict()
+        summary += f', {evicted} evicted'
+    print(summary)
+    return failures
+
+def main():
+    """Writes compressed copies of the HTML, CSS, JS, SVG and PDF files"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        'directories', nargs='+',
+        help=('The directories holding the published site'))
+    parser.add_argument(
+        '--format', '-f', action='append', choices=list(COMPRESSORS),
+        help=('A format to compress to. May be given more than once. The'
+              ' default is gzip. brotli requires the brotli module.'))
+    parser.add_argument(
+        '--jobs', '-j', type=int, default=None,
+        help=('The number of worker processes to use'))
+    parser.add_argument(
+        '--state', default='',
+        help=('The file recording the hash of each compressed file, so that'
+              ' unchanged files are skipped'))
+    parser.add_argument(
+        '--cache-dir', default='',
+        help=('Restore compressed files from (and store them in) this output'
+              ' cache'))
+    parser.add_argument(
+        '--cache-size', type=int, default=0,
+        help=('Trim the cache to this many bytes afterwards'))
+    arguments = parser.parse_args()
+    formats = arguments.format if arguments.format else ['gzip']
+    if 'brotli' in formats:
+        try:
+            # pylint: disable=import-outside-toplevel,unused-import
+            import brotli
+        except ImportError:
+            parser.error('brotli compression requires the brotli module')
+
+    failures = compressDirectories(arguments.directories, arguments.jobs, {
+        'formats': formats,
+        'stateFile': arguments.state,
+        'cacheDirectory': arguments.cache_dir,
+        'cacheMaxSize': arguments.cache_size,
+    })
+    if failures:
+        sys.exit(f'Failed to compress {len(failures)} file(s)')
+
+if __name__ == '__main__':
+    main()
+
+###############################################################################
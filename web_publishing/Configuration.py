@@ -7,23 +7,27 @@
 #
 # CREATED:          02/28/2021
 #
-# LAST EDITED:      02/28/2021
+# LAST EDITED:      10/17/2026
 ###
 
-from importlib import resources
 import logging
 
-import yaml
-from cerberus import Validator
-
 def getConfiguration(configurationFileName):
     try:
         with open(configurationFileName) as configurationFile:
-            document = yaml.load(''.join(configurationFile.readlines()),
-                                 Loader=yaml.FullLoader)
+            text = configurationFile.read()
+        # These take longer to import than the rest of wp-genmakefile, so
+        # only import them when there's a configuration file to read.
+        # pylint: disable=import-outside-toplevel
+        from importlib import resources
+        import yaml
+        from cerberus import Validator
+        # The libyaml loader is much faster, where it's available.
+        loader = getattr(yaml, 'CFullLoader', yaml.FullLoader)
+        document = yaml.load(text, Loader=loader)
         logging.info('Using configuration file.')
         documentSchema = yaml.load(resources.read_text(
-            'web_publishing', 'schema.yaml'), Loader=yaml.FullLoader)
+            'web_publishing', 'schema.yaml'), Loader=loader)
         validator = Validator(schema=documentSchema)
         validator.validate(document)
         return document
@@ -42,10 +46,13 @@ def applyConfiguration(readConfig, defaultConfig):
 CONFIG_DEFAULTS = {
     'DocumentRoot': './',
     'BuildDirectory': '.pdflatex',
+    'CacheDirectory': '',
+    'CacheMaxSize': 2 * 1024 ** 3,
     'ServerPDFPath': 'pdf',
     'ServerKeepPDFPath': False,
     'PageData': [],
     'minted': True,
+    'PdflatexMaxPasses': 5,
     'BuildExclude': [],
     'MiddlemanDirectory': 'source',
     'Host': '',
@@ -55,6 +62,19 @@ CONFIG_DEFAULTS = {
     'WebIndex': '',
     'BookRoot': './',
     'CopyFiles': [],
+    'DependencyCache': True,
+    'Precompress': [],
+    'SharedColors': False,
+    'Minify': False,
+    'PageBudget': 0,
+    'PageBudgetAction': 'warn',
+    'OptimizeImages': False,
+    'BuildStats': False,
+    'HighlightCache': False,
+    'HighlightCacheMaxAge': 30,
+    'PrecompiledFormats': False,
+    'DraftBooks': False,
+    'Search': False,
 }
 
 ###############################################################################
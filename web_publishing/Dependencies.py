@@ -0,0 +1,221 @@
+###############################################################################
+# NAME:             Dependencies.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      Discovers the dependency graph of a LaTeX project.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+import logging
+import os
+import re
+
+# One pass over the file finds every command we care about. Comments are
+# matched (and ignored) by the first alternative, so that commands in them
+# are never seen.
+LATEX_TOKEN = re.compile(
+    r'(?P<comment>(?<!\\)%[^\n]*)'
+    r'|(?P<document>\\begin\s*\{document\})'
+    r'|\\(?P<command>documentclass|LoadClass|usepackage|RequirePackage'
+    r'|subfile|input|include|includegraphics|bibliography|addbibresource)'
+    r'(?![A-Za-z])\*?\s*(?:\[(?P<options>[^\]]*)\])?'
+    r'\s*\{(?P<argument>[^}]*)\}')
+
+# Commands whose argument is a comma-separated list of names
+LIST_COMMANDS = ('usepackage', 'RequirePackage', 'bibliography')
+
+GRAPHICS_EXTENSIONS = ('.pdf', '.png', '.jpg', '.jpeg', '.eps', '.svg')
+
+# Files which are themselves scanned for further dependencies
+TEX_EXTENSIONS = ('.tex', '.cls', '.sty')
+
+# The code blocks minted highlights: minted environments, and \mint with
+# either delimiters or braces. The first alternative skips comments, as above.
+CODE_BLOCK = re.compile(
+    r'(?P<comment>(?<!\\)%[^\n]*)'
+    r'|\\begin\s*\{minted\}\s*(?:\[(?P<options>[^\]]*)\])?'
+    r'\s*\{(?P<language>[^}]*)\}[^\n]*\n(?P<code>.*?)'
+    r'^[ \t]*\\end\s*\{minted\}'
+    r'|\\mint(?![A-Za-z])\s*(?:\[(?P<mintOptions>[^\]]*)\])?'
+    r'\s*\{(?P<mintLanguage>[^}]*)\}'
+    r'(?:\{(?P<bracedCode>[^}\n]*)\}'
+    r'|(?P<delimiter>[^\s{])(?P<delimitedCode>[^\n]*?)(?P=delimiter))',
+    re.DOTALL | re.MULTILINE)
+
+def scanReferences(text):
+    """Tokenize text, returning [command, options, argument, inPreamble] for
+    every file reference."""
+    references = []
+    inPreamble = True
+    for match in LATEX_TOKEN.finditer(text):
+        if match.group('comment'):
+            continue
+        if match.group('document'):
+            inPreamble = False
+            continue
+        command = match.group('command')
+        arguments = [match.group('argument')]
+        if command in LIST_COMMANDS:
+            arguments = match.group('argument').split(',')
+        for argument in arguments:
+            argument = argument.strip()
+            if argument:
+                references.append([command, match.group('options') or '',
+                                   argument, inPreamble])
+    return references
+
+def scanCodeBlocks(text):
+    """Obtain [language, options, code] for every code block in text. The
+    code is as minted writes it for pygmentize: each line ends in a
+    newline."""
+    codeBlocks = []
+    for match in CODE_BLOCK.finditer(text):
+        if match.group('comment'):
+            continue
+        if match.group('language') is not None:
+            codeBlocks.append([match.group('language').strip(),
+                               match.group('options') or '',
+                               match.group('code')])
+            continue
+        code = match.group('bracedCode')
+        if code is None:
+            code = match.group('delimitedCode')
+        codeBlocks.append([match.group('mintLanguage').strip(),
+                           match.group('mintOptions') or '', code + '\n'])
+    return codeBlocks
+
+def getPreambleText(text):
+    """Obtain the text before \\begin{document}, or None if there isn't one"""
+    for match in LATEX_TOKEN.finditer(text):
+        if match.group('document'):
+            return text[:match.start()]
+    return None
+
+def scanFile(text):
+    return {'references': scanReferences(text),
+            'codeBlocks': scanCodeBlocks(text),
+            'preamble': getPreambleText(text)}
+
+def getCandidates(command, options, argument):
+    """Obtain the paths that a reference may resolve to, in order."""
+    if command in ('documentclass', 'LoadClass'):
+        # \documentclass[Main.tex]{subfiles} depends on the preamble of the
+        # main file.
+        candidates = [argument + '.cls']
+        if argument == 'subfiles':
+            candidates.extend(option.strip() for option in options.split(','))
+        return candidates
+    if command in ('usepackage', 'RequirePackage'):
+        return [argument + '.sty']
+    if command == 'bibliography':
+        return [argument + '.bib']
+    if command == 'addbibresource':
+        return [argument]
+    if command == 'includegraphics':
+        return [argument] + [argument + extension
+                             for extension in GRAPHICS_EXTENSIONS]
+    if command == 'subfile' or not os.path.splitext(argument)[1]:
+        return [argument + '.tex', argument]
+    return [argument]
+
+class DependencyGraph:
+    def __init__(self, dependencyCache=None):
+        self.dependencyCache = dependencyCache
+        self.scans = {}
+        self.directDependencies = {}
+
+    def getScan(self, filePath):
+        if filePath not in self.scans:
+            if self.dependencyCache:
+                self.scans[filePath] = self.dependencyCache.get(
+                    filePath, scanFile)
+            else:
+                with open(filePath, 'r') as latexFile:
+                    self.scans[filePath] = scanFile(latexFile.read())
+        return self.scans[filePath]
+
+    def getReferences(self, filePath):
+        return self.getScan(filePath)['references']
+
+    def getCodeBlocks(self, filePath):
+        return self.getScan(filePath)['codeBlocks']
+
+    def getPreamble(self, filePath):
+        return self.getScan(filePath)['preamble']
+
+    def getScannedFiles(self):
+        """Obtain every file scanned so far"""
+        return list(self.scans)
+
+    @classmethod
+    def resolve(cls, filePath, candidates):
+        # Paths are relative to the project root, which is where pdflatex
+        # finds them in the build directory. Fall back to paths relative to
+        # the file that references them.
+        directory = os.path.dirname(filePath)
+        for root in ('', directory) if directory else ('',):
+            for candidate in candidates:
+                potentialDependency = os.path.normpath(
+                    os.path.join(root, candidate))
+                if os.path.isfile(potentialDependency):
+                    return potentialDependency
+        return None
+
+    def getDirectDependencies(self, filePath, preambleOnly=False):
+        """Obtain (dependency, followPreambleOnly) for each file referenced
+        by filePath."""
+        key = (filePath, preambleOnly)
+        if key in self.directDependencies:
+            return self.directDependencies[key]
+        dependencies = []
+        for command, options, argument, inPreamble in \
+                self.getReferences(filePath):
+            if preambleOnly and not inPreamble:
+                continue
+            dependency = self.resolve(
+                filePath, getCandidates(command, options, argument))
+            if dependency:
+                dependencies.append((dependency, command == 'documentclass'))
+        self.directDependencies[key] = dependencies
+        return dependencies
+
+    def getPreambleDependencies(self, filePath):
+        """Obtain every file that the preamble of filePath depends on,
+        transitively."""
+        dependencies = {}
+        for dependency, _ in self.getDirectDependencies(
+                filePath, preambleOnly=True):
+            dependencies[dependency] = None
+            if dependency.endswith(TEX_EXTENSIONS):
+                dependencies.update(
+                    (transitive, None)
+                    for transitive in self.getDependencies(dependency))
+        return list(dependencies)
+
+    def getDependencies(self, filePath):
+        """Obtain every file that filePath depends on, transitively."""
+        dependencies = []
+        seen = {filePath}
+        visited = {(filePath, False)}
+        stack = [(filePath, False)]
+        while stack:
+            current, preambleOnly = stack.pop()
+            for dependency, followPreambleOnly in \
+                    self.getDirectDependencies(current, preambleOnly):
+                if dependency not in seen:
+                    seen.add(dependency)
+                    logging.info('%s: Discovered dependency %s', filePath,
+                                 dependency)
+                    dependencies.append(dependency)
+                key = (dependency, followPreambleOnly)
+                if key not in visited \
+                   and dependency.endswith(TEX_EXTENSIONS):
+                    visited.add(key)
+                    stack.append(key)
+        return dependencies
+
+###############################################################################
@@ -0,0 +1,94 @@
+###############################################################################
+# NAME:             DependencyCache.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      Persistent cache of the results of scanning source files.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+import hashlib
+import json
+import logging
+import os
+
+DEPENDENCY_CACHE = 'dependencies.json'
+def getDependencyCachePath(buildDirectory):
+    return os.path.join(buildDirectory, DEPENDENCY_CACHE)
+
+class DependencyCache:
+    """Maps each file to the result of scanning it, keyed by the mtime, size
+    and content hash of the file."""
+
+    # Increment this whenever the format of the scanned values changes.
+    VERSION = 4
+
+    def __init__(self, cacheFileName):
+        self.cacheFileName = cacheFileName
+        self.entries = {}
+        self.seen = set()
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.cacheFileName, 'r') as cacheFile:
+                document = json.load(cacheFile)
+        except FileNotFoundError:
+            return
+        except ValueError as e:
+            logging.warning('%s: Ignoring corrupt cache: %s',
+                            self.cacheFileName, str(e))
+            return
+        if document.get('version') != self.VERSION:
+            logging.info('%s: Discarding cache from another version',
+                         self.cacheFileName)
+            return
+        self.entries = document.get('entries', {})
+
+    def get(self, filePath, scanner):
+        """Obtain scanner(text) for filePath, scanning only if it changed."""
+        self.seen.add(filePath)
+        status = os.stat(filePath)
+        entry = self.entries.get(filePath)
+        if entry and entry['mtime'] == status.st_mtime_ns \
+           and entry['size'] == status.st_size:
+            return entry['value']
+
+        with open(filePath, 'rb') as inputFile:
+            content = inputFile.read()
+        digest = hashlib.sha256(content).hexdigest()
+        if not entry or entry['hash'] != digest:
+            logging.info('Scanning %s', filePath)
+            entry = {'hash': digest,
+                     'value': scanner(content.decode(errors='replace'))}
+        # Touched, but not modified: keep the value, refresh the stat key.
+        entry['mtime'] = status.st_mtime_ns
+        entry['size'] = status.st_size
+        self.entries[filePath] = entry
+        self.dirty = True
+        return entry['value']
+
+    def save(self):
+        # Forget files that have been removed from the tree.
+        for filePath in list(self.entries):
+            if filePath not in self.seen and not os.path.isfile(filePath):
+                del self.entries[filePath]
+                self.dirty = True
+        if not self.dirty:
+            return
+
+        cacheDirectory = os.path.dirname(self.cacheFileName)
+        if cacheDirectory:
+            os.makedirs(cacheDirectory, exist_ok=True)
+        temporaryFileName = self.cacheFileName + '.tmp'
+        with open(temporaryFileName, 'w') as cacheFile:
+            json.dump({'version': self.VERSION, 'entries': self.entries},
+                      cacheFile)
+        os.replace(temporaryFileName, self.cacheFileName)
+        self.dirty = False
+
+###############################################################################
@@ -0,0 +1,365 @@
+###############################################################################
+# NAME:             Deploy.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      Publishes the site incrementally, and atomically.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+
+# The served path is a symlink to one of the releases in a directory beside
+# it, e.g. /var/www/site -> .site.releases/20261017120000. Each release
+# starts as a hard-linked copy of the last one, so that only the changes are
+# sent, and is only swapped in once it is complete.
+RELEASES_FORMAT = '.{}.releases'
+
+# The number of releases kept, including the current one
+KEEP_RELEASES = 3
+
+DEPLOY_MANIFEST = 'deploy-manifest.json'
+def getDeployManifestPath(buildDirectory):
+    return os.path.join(buildDirectory, DEPLOY_MANIFEST)
+
+class DeployError(Exception):
+    pass
+
+def getReleasesDirectory(destination):
+    destination = destination.rstrip('/')
+    return os.path.join(os.path.dirname(destination),
+                        RELEASES_FORMAT.format(os.path.basename(destination)))
+
+def getReleaseName():
+    return time.strftime('%Y%m%d%H%M%S', time.gmtime())
+
+###############################################################################
+# Local tree
+###
+
+def getLocalFiles(sources):
+    """Map the remote path of each file to its local path. As with rsync, the
+    contents of a source ending in '/' are sent, otherwise the directory
+    itself is."""
+    files = {}
+    for source in sources:
+        if not os.path.isdir(source):
+            raise DeployError(f'{source}: No such directory')
+        prefix = '' if source.endswith('/') \
+            else os.path.basename(os.path.normpath(source))
+        for dirpath, _, filenames in os.walk(source):
+            for filename in filenames:
+                localPath = os.path.join(dirpath, filename)
+                remotePath = os.path.normpath(os.path.join(
+                    prefix, os.path.relpath(localPath, source)))
+                files[remotePath] = localPath
+    return files
+
+class Manifest:
+    """The content hash of every file in the last published release, with a
+    stat key so that unchanged files aren't hashed again."""
+    def __init__(self, manifestFileName):
+        self.manifestFileName = manifestFileName
+        self.destination = None
+        self.release = None
+        self.files = {}
+        try:
+            with open(manifestFileName, 'r') as manifestFile:
+                document = json.load(manifestFile)
+            self.destination = document['destination']
+            self.release = document['release']
+            self.files = document['files']
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+
+    def hashFiles(self, localFiles):
+        """Obtain the entries of a new manifest for localFiles"""
+        entries = {}
+        for remotePath, localPath in localFiles.items():
+            status = os.stat(localPath)
+            key = [status.st_mtime_ns, status.st_size]
+            entry = self.files.get(remotePath)
+            if entry and entry[:2] == key:
+                entries[remotePath] = entry
+                continue
+            with open(localPath, 'rb') as localFile:
+                digest = hashlib.sha256(localFile.read()).hexdigest()
+            entries[remotePath] = key + [digest]
+        return entries
+
+    def save(self, destination, release, files):
+        self.destination = destination
+        self.release = release
+        self.files = files
+        manifestDirectory = os.path.dirname(self.manifestFileName)
+        if manifestDirectory:
+            os.makedirs(manifestDirectory, exist_ok=True)
+        temporaryFileName = self.manifestFileName + '.tmp'
+        with open(temporaryFileName, 'w') as manifestFile:
+            json.dump({'destination': destination, 'release': release,
+                       'files': files}, manifestFile)
+        os.replace(temporaryFileName, self.manifestFileName)
+
+###############################################################################
+# Transports
+###
+
+class LocalTransport:
+    """Publishes to a directory on this machine, e.g. for testing"""
+    def __init__(self, destination):
+        self.destination = destination.rstrip('/')
+        self.releases = getReleasesDirectory(destination)
+
+    def getDescription(self):
+        return self.destination
+
+    def getCurrentRelease(self):
+        if os.path.islink(self.destination):
+            return os.path.basename(os.readlink(self.destination))
+        if os.path.exists(self.destination):
+            raise DeployError(
+                f'{self.destination} is not a symlink. Move it away once, to'
+                ' enable atomic deploys.')
+        return None
+
+    def stageRelease(self, base, release):
+        target = os.path.join(self.releases, release)
+        if base:
+            shutil.copytree(os.path.join(self.releases, base), target,
+                            symlinks=True, copy_function=os.link)
+        else:
+            os.makedirs(target)
+
+    def upload(self, release, files):
+        for remotePath, localPath in files.items():
+            target = os.path.join(self.releases, release, remotePath)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            # Never write through a hard link to the previous release.
+            temporaryFileName = target + '.tmp'
+            shutil.copyfile(localPath, temporaryFileName)
+            os.replace(temporaryFileName, target)
+
+    def delete(self, release, remotePaths):
+        root = os.path.join(self.releases, release)
+        for remotePath in remotePaths:
+            target = os.path.join(root, remotePath)
+            os.remove(target)
+            directory = os.path.dirname(target)
+            while directory != root and not os.listdir(directory):
+                os.rmdir(directory)
+                directory = os.path.dirname(directory)
+
+    def activate(self, release):
+        temporaryLink = self.destination + '.tmp'
+        if os.path.lexists(temporaryLink):
+            os.remove(temporaryLink)
+        os.symlink(os.path.join(os.path.basename(self.releases), release),
+                   temporaryLink)
+        os.replace(temporaryLink, self.destination)
+
+    def remove(self, release):
+        shutil.rmtree(os.path.join(self.releases, release),
+                      ignore_errors=True)
+
+    def prune(self, keep):
+        releases = sorted(os.listdir(self.releases))
+        for release in releases[:-keep]:
+            self.remove(release)
+
+class SshTransport:
+    """Publishes to a host over ssh, sending files with rsync"""
+    def __init__(self, host, destination, port=None):
+        self.host = host
+        self.destination = destination.rstrip('/')
+        self.releases = getReleasesDirectory(destination)
+        self.ssh = ['ssh'] + (['-p', str(port)] if port else [])
+
+    def getDescription(self):
+        return f'{self.host}:{self.destination}'
+
+    def run(self, script, stdin=None):
+        result = subprocess.run(self.ssh + [self.host, script], input=stdin,
+                                stdout=subprocess.PIPE, check=False)
+        if result.returncode != 0:
+            raise DeployError(f'{self.host}: `{script}\' exited with status'
+                              f' {result.returncode}')
+        return result.stdout.decode()
+
+    def getCurrentRelease(self):
+        destination = shlex.quote(self.destination)
+        output = self.run(
+            f'if [ -L {destination} ]; then readlink {destination};'
+            f' elif [ -e {destination} ]; then echo /; fi').strip()
+        if output == '/':
+            raise DeployError(
+                f'{self.getDescription()} is not a symlink. Move it away'
+                ' once, to enable atomic deploys.')
+        return os.path.basename(output) if output else None
+
+    def stageRelease(self, base, release):
+        target = shlex.quote(os.path.join(self.releases, release))
+        if base:
+            source = shlex.quote(os.path.join(self.releases, base))
+            self.run(f'cp -al {source} {target}')
+        else:
+            self.run(f'mkdir -p {target}')
+
+    def upload(self, release, files):
+        # One rsync for each local directory, given the list of files.
+        # rsync writes a temporary file and renames it, which breaks the
+        # hard link to the previous release.
+        groups = {}
+        for remotePath, localPath in files.items():
+            relativePath = os.path.basename(localPath)
+            localRoot = os.path.dirname(localPath)
+            remoteRoot = os.path.dirname(remotePath)
+            # Strip the common suffix, to group files by their roots.
+            while remoteRoot and localRoot \
+                  and os.path.basename(remoteRoot) \
+                  == os.path.basename(localRoot):
+                relativePath = os.path.join(os.path.basename(localRoot),
+                                            relativePath)
+                remoteRoot = os.path.dirname(remoteRoot)
+                localRoot = os.path.dirname(localRoot)
+            groups.setdefault((localRoot or '.', remoteRoot), []).append(
+                relativePath)
+
+        for (localRoot, remoteRoot), relativePaths in groups.items():
+            target = os.path.normpath(
+                os.path.join(self.releases, release, remoteRoot))
+            self.run(f'mkdir -p {shlex.quote(target)}')
+            result = subprocess.run(
+                ['rsync', '-t', '--from0', '--files-from=-',
+                 '-e', ' '.join(self.ssh), localRoot + '/',
+                 f'{self.host}:{target}/'],
+                input='\0'.join(relativePaths).encode(), check=False)
+            if result.returncode != 0:
+                raise DeployError(
+                    f'rsync exited with status {result.returncode}')
+
+    def delete(self, release, remotePaths):
+        root = shlex.quote(os.path.join(self.releases, release))
+        self.run(f'cd {root} && xargs -0 rm -f -- &&'
+                 ' find . -mindepth 1 -type d -empty -delete',
+                 stdin='\0'.join(remotePaths).encode())
+
+    def activate(self, release):
+        # mv -T renames the new link over the old one, atomically.
+        target = shlex.quote(os.path.join(os.path.basename(self.releases),
+                                          release))
+        temporaryLink = shlex.quote(self.destination + '.tmp')
+        self.run(f'rm -f {temporaryLink} && ln -s {target} {temporaryLink}'
+                 f' && mv -T {temporaryLink} {shlex.quote(self.destination)}')
+
+    def remove(self, release):
+        self.run(
+            f'rm -rf {shlex.quote(os.path.join(self.releases, release))}')
+
+    def prune(self, keep):
+        self.run(f'cd {shlex.quote(self.releases)} && ls -1 | sort'
+                 f' | head -n -{keep} | xargs -r rm -rf --')
+
+###############################################################################
+# Deploy
+###
+
+def deploy(transport, sources, manifest, dryRun=False):
+    """Publish the files in sources, sending only what changed since the
+    last deploy recorded in the manifest."""
+    destination = transport.getDescription()
+    files = getLocalFiles(sources)
+    entries = manifest.hashFiles(files)
+
+    current = transport.getCurrentRelease()
+    if current and manifest.destination == destination \
+       and manifest.release == current:
+        published = {remotePath: entry[2]
+                     for remotePath, entry in manifest.files.items()}
+    else:
+        # We don't know what the current release holds: send everything.
+        logging.info('%s: No manifest of the current release', destination)
+        current = None
+        published = {}
+
+    changed = {remotePath: files[remotePath] for remotePath in files
+               if published.get(remotePath) != entries[remotePath][2]}
+    removed = sorted(remotePath for remotePath in published
+                     if remotePath not in files)
+    print(f'wp-deploy: {destination}: {len(changed)} changed,'
+          f' {len(removed)} removed, {len(files) - len(changed)} unchanged')
+    if dryRun or (not changed and not removed and current):
+        return
+
+    release = getReleaseName()
+    if release == current:
+        time.sleep(1)
+        release = getReleaseName()
+    transport.stageRelease(current, release)
+    try:
+        transport.upload(release, changed)
+        transport.delete(release, removed)
+        transport.activate(release)
+    except BaseException:
+        transport.remove(release)
+        raise
+    manifest.save(destination, release, entries)
+    transport.prune(KEEP_RELEASES)
+
+def main():
+    """Publishes the built site"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--host', '-H', default='',
+        help=('The host to publish to over ssh. If not given, the destination'
+              ' is a local directory.'))
+    parser.add_argument(
+        '--port', '-p', type=int, default=None,
+        help=('The port of the ssh server on the host'))
+    parser.add_argument(
+        '--destination', '-d', required=True,
+        help=('The path the site is served from. This becomes a symlink to'
+              ' the current release.'))
+    parser.add_argument(
+        '--manifest', '-m', default='.wp-deploy.json',
+        help=('The file recording what was last published'))
+    parser.add_argument(
+        '--dry-run', '-n', action='store_true', default=False,
+        help=('Only report what would be sent'))
+    parser.add_argument(
+        '-v', action='store_true', default=False,
+        help=('Verbose output'))
+    parser.add_argument(
+        'sources', nargs='+',
+        help=('The directories to publish. As with rsync, the contents of a'
+              ' directory ending in "/" are published, rather than the'
+              ' directory itself.'))
+    args = parser.parse_args()
+    if args.v:
+        logging.basicConfig(level=logging.DEBUG)
+
+    if args.host:
+        transport = SshTransport(args.host, args.destination, args.port)
+    else:
+        transport = LocalTransport(args.destination)
+    try:
+        deploy(transport, args.sources, Manifest(args.manifest), args.dry_run)
+    except (DeployError, OSError) as error:
+        print(f'wp-deploy: {error}', file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
+
+###############################################################################
@@ -0,0 +1,135 @@
+###############################################################################
+# NAME:             Draft.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      Builds a draft of a book, recompiling only the chapters
+#                   whose inputs changed since the last draft.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+
+from .BuildStats import reportStats
+from .Pdflatex import getJobName, runPdflatex
+
+# The draft driver reads \jobname.includeonly in its preamble. It's empty for
+# a full build.
+INCLUDE_ONLY = '.includeonly'
+DRAFT_STATE = '.draft.json'
+
+def hashFiles(filenames):
+    """Obtain one hash of the content of filenames"""
+    digest = hashlib.sha256()
+    for filename in filenames:
+        digest.update(filename.encode() + b'\0')
+        try:
+            with open(filename, 'rb') as inputFile:
+                digest.update(hashlib.sha256(inputFile.read()).digest())
+        except FileNotFoundError:
+            digest.update(b'missing')
+    return digest.hexdigest()
+
+def readState(stateFileName):
+    try:
+        with open(stateFileName, 'r') as stateFile:
+            return json.load(stateFile)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def writeState(stateFileName, state):
+    temporaryFileName = stateFileName + '.tmp'
+    with open(temporaryFileName, 'w') as stateFile:
+        json.dump(state, stateFile)
+    os.replace(temporaryFileName, stateFileName)
+
+def getChangedChapters(manifest, state, hashes):
+    """Obtain the chapters to recompile, or None to recompile the whole book:
+    when the shared inputs changed, or there's no earlier draft."""
+    if not state or state.get('shared') != hashes['shared']:
+        return None
+    return [chapter for chapter in manifest['chapters']
+            if state.get('chapters', {}).get(chapter)
+            != hashes['chapters'][chapter]
+            or not os.path.isfile(chapter + '.aux')]
+
+def buildDraft(texFile, flags, manifest, maxPasses):
+    """Compile the chapters of the draft driver texFile that changed. The
+    .aux files of the others are kept, so their page numbers and labels are
+    still known. Returns the exit status of pdflatex and the number of
+    passes."""
+    jobName = getJobName(texFile, flags)
+    stateFileName = jobName + DRAFT_STATE
+    state = readState(stateFileName)
+    hashes = {'shared': hashFiles([texFile] + manifest['shared']),
+              'chapters': {chapter: hashFiles(inputs) for chapter, inputs
+                           in manifest['chapters'].items()}}
+
+    chapters = getChangedChapters(manifest, state, hashes)
+    if chapters is not None and not chapters \
+       and os.path.isfile(jobName + '.pdf'):
+        logging.info('%s: No chapter has changed', texFile)
+        return 0, 0
+    with open(jobName + INCLUDE_ONLY, 'w') as includeOnlyFile:
+        if chapters:
+            logging.info('%s: Recompiling %s', texFile, ', '.join(chapters))
+            includeOnlyFile.write(f'\\includeonly{{{",".join(chapters)}}}\n')
+    for chapter in manifest['chapters']:
+        os.makedirs(os.path.dirname(chapter) or '.', exist_ok=True)
+
+    returnCode, passes = runPdflatex(texFile, flags, maxPasses)
+    if returnCode == 0:
+        recorded = {}
+        if chapters is None:
+            chapters = list(manifest['chapters'])
+        else:
+            recorded.update(state.get('chapters', {}))
+        for chapter in chapters:
+            recorded[chapter] = hashes['chapters'][chapter]
+        writeState(stateFileName, {'shared': hashes['shared'],
+                                   'chapters': recorded})
+    return returnCode, passes
+
+def main():
+    """Builds a draft of a book"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--max-passes', '-n', type=int, default=5,
+        help=('The maximum number of times to run pdflatex'))
+    parser.add_argument(
+        '--manifest', '-m', required=True,
+        help=('The manifest of the chapters of the book, and the files each'
+              ' one depends on, written by wp-genmakefile'))
+    parser.add_argument(
+        'arguments', nargs=argparse.REMAINDER,
+        help=('The flags for pdflatex, followed by the draft driver. Separate'
+              ' these from the options above with "--".'))
+    arguments = parser.parse_args()
+    pdflatexArguments = arguments.arguments
+    if pdflatexArguments and pdflatexArguments[0] == '--':
+        pdflatexArguments = pdflatexArguments[1:]
+    if not pdflatexArguments:
+        parser.error('No TeX file given')
+    if arguments.max_passes < 1:
+        parser.error('--max-passes must be at least 1')
+    with open(arguments.manifest, 'r') as manifestFile:
+        manifest = json.load(manifestFile)
+
+    returnCode, passes = buildDraft(
+        pdflatexArguments[-1], pdflatexArguments[:-1], manifest,
+        arguments.max_passes)
+    reportStats({'passes': passes})
+    sys.exit(returnCode)
+
+if __name__ == '__main__':
+    main()
+
+###############################################################################
@@ -7,12 +7,14 @@
 #
 # CREATED:          02/24/2021
 #
-# LAST EDITED:      02/28/2021
+# LAST EDITED:      10/17/2026
 ###
 
 import logging
 import os
-import re
+
+from .Dependencies import DependencyGraph
+from .Makefile import Rule
 
 class WebFile:
     def __init__(self, filePath):
@@ -35,6 +37,38 @@ class WebFile:
             if tail:
                 components.insert(0, tail)
 
+###############################################################################
+# Output
+#
+# Everything downstream (make, Middleman, wp-deploy) treats a rewritten file
+# as a changed one, so the generated files are only written when their
+# content changes.
+###
+
+def writeIfChanged(filename, text, ignore=None, touch=False):
+    """Atomically write text to filename, unless the file already holds it.
+    Matches of the ignore pattern (e.g. a timestamp) aren't compared. If
+    touch is set, an unchanged file's mtime is updated instead, as make
+    expects of a target. Returns whether the file was written."""
+    def comparable(content):
+        return ignore.sub('', content) if ignore else content
+    try:
+        with open(filename, 'r') as currentFile:
+            if comparable(currentFile.read()) == comparable(text):
+                if touch:
+                    os.utime(filename)
+                return False
+    except (FileNotFoundError, UnicodeDecodeError):
+        pass
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporaryFileName = filename + '.tmp'
+    with open(temporaryFileName, 'w') as outputFile:
+        outputFile.write(text)
+    os.replace(temporaryFileName, filename)
+    return True
+
 ###############################################################################
 # LaTeX Files
 #
@@ -58,72 +92,218 @@ def getPdflatexFlags(minted):
         [key for key in pdflatexFlags if pdflatexFlags[key]['set']]
     )))
 
+# Every document builds in its own scratch directory for each format, so that
+# documents with the same basename, or the PDF and HTML builds of a document,
+# can't clobber each other under make -j. The files staged in the build
+# directory are linked into the scratch directory, rather than copied.
+STAGE_FORMAT = """ && cd {} && \\
+		for file in {}; do \\
+			mkdir -p $$(dirname $$file) && \\
+			ln -sf $(CURDIR)/{}/$$file $$file; \\
+		done"""
+def getStageCommand(scratchDirectory, buildDirectory, prerequisites):
+    buildPrefix = buildDirectory.rstrip(os.sep) + os.sep
+    stagedFiles = [prerequisite[len(buildPrefix):]
+                   for prerequisite in prerequisites
+                   if prerequisite.startswith(buildPrefix)]
+    if not stagedFiles:
+        return ''
+    return STAGE_FORMAT.format(scratchDirectory, ' '.join(stagedFiles),
+                               buildDirectory.rstrip(os.sep))
+
+# wp-pdflatex reruns pdflatex until the auxiliary files stop changing, at most
+# $(pdflatexMaxPasses) times. $(highlightEnvironment) points minted at the
+# project's highlighting cache, when it's enabled.
 PDF_RULE_FORMAT = """
 {}: {}
-	mkdir -p {}
-	export pdfFile=$(shell realpath $<) && cd {} && \\
-		pdflatex $(pdflatexFlags) $$pdfFile $(redirect)
-	export pdfFile=$(shell realpath $<) && cd {} && \\
-		pdflatex $(pdflatexFlags) $$pdfFile $(redirect)
+	mkdir -p {}{}
+	export pdfFile=$(shell realpath $<) $(highlightEnvironment) && \\
+		cd {} && \\
+		$(pdfTimer) wp-pdflatex -n $(pdflatexMaxPasses){} -- \\
+		$(pdflatexFlags) $$pdfFile $(redirect)
 	mkdir -p $(@D)
 	-mv {}$(basename $(<F)).pdf $@
 """
-def generatePdfRule(target, prerequisite, buildDirectory,
-                    *additionalPrerequisites):
+def generatePdfRule(target, prerequisite, buildDirectory, scratchDirectory,
+                    *additionalPrerequisites, formatName=''):
     prerequisites = prerequisite
     if additionalPrerequisites:
         prerequisites = ' '.join([prerequisite]
                                  + list(additionalPrerequisites))
-    return PDF_RULE_FORMAT.format(
-        target, prerequisites, buildDirectory, buildDirectory, buildDirectory,
-        buildDirectory + os.sep)
+    return Rule.fromText(PDF_RULE_FORMAT.format(
+        target, prerequisites, scratchDirectory,
+        getStageCommand(scratchDirectory, buildDirectory,
+                        additionalPrerequisites),
+        scratchDirectory, f' -f {formatName}' if formatName else '',
+        scratchDirectory + os.sep), kind='pdf')
+
+# Documents with the same preamble share a format, which mylatexformat dumps
+# from everything before \begin{document}. A document compiled with it skips
+# its own copy of the preamble. If the format can't be dumped, it's left
+# empty, and wp-pdflatex compiles without it.
+FORMAT_DIRECTORY = 'formats'
+def getFormatPaths(buildDirectory, formatName):
+    """Obtain the paths of the format, and of the preamble it's dumped from.
+    The format is staged at the top of the scratch directories, where
+    pdflatex finds it."""
+    return (os.path.join(buildDirectory, formatName + '.fmt'),
+            os.path.join(buildDirectory, FORMAT_DIRECTORY,
+                         formatName + '.tex'))
+
+FORMAT_RULE_FORMAT = """
+{}: {}
+	mkdir -p {}{}
+	cd {} && \\
+		pdflatex -ini -jobname={} $(pdflatexFlags) \\
+		'&pdflatex' mylatexformat.ltx {} $(redirect) || \\
+		{{ echo '$@: Could not dump the format' >&2 && : >{}.fmt; }}
+	mkdir -p $(@D)
+	mv {}{}.fmt $@
+"""
+def generateFormatRule(formatName, buildDirectory, *prerequisites):
+    target, preamble = getFormatPaths(buildDirectory, formatName)
+    scratchDirectory = os.path.join(buildDirectory, 'scratch',
+                                    FORMAT_DIRECTORY, formatName)
+    prerequisites = [preamble] + list(prerequisites)
+    buildPrefix = buildDirectory.rstrip(os.sep) + os.sep
+    return Rule.fromText(FORMAT_RULE_FORMAT.format(
+        target, ' '.join(prerequisites), scratchDirectory,
+        getStageCommand(scratchDirectory, buildDirectory, prerequisites),
+        scratchDirectory, formatName, preamble[len(buildPrefix):],
+        formatName, scratchDirectory + os.sep, formatName), kind='format')
 
 HTML_RULE_FORMAT = """
 {}: {}
-	export htmlFile=$(shell realpath $<) {} && cd {} && \\
-		make4ht -sm draft {}-f html5+tidy+join_colors $$htmlFile \\
-		$(redirect)
+	mkdir -p {}{}
+	export htmlFile=$(shell realpath $<) $(highlightEnvironment) {} && \\
+		cd {} && \\
+		$(htmlTimer) make4ht -sm draft {}-f html5+tidy+join_colors \\
+		$$htmlFile $(redirect)
 	-mkdir -p $(@D)
 	-mv {}$(basename $(<F)).html $@
 	-mv {}$(basename $(<F)).css $(basename $@).css
+	-find {} -maxdepth 1 -type f \\( -name '*.png' -o -name '*.svg' \\) \\
+		-exec mv -f {{}} $(@D) \\;
 """
-def generateHtmlRule(target, prerequisite, buildDirectory, tex4htConfig,
-                     *additionalPrerequisites):
+def generateHtmlRule(target, prerequisite, buildDirectory, scratchDirectory,
+                     tex4htConfig, *additionalPrerequisites):
     prerequisites = prerequisite
     if additionalPrerequisites:
         prerequisites = ' '.join([prerequisite]
                                  + list(additionalPrerequisites))
     setTeX4htConfig = '&& export tex4htCfg=$(shell realpath tex4ht.cfg)'
-    return HTML_RULE_FORMAT.format(
+    return Rule.fromText(HTML_RULE_FORMAT.format(
         target,
         prerequisites,
+        scratchDirectory,
+        getStageCommand(scratchDirectory, buildDirectory,
+                        additionalPrerequisites),
         setTeX4htConfig if tex4htConfig else '',
-        buildDirectory,
+        scratchDirectory,
         '-c tex4ht.cfg ' if tex4htConfig else '',
-        buildDirectory + os.sep, buildDirectory + os.sep)
+        scratchDirectory + os.sep, scratchDirectory + os.sep,
+        scratchDirectory),
+        kind='html', sideOutputs=[os.path.splitext(target)[0] + '.css'])
 
-ERB_RULE_FORMAT = """
+# A draft of a book compiles a driver which \include's a shim for each
+# \subfile chapter, so that wp-draft can pass the chapters that changed to
+# \includeonly. The draft's scratch directory keeps the .aux files of the
+# others, and the last draft, between builds.
+DRAFT_DIRECTORY = 'drafts'
+CHAPTER_DIRECTORY = 'wp-chapters'
+def getDraftPaths(buildDirectory, withoutExt):
+    """Obtain the paths of the draft PDF, its driver, and the manifest of
+    its chapters"""
+    draftBase = os.path.join(buildDirectory, DRAFT_DIRECTORY, withoutExt)
+    return draftBase + '.pdf', draftBase + '.tex', draftBase + '.json'
+
+def getChapterShim(chapterPath):
+    """Obtain the name the driver \\include's the chapter by"""
+    return os.path.join(CHAPTER_DIRECTORY, os.path.splitext(chapterPath)[0])
+
+DRAFT_RULE_FORMAT = """
 {}: {}
+	mkdir -p {}{}
+	cd {} && \\
+		$(pdfTimer) wp-draft -n $(pdflatexMaxPasses) -m {} -- \\
+		$(pdflatexFlags) {} $(redirect)
 	mkdir -p $(@D)
-	wp-prepare -d '{}' $< $(basename $<).css $@
+	-cp -f {}{}.pdf $@
 """
-def generateErbRule(target, prerequisite, pageData):
-    return ERB_RULE_FORMAT.format(
+def generateDraftRule(target, driver, manifest, buildDirectory,
+                      scratchDirectory, *additionalPrerequisites):
+    buildPrefix = buildDirectory.rstrip(os.sep) + os.sep
+    prerequisites = [driver, manifest] + list(additionalPrerequisites)
+    return Rule.fromText(DRAFT_RULE_FORMAT.format(
+        target, ' '.join(prerequisites), scratchDirectory,
+        getStageCommand(scratchDirectory, buildDirectory, prerequisites),
+        scratchDirectory, manifest[len(buildPrefix):],
+        driver[len(buildPrefix):], scratchDirectory + os.sep,
+        os.path.splitext(os.path.basename(driver))[0]), kind='draft')
+
+# ERB files are not rendered by their own rule. Instead, each stale page is
+# appended to a manifest, which `wp-prepare --batch' processes in one go from
+# the build rule.
+PREPARE_MANIFEST = 'prepare.manifest'
+def getPrepareManifest(buildDirectory):
+    return os.path.join(buildDirectory, PREPARE_MANIFEST)
+
+# wp-prepare records the navigation data of each page in a sidecar next to the
+# HTML file, so that wp-navigation doesn't have to parse the HTML again.
+def getMetadataPath(htmlPath):
+    return os.path.splitext(htmlPath)[0] + '.json'
+
+# It also records the terms on the page, which wp-search merges into the
+# site's search index.
+def getTermsPath(htmlPath):
+    return os.path.splitext(htmlPath)[0] + '.terms.json'
+
+ERB_RULE_FORMAT = """
+{}: {}
+	printf '%s\\t%s\\t%s\\t%s\\n' $< $(basename $<).css $@ '{}' >>{}
+"""
+def generateErbRule(target, prerequisite, pageData, buildDirectory):
+    return Rule.fromText(ERB_RULE_FORMAT.format(
         target, prerequisite,
-        ','.join([f'{key}={pageData[key]}' for key in pageData]))
+        ','.join([f'{key}={pageData[key]}' for key in pageData]),
+        getPrepareManifest(buildDirectory)), kind='erb')
+
+def getPathWithoutExtension(filePath, rootDirectory, webIndex=False):
+    """Obtain the path of the outputs of filePath, relative to the
+    rootDirectory and without an extension"""
+    partsNoExtension = WebFile.getComponentsOfPath(
+        os.path.splitext(filePath)[0])
+    directorySlice = len(WebFile.getComponentsOfPath(rootDirectory))
+    noExtensionNoRoot = partsNoExtension[directorySlice:]
+    if webIndex:
+        noExtensionNoRoot[-1] = 'index'
+    return os.path.join(*noExtensionNoRoot)
+
+def getSourcesDirectory(withoutExt, sourcesDirPrefix='sources-'):
+    parentDir, basenameNoExt = os.path.split(withoutExt)
+    return os.path.join(parentDir, sourcesDirPrefix + basenameNoExt)
 
 class LaTeXFile(WebFile):
     def __init__(self, path, rootDirectory='doc', buildDirectory='.pdflatex',
                  serverPdfPath='pdf', serverKeepPdfPath=False,
-                 pageData=None, minted=True, middlemanDirectory='source',
-                 bookFile=False, webIndex=False, sourcesDirPrefix='sources-'):
+                 pageData=None, minted=True, maxPasses=5,
+                 middlemanDirectory='source',
+                 bookFile=False, webIndex=False, sourcesDirPrefix='sources-',
+                 dependencyGraph=None, copyFiles=None):
         super().__init__(path)
+        self.dependencyGraph = dependencyGraph
+        if not dependencyGraph:
+            self.dependencyGraph = DependencyGraph()
         self.withoutExt = ''
         self.files = {
             'pdf': '',
             'erb': '',
             'html': '',
             'additional-prerequisites': [],
+            # The precompiled format of the preamble, if it has one
+            'format': '',
+            # The draft of a book, if drafts are enabled
+            'draft': '',
         }
         self.conf = {
             'rootdir': os.path.relpath(rootDirectory),
@@ -135,9 +315,11 @@ class LaTeXFile(WebFile):
             'pagedata': {} if not pageData else pageData,
             'tex4htconfig': os.path.isfile('tex4ht.cfg'),
             'minted': minted,
+            'maxpasses': maxPasses,
             'isbook': bookFile,
             'webindex': webIndex,
             'sourcesdirprefix': sourcesDirPrefix,
+            'copyfiles': copyFiles if copyFiles else [],
         }
         if self.conf['pagedata']:
             logging.info('%s: Using pageData=%s', self.getPath(),
@@ -148,13 +330,8 @@ class LaTeXFile(WebFile):
         rootDirectory = self.conf['rootdir']
         if not os.path.isdir(rootDirectory):
             raise FileNotFoundError(rootDirectory)
-        partsNoExtension = WebFile.getComponentsOfPath(
-            os.path.splitext(self.getPath())[0])
-        directorySlice = len(WebFile.getComponentsOfPath(rootDirectory))
-        noExtensionNoRoot = partsNoExtension[directorySlice:]
-        if self.conf['webindex']:
-            noExtensionNoRoot[-1] = 'index'
-        self.withoutExt = os.path.join(*noExtensionNoRoot)
+        self.withoutExt = getPathWithoutExtension(
+            self.getPath(), rootDirectory, self.conf['webindex'])
 
         # Now that we have the raw paths without extensions, set the target
         # paths
@@ -177,10 +354,17 @@ class LaTeXFile(WebFile):
         self.files['erb'] = os.path.join(self.conf['erbpath'],
                                     self.withoutExt + '.html' + '.erb')
 
+    def getScratchDirectory(self, outputFormat):
+        return os.path.join(self.conf['build'], 'scratch', outputFormat,
+                            self.withoutExt)
+
+    def getSourcesDirectory(self):
+        return getSourcesDirectory(self.withoutExt,
+                                   self.conf['sourcesdirprefix'])
+
     def addCopyRulesForSources(self, makefile):
-        parentDir, basenameNoExt = os.path.split(self.withoutExt)
-        sourcesDirPrerequisite = os.path.join(
-            parentDir, self.conf['sourcesdirprefix'] + basenameNoExt)
+        basenameNoExt = os.path.basename(self.withoutExt)
+        sourcesDirPrerequisite = self.getSourcesDirectory()
         if not os.path.isdir(sourcesDirPrerequisite):
             return
 
@@ -203,7 +387,8 @@ class LaTeXFile(WebFile):
             makefile.getDefaultRulePrerequisites().append('$(erbFiles)')
         makefile.appendToVariable('erbFiles', self.files['erb'])
         makefile.addRule(generateErbRule(self.files['erb'], self.files['html'],
-                                         self.conf['pagedata']))
+                                         self.conf['pagedata'],
+                                         self.conf['build']))
 
         # Add tex4ht.cfg copy rule
         htmlPrerequisites = []
@@ -221,36 +406,12 @@ class LaTeXFile(WebFile):
         makefile.appendToVariable('htmlFiles', self.files['html'])
         makefile.addRule(generateHtmlRule(
             self.files['html'], self.getPath(), self.conf['build'],
-            self.conf['tex4htconfig'], *htmlPrerequisites,
+            self.getScratchDirectory('html'), self.conf['tex4htconfig'],
+            *htmlPrerequisites,
             *self.files['additional-prerequisites']))
 
-    @classmethod
-    def tryGetDependencyFrom(cls, line, command, argumentNumber,
-                             fileExtension):
-        if command in line:
-            components = re.findall(r"[^{}\[\]]+", line)
-            if argumentNumber >= len(components):
-                return []
-            potentialDependency = components[argumentNumber] + fileExtension
-            if os.path.isfile(potentialDependency):
-                logging.info('Discovered dependency %s', potentialDependency)
-                return [potentialDependency]
-            return []
-        return []
-
     def getProjectDependencies(self):
-        with open(self.getPath(), 'r') as latexFile:
-            deps = []
-            for line in latexFile.readlines():
-                deps.extend(self.tryGetDependencyFrom(
-                    line, '\\documentclass', 1, '.cls'))
-                deps.extend(self.tryGetDependencyFrom(
-                    line, '\\documentclass', 2, '.cls'))
-                deps.extend(self.tryGetDependencyFrom(
-                    line, '\\documentclass', 1, ''))
-                deps.extend(self.tryGetDependencyFrom(
-                    line, '\\subfile', 1, '.tex'))
-            return deps
+        return self.dependencyGraph.getDependencies(self.getPath())
 
     def addRules(self, makefile):
         # Add Project Dependencies
@@ -259,6 +420,13 @@ class LaTeXFile(WebFile):
             self.files['additional-prerequisites'].append(target)
             makefile.addCopyRule(target, filename)
 
+        # Files copied for every document, e.g. classes in the cwd
+        for filename in self.conf['copyfiles']:
+            target = os.path.join(self.conf['build'], filename)
+            if target not in self.files['additional-prerequisites']:
+                self.files['additional-prerequisites'].append(target)
+            makefile.addCopyRule(target, filename)
+
         if not self.conf['isbook']:
             self.addPageRules(makefile)
 
@@ -270,8 +438,18 @@ class LaTeXFile(WebFile):
                 'pdflatexFlags', getPdflatexFlags(
                     minted=self.conf['minted'],
                 ))
+        if not makefile.variableIsSet('pdflatexMaxPasses'):
+            makefile.appendToVariable('pdflatexMaxPasses',
+                                      str(self.conf['maxpasses']))
+        pdfPrerequisites = list(self.files['additional-prerequisites'])
+        formatName = ''
+        if self.files['format']:
+            pdfPrerequisites.append(self.files['format'])
+            formatName = os.path.splitext(
+                os.path.basename(self.files['format']))[0]
         makefile.addRule(generatePdfRule(
             self.files['pdf'], self.getPath(), self.conf['build'],
-            *self.files['additional-prerequisites']))
+            self.getScratchDirectory('pdf'), *pdfPrerequisites,
+            formatName=formatName))
 
 ###############################################################################
@@ -0,0 +1,62 @@
+###############################################################################
+# NAME:             Fingerprint.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      Records a fingerprint of the inputs the Makefile was
+#                   generated from, so that it's only regenerated when they
+#                   change.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+import hashlib
+import json
+import os
+
+FINGERPRINT = 'makefile-fingerprint.json'
+def getFingerprintPath(buildDirectory):
+    return os.path.join(buildDirectory, FINGERPRINT)
+
+def getStatus(filename):
+    """Obtain the [mtime, size] of filename, or None if it doesn't exist"""
+    try:
+        status = os.stat(filename)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return [status.st_mtime_ns, status.st_size]
+
+def listDirectory(directory):
+    """Obtain the files under directory, or None if it doesn't exist"""
+    if not os.path.isdir(directory):
+        return None
+    return sorted(os.path.join(path, filename)
+                  for path, _, filenames in os.walk(directory)
+                  for filename in filenames)
+
+def getFingerprint(inputs):
+    """Obtain the fingerprint of inputs, which must be serializable"""
+    return hashlib.sha256(json.dumps(
+        inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+def readFingerprint(fingerprintFileName):
+    """Obtain the record of the last generation: its fingerprint, the files
+    the documents depended on, and the status of the Makefile it wrote"""
+    try:
+        with open(fingerprintFileName, 'r') as fingerprintFile:
+            return json.load(fingerprintFile)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def writeFingerprint(fingerprintFileName, record):
+    fingerprintDirectory = os.path.dirname(fingerprintFileName)
+    if fingerprintDirectory:
+        os.makedirs(fingerprintDirectory, exist_ok=True)
+    temporaryFileName = fingerprintFileName + '.tmp'
+    with open(temporaryFileName, 'w') as fingerprintFile:
+        json.dump(record, fingerprintFile)
+    os.replace(temporaryFileName, fingerprintFileName)
+
+###############################################################################
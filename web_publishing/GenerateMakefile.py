@@ -7,16 +7,29 @@
 #
 # CREATED:          07/18/2020
 #
-# LAST EDITED:      02/28/2021
+# LAST EDITED:      10/17/2026
 ###
 
 import argparse
+import copy
+import io
+import json
 import logging
 import os
+import re
 
-from .Files import LaTeXFile
-from .Makefile import Makefile
+from .Files import LaTeXFile, generateDraftRule, generateFormatRule, \
+    getChapterShim, getDraftPaths, getFormatPaths, getPathWithoutExtension, \
+    getPrepareManifest, getSourcesDirectory, writeIfChanged
+from .Makefile import Makefile, PREAMBLE_TIMESTAMP
 from .Locator import Locator
+from .DependencyCache import DependencyCache, getDependencyCachePath
+from .Dependencies import DependencyGraph, TEX_EXTENSIONS, LATEX_TOKEN, \
+    getCandidates
+# Deploy, Compress, BuildStats and Highlight are imported where they're used,
+# so that a Makefile which is current is found without loading them.
+from .Fingerprint import getFingerprint, getFingerprintPath, getStatus, \
+    listDirectory, readFingerprint, writeFingerprint
 from .Configuration import getConfiguration, applyConfiguration, \
     CONFIG_DEFAULTS
 
@@ -24,22 +37,136 @@ from .Configuration import getConfiguration, applyConfiguration, \
 # TODO: Copyright notice and table of contents for the book?
 # TODO: Validate books
 BUILD_RULE_RECIPE = """
-	wp-navigation{} -d '{}' $(htmlFiles)
-	middleman build
+	wp-prepare --batch {} --build-dir '{}'{}{}
+	wp-navigation{}{} -d '{}' $(htmlFiles){}
+	middleman build{}
 """
-def getBuildRuleRecipe(book=False, buildDirectory='.'):
-    return BUILD_RULE_RECIPE.format(' -b' if book else '', buildDirectory)
+# The search index of the pages, in the Middleman source
+SEARCH_RECIPE = """
+	wp-search -d '{}' -o '{}' $(htmlFiles)"""
+# Optimized copies of the images the pages use, in the Middleman source
+IMAGES_RECIPE = """
+	wp-images -d '{}' -o '{}'{} $(htmlFiles)"""
+# Compressed copies of the site for the web server to send as they are
+COMPRESS_RECIPE = """	wp-compress{} --state '{}'{} build '{}'
+"""
+def getBuildRuleRecipe(book=False, buildDirectory='.', cacheDirectory='',
+                       cacheMaxSize=0, precompress=None, pdfDirectory='pdf',
+                       sharedColors=False, middlemanDirectory='source',
+                       minify=False, pageBudget=0, budgetAction='warn',
+                       optimizeImages=False, statsLog='', search=False):
+    cacheOptions = ''
+    if cacheDirectory:
+        cacheOptions = (f" --cache-dir '{cacheDirectory}'"
+                        f' --cache-size {cacheMaxSize}')
+    prepareOptions = cacheOptions
+    if sharedColors:
+        prepareOptions += ' --shared-colors'
+    if minify:
+        prepareOptions += ' --minify'
+    if pageBudget:
+        prepareOptions += (f' --budget {pageBudget}'
+                           f' --budget-action {budgetAction}')
+    if statsLog:
+        prepareOptions += f" --stats '{statsLog}'"
+    imagesRecipe = ''
+    if optimizeImages:
+        imagesRecipe = IMAGES_RECIPE.format(buildDirectory, middlemanDirectory,
+                                            cacheOptions)
+    searchRecipe = ''
+    if search:
+        searchRecipe = SEARCH_RECIPE.format(buildDirectory, middlemanDirectory)
+    recipe = BUILD_RULE_RECIPE.format(
+        getPrepareManifest(buildDirectory), buildDirectory, prepareOptions,
+        imagesRecipe,
+        ' -b' if book else '',
+        f" --colors '{middlemanDirectory}'" if sharedColors else '',
+        buildDirectory, searchRecipe,
+        # By default, middleman would remove the compressed copies, as files
+        # it didn't generate, on every build.
+        ' --no-clean' if precompress else '')
+    if precompress:
+        # pylint: disable=import-outside-toplevel
+        from .Compress import getCompressStatePath
+        recipe += COMPRESS_RECIPE.format(
+            ''.join(f' -f {outputFormat}' for outputFormat in precompress),
+            getCompressStatePath(buildDirectory), cacheOptions, pdfDirectory)
+    return recipe
 
+# wp-deploy only sends what changed since the last deploy, and swaps the new
+# release in atomically.
 DEPLOY_RULE = """
 host={}
 remotePath={}
 deploy: build
-	rsync -r -e 'ssh -p 5000' --delete build/ pdf \\
-		"$(host):$(remotePath)"
+	wp-deploy -H "$(host)" -p 5000 -d "$(remotePath)" -m '{}' build/ pdf
 """
 def getDeployRule(host='edtwardy@edtwardy.hopto.org',
-                  remotePath='/var/www/edtwardy.hopto.org/repository/'):
-    return DEPLOY_RULE.format(host, remotePath)
+                  remotePath='/var/www/edtwardy.hopto.org/repository/',
+                  buildDirectory='.pdflatex'):
+    # pylint: disable=import-outside-toplevel
+    from .Deploy import getDeployManifestPath
+    return DEPLOY_RULE.format(host, remotePath,
+                              getDeployManifestPath(buildDirectory))
+
+# Each PDF, HTML and copy recipe runs its tool under wp-timeit, through one
+# of these variables, when BuildStats is set. Records from one invocation of
+# make share a run.
+TIMED_PHASES = ('pdf', 'html', 'copy')
+TIMER_FORMAT = "wp-timeit -l '{}' -p {} -t '$@' --"
+BUILD_RUN = """
+export {} := $(shell date +%Y%m%dT%H%M%S)
+"""
+def getMakePath(path):
+    # The recipes run the tools from the scratch directories.
+    return path if os.path.isabs(path) else os.path.join('$(CURDIR)', path)
+
+def addBuildStatsRules(makefile, buildDirectory):
+    # pylint: disable=import-outside-toplevel
+    from .BuildStats import RUN_VARIABLE, getBuildStatsPath
+    statsLog = getMakePath(getBuildStatsPath(buildDirectory))
+    for phase in TIMED_PHASES:
+        makefile.appendToVariable(f'{phase}Timer',
+                                  TIMER_FORMAT.format(statsLog, phase))
+    makefile.addRule(BUILD_RUN.format(RUN_VARIABLE))
+
+# minted finds wp-pygmentize in place of pygmentize, and wp-pygmentize finds
+# the cache, through $(highlightEnvironment) in the PDF and HTML recipes.
+def addHighlightRules(makefile, config):
+    # pylint: disable=import-outside-toplevel
+    from .Highlight import CACHE_VARIABLE, getHighlightCacheDirectory, \
+        getShimDirectory, writeShim
+    writeShim(config['BuildDirectory'])
+    makefile.appendToVariable('highlightEnvironment', (
+        f"PATH='{getMakePath(getShimDirectory(config['BuildDirectory']))}'"
+        f":$$PATH {CACHE_VARIABLE}='"
+        f"{getMakePath(getHighlightCacheDirectory(config['CacheDirectory']))}'"
+    ))
+
+def getCodeBlocks(dependencyGraph):
+    """Obtain the (language, code) of every block minted highlights without
+    options, in the files scanned for dependencies"""
+    codeBlocks = {}
+    for filePath in dependencyGraph.getScannedFiles():
+        for language, options, code in dependencyGraph.getCodeBlocks(
+                filePath):
+            if not options:
+                codeBlocks[(language, code)] = None
+    return list(codeBlocks)
+
+def prewarmHighlightCache(config, dependencyGraph):
+    """Highlight the code blocks that aren't in the cache yet, and remove
+    the ones which have gone unused"""
+    # pylint: disable=import-outside-toplevel
+    from .Highlight import collectGarbage, getHighlightCacheDirectory, \
+        prewarmCache
+    cacheDirectory = getHighlightCacheDirectory(config['CacheDirectory'])
+    keys = prewarmCache(cacheDirectory, getCodeBlocks(dependencyGraph))
+    evicted = collectGarbage(cacheDirectory, keys,
+                             config['HighlightCacheMaxAge'])
+    if evicted:
+        logging.info('Removed %d unused code block(s) from the cache',
+                     evicted)
 
 SET_REDIRECT = """
 ifneq ($(V),1)
@@ -47,6 +174,20 @@ redirect = 2>&1 >/dev/null
 endif
 """
 
+# make remakes the Makefile before anything else, and restarts if it changed.
+# wp-genmakefile only rewrites it when the fingerprint of the tree changes, so
+# checking on every run costs almost nothing.
+REGENERATE_RULE = """
+Makefile: $(wildcard {0}) FORCE
+	wp-genmakefile -f '{0}'{1}
+FORCE:
+"""
+def addRegenerateRule(makefile, args):
+    """Regenerate the Makefile with the arguments it was generated with"""
+    makefile.addRule(REGENERATE_RULE.format(
+        args.config_file,
+        f" -c '{args.copy_files}'" if args.copy_files else ''))
+
 def verifyBookMain(bookMain, latexFiles):
     """Verifies that the bookMain file contains all other latexFiles."""
     with open(bookMain, 'r') as bookMainFile:
@@ -58,45 +199,292 @@ def verifyBookMain(bookMain, latexFiles):
                                 latexFile, bookMain)
 
 def setUpMakefile(config, copyFiles):
-    makefile = Makefile()
+    statsLog = ''
+    if config['BuildStats']:
+        # pylint: disable=import-outside-toplevel
+        from .BuildStats import getBuildStatsPath
+        statsLog = getBuildStatsPath(config['BuildDirectory'])
+    makefile = Makefile(config['BuildDirectory'])
     makefile.setDefaultRuleTarget('build')
     makefile.setDefaultRuleRecipe(getBuildRuleRecipe(
         # TODO: Enable book link generation
         # book=bool(config['Books']),
-        buildDirectory=config['BuildDirectory']))
+        buildDirectory=config['BuildDirectory'],
+        cacheDirectory=config['CacheDirectory'],
+        cacheMaxSize=config['CacheMaxSize'],
+        precompress=config['Precompress'],
+        pdfDirectory=config['ServerPDFPath'],
+        sharedColors=config['SharedColors'],
+        middlemanDirectory=config['MiddlemanDirectory'],
+        minify=config['Minify'],
+        pageBudget=config['PageBudget'],
+        budgetAction=config['PageBudgetAction'],
+        optimizeImages=config['OptimizeImages'],
+        statsLog=statsLog,
+        search=config['Search']))
     makefile.addRule(getDeployRule(
-        host=config['Host'], remotePath=config['RemotePath']))
+        host=config['Host'], remotePath=config['RemotePath'],
+        buildDirectory=config['BuildDirectory']))
     makefile.addRule(SET_REDIRECT)
+    if config['BuildStats']:
+        addBuildStatsRules(makefile, config['BuildDirectory'])
     for filename in copyFiles:
         makefile.addCopyRule(
             os.path.join(config['BuildDirectory'], filename), filename)
     return makefile
 
-def generateMakefile(makefile, bookFiles=None, latexFiles=None, config=None):
+def getDependencyGraph(config):
+    dependencyCache = None
+    if config['DependencyCache']:
+        dependencyCache = DependencyCache(
+            getDependencyCachePath(config['BuildDirectory']))
+    return DependencyGraph(dependencyCache)
+
+def getDocuments(latexFiles, config, dependencyGraph, bookFiles=None):
+    """Obtain a LaTeXFile for each of latexFiles"""
     bookFiles = [] if not bookFiles else bookFiles
-    latexFiles = [] if not latexFiles else latexFiles
-    config = {} if not config else config
+    documents = []
     for latexFile in latexFiles:
         pageData = {}
         if latexFile in config['PageData']:
             pageData = config['PageData'][latexFile]
-        latexFileInstance = LaTeXFile(
+        documents.append(LaTeXFile(
             latexFile, rootDirectory=config['DocumentRoot'],
             buildDirectory=config['BuildDirectory'],
             serverPdfPath=config['ServerPDFPath'],
             serverKeepPdfPath=config['ServerKeepPDFPath'],
             pageData=pageData,
             minted=config['minted'],
+            maxPasses=config['PdflatexMaxPasses'],
             middlemanDirectory=config['MiddlemanDirectory'],
             bookFile=bool(latexFile in bookFiles),
             webIndex=latexFile == config['WebIndex'],
-        )
-        latexFileInstance.addRules(makefile)
-    with open('Makefile', 'w') as outputFile:
-        makefile.write(outputFile)
+            dependencyGraph=dependencyGraph,
+            copyFiles=config['CopyFiles'],
+        ))
+    return documents
 
-def getArguments():
-    parser = argparse.ArgumentParser()
+def addDocumentRules(makefile, documents):
+    for document in documents:
+        document.addRules(makefile)
+
+def writeMakefile(makefile):
+    """Write the Makefile, unless only its timestamp would change, so that
+    make doesn't restart needlessly"""
+    output = io.StringIO()
+    makefile.write(output)
+    writeIfChanged('Makefile', output.getvalue(), ignore=PREAMBLE_TIMESTAMP)
+
+# Documents whose preambles are the same text, and resolve to the same files,
+# share a precompiled format. Its rule depends only on those, so it's only
+# dumped again when the class or the shared preamble changes. Some packages
+# can't be loaded from a format: e.g. minted names its output directory after
+# the \jobname it was loaded under.
+UNDUMPABLE_PACKAGES = ('minted',)
+
+# A format is only worth dumping if it's used more than once.
+MINIMUM_FORMAT_DOCUMENTS = 2
+
+def getPreambleKey(filePath, dependencyGraph):
+    """Obtain (key, dependencies) of the preamble of filePath, or None if it
+    can't be precompiled"""
+    preamble = dependencyGraph.getPreamble(filePath)
+    if preamble is None:
+        return None
+    dependencies = dependencyGraph.getPreambleDependencies(filePath)
+    for scannedFile in [filePath] + dependencies:
+        if not scannedFile.endswith(TEX_EXTENSIONS):
+            continue
+        for command, _, argument, inPreamble in \
+                dependencyGraph.getReferences(scannedFile):
+            if scannedFile == filePath and not inPreamble:
+                continue
+            # The preamble of a subfile is its main file's.
+            if command == 'documentclass' and argument == 'subfiles':
+                return None
+            if command in ('usepackage', 'RequirePackage') \
+               and argument in UNDUMPABLE_PACKAGES:
+                return None
+    return getFingerprint([preamble, dependencies]), dependencies
+
+def addFormatRules(makefile, config, documents, dependencyGraph):
+    """Add a rule dumping a format for each preamble shared by documents,
+    and have them load it"""
+    groups = {}
+    for document in documents:
+        preambleKey = getPreambleKey(document.getPath(), dependencyGraph)
+        if preambleKey:
+            groups.setdefault(preambleKey[0], []).append(
+                (document, preambleKey[1]))
+
+    buildDirectory = config['BuildDirectory']
+    for key, group in groups.items():
+        if len(group) < MINIMUM_FORMAT_DOCUMENTS:
+            continue
+        formatName = f'wp-format-{key[:12]}'
+        formatFile, preambleFile = getFormatPaths(buildDirectory, formatName)
+        document, dependencies = group[0]
+        writeIfChanged(preambleFile, dependencyGraph.getPreamble(
+            document.getPath()) + '\\begin{document}\n\\end{document}\n')
+        prerequisites = {os.path.join(buildDirectory, filename): None
+                         for filename in dependencies + config['CopyFiles']}
+        makefile.addRule(generateFormatRule(formatName, buildDirectory,
+                                            *list(prerequisites)))
+        logging.info('%s: Shared by %d document(s)', formatFile, len(group))
+        for document, _ in group:
+            document.files['format'] = formatFile
+
+# `make drafts' compiles a draft of each book, in which only the chapters that
+# changed since the last draft are recompiled. The full build of the book is
+# still made by `make', for releases.
+SUBFILE = re.compile(r'\\subfile\s*\{([^}]*)\}')
+INCLUDE_ONLY_HOOK = '\\InputIfFileExists{\\jobname.includeonly}{}{}\n'
+CHAPTER_SHIM_FORMAT = '\\subfile{{{}}}\n'
+DRAFTS_RULE = """
+drafts: $(draftFiles)
+"""
+
+def getDraftDriver(bookText):
+    """Obtain the driver of the draft of a book: each \\subfile becomes an
+    \\include of its shim, and the preamble reads the \\includeonly"""
+    driver = SUBFILE.sub(lambda match: '\\include{' + getChapterShim(
+        match.group(1).strip()) + '}', bookText)
+    for match in LATEX_TOKEN.finditer(driver):
+        if match.group('document'):
+            return (driver[:match.start()] + INCLUDE_ONLY_HOOK
+                    + driver[match.start():])
+    return None
+
+def addDraftRules(makefile, config, documents, dependencyGraph):
+    """Add a rule compiling a draft of each book"""
+    buildDirectory = config['BuildDirectory']
+    for document in documents:
+        if not document.conf['isbook']:
+            continue
+        with open(document.getPath(), 'r') as bookFile:
+            driver = getDraftDriver(bookFile.read())
+        if driver is None:
+            continue
+
+        shared = dependencyGraph.getPreambleDependencies(document.getPath())
+        manifest = {'shared': shared, 'chapters': {}}
+        shims = []
+        for command, options, argument, _ in \
+                dependencyGraph.getReferences(document.getPath()):
+            chapter = dependencyGraph.resolve(
+                document.getPath(), getCandidates(command, options, argument))
+            if command != 'subfile' or not chapter:
+                continue
+            shim = getChapterShim(argument.strip())
+            # A subfile depends on the book itself, through its class.
+            manifest['chapters'][shim] = [chapter] + [
+                dependency for dependency in
+                dependencyGraph.getDependencies(chapter)
+                if dependency != document.getPath()
+                and dependency not in shared]
+            shims.append(os.path.join(buildDirectory, shim + '.tex'))
+            writeIfChanged(shims[-1],
+                           CHAPTER_SHIM_FORMAT.format(argument.strip()))
+
+        target, driverFile, manifestFile = getDraftPaths(
+            buildDirectory, document.withoutExt)
+        writeIfChanged(driverFile, driver)
+        writeIfChanged(manifestFile, json.dumps(manifest, indent=1))
+        document.files['draft'] = target
+        makefile.appendToVariable('draftFiles', target)
+        makefile.addRule(generateDraftRule(
+            target, driverFile, manifestFile, buildDirectory,
+            document.getScratchDirectory('draft'), *shims,
+            *document.files['additional-prerequisites']))
+    if makefile.variableIsSet('draftFiles'):
+        makefile.addRule(DRAFTS_RULE)
+
+def addProjectDocumentRules(makefile, config, documents, dependencyGraph):
+    """Add the rules of the documents, and of what they share"""
+    if config['PrecompiledFormats']:
+        addFormatRules(makefile, config, documents, dependencyGraph)
+    addDocumentRules(makefile, documents)
+    if config['DraftBooks']:
+        addDraftRules(makefile, config, documents, dependencyGraph)
+    if dependencyGraph.dependencyCache:
+        dependencyGraph.dependencyCache.save()
+    if config['minted'] and config['HighlightCache'] \
+       and config['CacheDirectory']:
+        addHighlightRules(makefile, config)
+        prewarmHighlightCache(config, dependencyGraph)
+
+def addProjectRules(makefile, config, bookFiles=None, latexFiles=None):
+    latexFiles = [] if not latexFiles else latexFiles
+    dependencyGraph = getDependencyGraph(config)
+    addProjectDocumentRules(makefile, config, getDocuments(
+        latexFiles, config, dependencyGraph, bookFiles=bookFiles),
+                            dependencyGraph)
+
+def generateMakefile(makefile, bookFiles=None, latexFiles=None, config=None):
+    config = {} if not config else config
+    addProjectRules(makefile, config, bookFiles=bookFiles,
+                    latexFiles=latexFiles)
+    writeMakefile(makefile)
+
+###############################################################################
+# Fingerprint
+#
+# The Makefile depends on the configuration, the names of the documents, the
+# files in their sources directories, and the files they depend on. Checking
+# those is much cheaper than scanning the documents.
+###
+
+def getGeneratorFiles():
+    directory = os.path.dirname(os.path.abspath(__file__))
+    return [os.path.join(directory, filename)
+            for filename in sorted(os.listdir(directory))
+            if filename.endswith('.py')]
+
+def getTreeFingerprint(config, configFile, latexFiles, dependencies):
+    """Fingerprint what the Makefile is generated from. The documents are
+    identified by their status, since that's what the dependency cache
+    keys on."""
+    rootDirectory = os.path.relpath(config['DocumentRoot'])
+    return getFingerprint({
+        'generator': {filename: getStatus(filename)
+                      for filename in getGeneratorFiles()},
+        'configFile': [configFile, getStatus(configFile)],
+        'config': config,
+        'tex4ht': os.path.isfile('tex4ht.cfg'),
+        'documents': {latexFile: getStatus(latexFile)
+                      for latexFile in latexFiles},
+        'sources': {latexFile: listDirectory(getSourcesDirectory(
+            getPathWithoutExtension(latexFile, rootDirectory,
+                                    latexFile == config['WebIndex'])))
+                    for latexFile in latexFiles},
+        'dependencies': {dependency: getStatus(dependency)
+                         for dependency in dependencies},
+    })
+
+def getCopiedFiles(makefile):
+    """Obtain the files the rules copy into the build directory"""
+    return sorted({rule.prerequisites[0] for rule in makefile.getRules()
+                   if rule.kind == 'copy' and rule.prerequisites})
+
+def isMakefileCurrent(config, configFile, latexFiles):
+    """Whether the Makefile was generated from the tree as it is now"""
+    record = readFingerprint(getFingerprintPath(config['BuildDirectory']))
+    if not record or record.get('makefile') != getStatus('Makefile'):
+        return False
+    return record.get('fingerprint') == getTreeFingerprint(
+        config, configFile, latexFiles, record.get('dependencies', []))
+
+def saveFingerprint(config, configFile, latexFiles, makefile):
+    """Record the fingerprint of the tree the Makefile was generated from"""
+    dependencies = getCopiedFiles(makefile)
+    writeFingerprint(getFingerprintPath(config['BuildDirectory']), {
+        'fingerprint': getTreeFingerprint(config, configFile, latexFiles,
+                                          dependencies),
+        'dependencies': dependencies,
+        'makefile': getStatus('Makefile'),
+    })
+
+def addArguments(parser):
     parser.add_argument('-f', '--config-file', help=('The configuration file'),
                         default='./web-publishing.yaml')
     parser.add_argument('-v', help='Enable verbose log output',
@@ -108,8 +496,32 @@ def getArguments():
             ' directory at build time. Useful for ensuring successful'
             ' compilation of files that rely on .cls or .tex files that reside'
             ' in the cwd.'), default='')
+    return parser
+
+def getArguments():
+    parser = addArguments(argparse.ArgumentParser())
+    parser.add_argument(
+        '-F', '--force', action='store_true', default=False,
+        help=('Regenerate the Makefile, even if nothing it depends on has'
+              ' changed'))
     return parser.parse_args()
 
+def getConfig(args):
+    """Obtain the configuration from the config file and the arguments"""
+    config = applyConfiguration(
+        getConfiguration(args.config_file), copy.deepcopy(CONFIG_DEFAULTS))
+    logging.info(config)
+    if args.copy_files:
+        config['CopyFiles'].extend(args.copy_files.split(','))
+    return config
+
+def locateLaTeXFiles(config):
+    # Obtain all latex files (excluding those in the build directory, and the
+    # other directories we write to)
+    locator = Locator(buildExclude=config['BuildExclude'], prunedDirectories=[
+        config['BuildDirectory'], config['CacheDirectory'], 'build'])
+    return locator.locate(config['DocumentRoot'], '.tex')
+
 def main():
     # Obtain the command line arguments
     args = getArguments()
@@ -117,25 +529,25 @@ def main():
         logging.basicConfig(level=logging.DEBUG)
 
     # Obtain the configuration
-    config = applyConfiguration(
-        getConfiguration(args.config_file), CONFIG_DEFAULTS)
-    logging.info(config)
+    config = getConfig(args)
+
+    # Skip the rest if the tree hasn't changed since the Makefile was written
+    latexFiles = locateLaTeXFiles(config)
+    if not args.force \
+       and isMakefileCurrent(config, args.config_file, latexFiles):
+        logging.info('Makefile is up to date')
+        return
 
     # Set up the Makefile
-    if args.copy_files:
-        config['CopyFiles'].extend(args.copy_files.split(','))
     makefile = setUpMakefile(config, config['CopyFiles'])
-
-    # Obtain all latex files (excluding those in the build directory)
-    locator = Locator()
-    buildExclude = locator.locate(config['BuildDirectory'], '.tex')
-    locator = Locator(buildExclude=buildExclude + config['BuildExclude'])
+    addRegenerateRule(makefile, args)
     generateMakefile(
         makefile,
         bookFiles=list(config['Books'].keys()),
-        latexFiles=locator.locate(config['DocumentRoot'], '.tex'),
+        latexFiles=latexFiles,
         config=config
     )
+    saveFingerprint(config, args.config_file, latexFiles, makefile)
 
 if __name__ == '__main__':
     main()
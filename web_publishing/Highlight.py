@@ -0,0 +1,236 @@
+###############################################################################
+# NAME:             Highlight.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      A content-addressed cache of highlighted code blocks,
+#                   shared by every document in the project. minted runs
+#                   wp-pygmentize in place of pygmentize.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+import functools
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from .Cache import OutputCache, getKey, getToolVersion
+
+# Where the cache is, in the environment of wp-pygmentize
+CACHE_VARIABLE = 'WP_HIGHLIGHT_CACHE'
+
+def getHighlightCacheDirectory(cacheDirectory):
+    return os.path.join(cacheDirectory, 'highlight')
+
+# minted runs pygmentize through the shell, so the PDF and HTML recipes put
+# a directory holding this script at the front of the PATH.
+SHIM = '#!/bin/sh\nexec wp-pygmentize "$@"\n'
+def getShimDirectory(buildDirectory):
+    return os.path.join(buildDirectory, 'bin')
+
+def writeShim(buildDirectory):
+    shimDirectory = getShimDirectory(buildDirectory)
+    os.makedirs(shimDirectory, exist_ok=True)
+    shim = os.path.join(shimDirectory, 'pygmentize')
+    try:
+        with open(shim, 'r') as shimFile:
+            if shimFile.read() == SHIM:
+                return
+    except FileNotFoundError:
+        pass
+    with open(shim, 'w') as shimFile:
+        shimFile.write(SHIM)
+    os.chmod(shim, 0o755)
+
+###############################################################################
+# pygmentize
+###
+
+def isShim(filename):
+    try:
+        with open(filename, 'r') as shimFile:
+            return shimFile.read(len(SHIM) + 1) == SHIM
+    except (OSError, UnicodeDecodeError):
+        return False
+
+def getPygmentize():
+    """Obtain the first pygmentize on the PATH which isn't the shim"""
+    for directory in os.environ.get('PATH', '').split(os.pathsep):
+        candidate = os.path.join(directory or '.', 'pygmentize')
+        if os.access(candidate, os.X_OK) and not isShim(candidate):
+            return candidate
+    return None
+
+def runPygmentize(arguments):
+    """Run pygmentize, in this process if Pygments is installed here"""
+    try:
+        # pylint: disable=import-outside-toplevel
+        from pygments.cmdline import main as pygmentize
+    except ImportError:
+        executable = getPygmentize()
+        if not executable:
+            print('wp-pygmentize: pygmentize not found', file=sys.stderr)
+            return 127
+        return subprocess.run([executable, *arguments],
+                              check=False).returncode
+    return pygmentize(['pygmentize', *arguments])
+
+@functools.lru_cache(maxsize=None)
+def getPygmentsVersion():
+    try:
+        # pylint: disable=import-outside-toplevel
+        from pygments import __version__
+        return __version__
+    except ImportError:
+        return getToolVersion(getPygmentize() or 'pygmentize')
+
+###############################################################################
+# Highlighting
+###
+
+# The options of pygmentize which take a value
+VALUE_OPTIONS = ('-l', '-f', '-O', '-P', '-F', '-o', '-a', '-S')
+
+def parseInvocation(arguments):
+    """Obtain the (options, outputFile, inputFile) of an invocation that
+    highlights one file into another, as minted's are. Any other invocation
+    (e.g. -S or -V) returns None, and isn't cached."""
+    options = []
+    inputFiles = []
+    iterator = iter(arguments)
+    for argument in iterator:
+        if argument in VALUE_OPTIONS:
+            value = next(iterator, None)
+            if value is None:
+                return None
+            options.append((argument, value))
+        elif argument.startswith('-'):
+            return None
+        else:
+            inputFiles.append(argument)
+    outputFiles = [value for option, value in options if option == '-o']
+    given = {option for option, _ in options}
+    if len(inputFiles) != 1 or len(outputFiles) != 1 or '-l' not in given \
+       or given & {'-S', '-a'}:
+        return None
+    return ([(option, value) for option, value in options if option != '-o'],
+            outputFiles[0], inputFiles[0])
+
+def getHighlightKey(options, code):
+    """Obtain the key of code highlighted with options. The options are in
+    the order they were given, since later ones override earlier ones."""
+    return getKey('highlight', getPygmentsVersion(),
+                  *(f'{option} {value}' for option, value in options),
+                  hashlib.sha256(code).hexdigest())
+
+def highlight(arguments, cacheDirectory):
+    """Run pygmentize with arguments, restoring the output from the cache in
+    cacheDirectory if it's there. Returns the exit status."""
+    invocation = parseInvocation(arguments)
+    if not cacheDirectory or not invocation:
+        return runPygmentize(arguments)
+    options, outputFile, inputFile = invocation
+    try:
+        with open(inputFile, 'rb') as codeFile:
+            code = codeFile.read()
+    except OSError:
+        return runPygmentize(arguments)
+
+    key = getHighlightKey(options, code)
+    cache = OutputCache(cacheDirectory)
+    if cache.restore(key, [outputFile]):
+        return 0
+    status = runPygmentize(arguments)
+    if not status:
+        cache.store(key, [outputFile])
+    return status
+
+###############################################################################
+# Pre-warming
+#
+# The code blocks found by the dependency scan are highlighted into the cache
+# before pdflatex needs them, as minted 2 would highlight a block without
+# options. Blocks with options, or in documents which \setminted, are cached
+# the first time they're compiled instead.
+###
+
+MINTED_OPTIONS = [('-f', 'latex'), ('-P', 'commandprefix=PYG'),
+                  ('-F', 'tokenmerge'), ('-P', 'stripnl=False')]
+def getBlockOptions(language):
+    return [('-l', language)] + MINTED_OPTIONS
+
+def prewarmBlock(block, cacheDirectory):
+    """Highlight one (language, code) block into the cache. Returns the exit
+    status of pygmentize, rather than raising."""
+    language, code = block
+    temporaryDirectory = tempfile.mkdtemp(prefix='wp-highlight-')
+    try:
+        inputFile = os.path.join(temporaryDirectory, 'block.pyg')
+        with open(inputFile, 'wb') as codeFile:
+            codeFile.write(code.encode())
+        arguments = [word for option in getBlockOptions(language)
+                     for word in option]
+        arguments += ['-o', os.path.join(temporaryDirectory, 'block.pygtex'),
+                      inputFile]
+        return highlight(arguments, cacheDirectory)
+    except Exception: # pylint: disable=broad-except
+        logging.exception('Highlighting a %s code block', language)
+        return 1
+    finally:
+        shutil.rmtree(temporaryDirectory, ignore_errors=True)
+
+def prewarmCache(cacheDirectory, blocks, jobs=None):
+    """Highlight every (language, code) block that isn't in the cache yet, in
+    parallel. Returns the keys of all of them."""
+    cache = OutputCache(cacheDirectory)
+    keys = set()
+    missing = []
+    for language, code in blocks:
+        key = getHighlightKey(getBlockOptions(language), code.encode())
+        keys.add(key)
+        if not os.path.isdir(cache.getEntryDirectory(key)):
+            missing.append((language, code))
+
+    prewarm = functools.partial(prewarmBlock, cacheDirectory=cacheDirectory)
+    if len(missing) <= 1:
+        results = list(map(prewarm, missing))
+    else:
+        # multiprocessing is slow to import, and most runs have little to do.
+        # pylint: disable=import-outside-toplevel
+        from concurrent.futures import ProcessPoolExecutor
+        jobs = jobs or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(
+                prewarm, missing,
+                chunksize=max(1, len(missing) // (jobs * 4))))
+
+    failures = sum(1 for status in results if status)
+    if failures:
+        logging.warning('%d code block(s) could not be highlighted',
+                        failures)
+    if missing:
+        logging.info('Highlighted %d of %d code block(s)', len(missing),
+                     len(keys))
+    return keys
+
+def collectGarbage(cacheDirectory, keys, maxAgeDays):
+    """Remove the entries which aren't for one of the keys, and which haven't
+    been used for maxAgeDays. Returns the number removed."""
+    return OutputCache(cacheDirectory).evictUnused(
+        maxAgeDays * 24 * 60 * 60, keep=keys)
+
+def main():
+    """Takes the place of pygmentize for minted"""
+    sys.exit(highlight(sys.argv[1:], os.environ.get(CACHE_VARIABLE, '')))
+
+if __name__ == '__main__':
+    main()
+
+###############################################################################
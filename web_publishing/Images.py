@@ -0,0 +1,326 @@
+###############################################################################
+# NAME:             Images.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      Optimizes the images referenced by the pages, and places
+#                   them in the Middleman source directory.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+import argparse
+import functools
+import hashlib
+from html.parser import HTMLParser
+import logging
+import os
+import posixpath
+import re
+import struct
+import sys
+import zlib
+
+from .Cache import OutputCache, getKey
+from .Navigation import getLinkFromBuildPath
+
+# Increment this whenever the output of optimizeImage changes.
+IMAGE_VERSION = '1'
+
+###############################################################################
+# Dimensions
+###
+
+SVG_LENGTH = re.compile(r'^\s*([\d.]+)\s*(px|pt|pc|in|cm|mm)?\s*$')
+# CSS pixels per unit
+SVG_UNITS = {None: 1, 'px': 1, 'pt': 4 / 3, 'pc': 16, 'in': 96,
+             'cm': 96 / 2.54, 'mm': 96 / 25.4}
+SVG_ROOT = re.compile(rb'<svg\b[^>]*>', re.DOTALL)
+SVG_ATTRIBUTE = re.compile(rb'([\w:-]+)\s*=\s*["\']([^"\']*)["\']')
+
+def getSvgSize(data):
+    root = SVG_ROOT.search(data)
+    if not root:
+        return None
+    attributes = {name.decode(): value.decode() for name, value in
+                  SVG_ATTRIBUTE.findall(root.group(0))}
+    width = SVG_LENGTH.match(attributes.get('width', ''))
+    height = SVG_LENGTH.match(attributes.get('height', ''))
+    if width and height:
+        return tuple(round(float(length.group(1)) * SVG_UNITS[length.group(2)])
+                     for length in (width, height))
+    viewBox = attributes.get('viewBox', '').replace(',', ' ').split()
+    if len(viewBox) == 4:
+        return round(float(viewBox[2])), round(float(viewBox[3]))
+    return None
+
+def getJpegSize(data):
+    offset = 2
+    while offset + 9 < len(data):
+        if data[offset] != 0xff:
+            return None
+        marker = data[offset + 1]
+        length = struct.unpack('>H', data[offset + 2:offset + 4])[0]
+        # SOF0-SOF15, except DHT, JPG and DAC
+        if 0xc0 <= marker <= 0xcf and marker not in (0xc4, 0xc8, 0xcc):
+            height, width = struct.unpack('>HH',
+                                          data[offset + 5:offset + 9])
+            return width, height
+        offset += 2 + length
+    return None
+
+def getImageSize(filename):
+    """Obtain the (width, height) of a PNG, GIF, JPEG or SVG image in CSS
+    pixels, or None if it can't be determined"""
+    try:
+        with open(filename, 'rb') as imageFile:
+            data = imageFile.read()
+    except OSError:
+        return None
+    try:
+        if data.startswith(PNG_SIGNATURE) and data[12:16] == b'IHDR':
+            return struct.unpack('>II', data[16:24])
+        if data[:6] in (b'GIF87a', b'GIF89a'):
+            return struct.unpack('<HH', data[6:10])
+        if data.startswith(b'\xff\xd8'):
+            return getJpegSize(data)
+        if filename.endswith('.svg'):
+            return getSvgSize(data)
+    except (struct.error, ValueError):
+        pass
+    return None
+
+###############################################################################
+# Optimization
+###
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Ancillary chunks that change how the pixels are rendered. Other ancillary
+# chunks (text, timestamps, etc.) are dropped.
+PNG_KEEP_CHUNKS = (b'tRNS', b'gAMA', b'cHRM', b'sRGB', b'iCCP', b'sBIT')
+
+def getPngChunks(data):
+    offset = len(PNG_SIGNATURE)
+    while offset < len(data):
+        length, chunkType = struct.unpack('>I4s', data[offset:offset + 8])
+        yield chunkType, data[offset + 8:offset + 8 + length]
+        offset += 12 + length
+
+def makePngChunk(chunkType, chunkData):
+    return (struct.pack('>I', len(chunkData)) + chunkType + chunkData
+            + struct.pack('>I', zlib.crc32(chunkType + chunkData)))
+
+def optimizePng(data):
+    """Recompress the image data at the highest zlib level, and drop the
+    metadata. The pixels are unchanged."""
+    chunks = []
+    imageData = b''
+    for chunkType, chunkData in getPngChunks(data):
+        if chunkType == b'IDAT':
+            if not imageData:
+                chunks.append((b'IDAT', None))
+            imageData += chunkData
+        elif chunkType[0:1].isupper() or chunkType in PNG_KEEP_CHUNKS:
+            chunks.append((chunkType, chunkData))
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9)
+    imageData = compressor.compress(zlib.decompress(imageData)) \
+        + compressor.flush()
+    output = PNG_SIGNATURE + b''.join(
+        makePngChunk(chunkType, imageData if chunkData is None else chunkData)
+        for chunkType, chunkData in chunks)
+    return output if len(output) < len(data) else data
+
+SVG_COMMENT = re.compile(rb'<!--.*?-->', re.DOTALL)
+SVG_METADATA = re.compile(rb'<metadata\b.*?</metadata>', re.DOTALL)
+# Indentation between elements. Whitespace on one line may be text.
+SVG_INDENTATION = re.compile(rb'>\s*\n\s*<')
+
+def optimizeSvg(data):
+    """Drop comments, metadata and indentation"""
+    data = SVG_COMMENT.sub(b'', data)
+    data = SVG_METADATA.sub(b'', data)
+    return SVG_INDENTATION.sub(b'><', data).strip() + b'\n'
+
+def optimizeImage(filename, data):
+    if data.startswith(PNG_SIGNATURE):
+        return optimizePng(data)
+    if filename.endswith('.svg'):
+        return optimizeSvg(data)
+    return data
+
+def writeImage(source, destination, cacheDirectory):
+    """Write the optimized source image to destination, reporting instead of
+    raising. Returns (destination, error, optimized)."""
+    try:
+        try:
+            if os.stat(destination).st_mtime_ns \
+               >= os.stat(source).st_mtime_ns:
+                return destination, None, False
+        except FileNotFoundError:
+            pass
+        destinationDirectory = os.path.dirname(destination)
+        if destinationDirectory:
+            os.makedirs(destinationDirectory, exist_ok=True)
+        with open(source, 'rb') as sourceFile:
+            data = sourceFile.read()
+
+        cache, key = None, None
+        if cacheDirectory:
+            cache = OutputCache(cacheDirectory)
+            key = getKey('image', IMAGE_VERSION, os.path.splitext(source)[1],
+                         hashlib.sha256(data).hexdigest())
+            if cache.restore(key, [destination]):
+                return destination, None, False
+        output = optimizeImage(source, data)
+        temporaryFileName = destination + '.tmp'
+        with open(temporaryFileName, 'wb') as outputFile:
+            outputFile.write(output)
+        os.replace(temporaryFileName, destination)
+        if cache:
+            cache.store(key, [destination])
+    except Exception as e: # pylint: disable=broad-except
+        return destination, f'{type(e).__name__}: {e}', False
+    return destination, None, True
+
+###############################################################################
+# Pages
+###
+
+class ImageParser(HTMLParser):
+    """Collects the src of every <img>"""
+    def __init__(self):
+        super().__init__()
+        self.sources = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'img':
+            source = dict(attrs).get('src')
+            if source:
+                self.sources.append(source)
+
+def isLocalSource(source):
+    return not (source.startswith(('/', '#', 'data:'))
+                or re.match(r'^[a-zA-Z][a-zA-Z0-9+.-]*:', source))
+
+def resolveImage(htmlFile, source, buildDirectory):
+    """Find the file for a relative image source: next to the page, or at
+    the root of the build directory"""
+    for directory in (os.path.dirname(htmlFile), buildDirectory):
+        candidate = os.path.join(directory, *source.split('/'))
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+def getGeneratedImages(htmlFile):
+    """Obtain the image files beside the page which it uses: the ones
+    make4ht wrote for it. Images from sources-* directories are copied by
+    their own rules."""
+    parser = ImageParser()
+    with open(htmlFile, 'r') as inputFile:
+        parser.feed(inputFile.read())
+    images = []
+    for source in parser.sources:
+        if not isLocalSource(source) or '/' in source:
+            continue
+        imagePath = os.path.join(os.path.dirname(htmlFile),
+                                 source.split('?')[0])
+        if os.path.isfile(imagePath) and imagePath not in images:
+            images.append(imagePath)
+    return images
+
+def getPageImages(htmlFile, buildDirectory, middlemanDirectory):
+    """Obtain the (source, destination) of each image the page uses. Pages
+    are served from directories, e.g. /Folder/Page/, so that is where the
+    relative sources point."""
+    parser = ImageParser()
+    with open(htmlFile, 'r') as inputFile:
+        parser.feed(inputFile.read())
+    link = getLinkFromBuildPath(htmlFile, buildDirectory)
+    images = []
+    for source in parser.sources:
+        if not isLocalSource(source):
+            continue
+        imagePath = resolveImage(htmlFile, source, buildDirectory)
+        url = posixpath.normpath(posixpath.join(link, source.split('?')[0]))
+        if not imagePath or not url.startswith('/') or '..' in url:
+            logging.warning('%s: Not publishing %s', htmlFile, source)
+            continue
+        images.append((imagePath, os.path.join(middlemanDirectory,
+                                                *url[1:].split('/'))))
+    return images
+
+def publishImages(htmlFiles, buildDirectory, middlemanDirectory, jobs=None,
+                  cacheDirectory='', cacheMaxSize=0):
+    """Optimize the images of every page into the Middleman source
+    directory. Returns the images that failed."""
+    images = {}
+    for htmlFile in htmlFiles:
+        for source, destination in getPageImages(
+                htmlFile, buildDirectory, middlemanDirectory):
+            images[destination] = source
+    sources = [images[destination] for destination in images]
+    destinations = list(images)
+
+    write = functools.partial(writeImage, cacheDirectory=cacheDirectory)
+    if len(destinations) <= 1:
+        results = list(map(write, sources, destinations))
+    else:
+        # multiprocessing is slow to import, and most runs have little to do.
+        # pylint: disable=import-outside-toplevel
+        from concurrent.futures import ProcessPoolExecutor
+        jobs = jobs or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(
+                write, sources, destinations,
+                chunksize=max(1, len(destinations) // (jobs * 4))))
+
+    failures = []
+    for destination, error, _ in results:
+        if error:
+            logging.error('%s: %s', destination, error)
+            failures.append(destination)
+    optimized = sum(1 for _, _, wasOptimized in results if wasOptimized)
+    summary = f'wp-images: {len(results)} image(s), {optimized} optimized'
+    if cacheDirectory:
+        evicted = OutputCache(cacheDirectory, cacheMaxSize).evict()
+        summary += f', {evicted} evicted'
+    print(summary)
+    return failures
+
+def main():
+    """Optimizes the images of the pages into the Middleman source"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--build-dir', '-d', default='',
+        help=('The path of the build directory'))
+    parser.add_argument(
+        '--output', '-o', default='source',
+        help=('The Middleman source directory'))
+    parser.add_argument(
+        '--jobs', '-j', type=int, default=None,
+        help=('The number of worker processes to use'))
+    parser.add_argument(
+        '--cache-dir', default='',
+        help=('Restore optimized images from (and store them in) this output'
+              ' cache'))
+    parser.add_argument(
+        '--cache-size', type=int, default=0,
+        help=('Trim the cache to this many bytes afterwards'))
+    parser.add_argument(
+        'htmlFiles', nargs='*',
+        help=('The HTML files whose images to publish'))
+    arguments = parser.parse_args()
+
+    failures = publishImages(arguments.htmlFiles, arguments.build_dir,
+                             arguments.output, arguments.jobs,
+                             arguments.cache_dir, arguments.cache_size)
+    if failures:
+        sys.exit(f'Failed to optimize {len(failures)} image(s)')
+
+if __name__ == '__main__':
+    main()
+
+###############################################################################
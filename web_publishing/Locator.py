@@ -7,38 +7,82 @@
 #
 # CREATED:          02/25/2021
 #
-# LAST EDITED:      02/26/2021
+# LAST EDITED:      10/17/2026
 ###
 
-from os import walk, path
+from os import path, scandir
+import fnmatch
 import logging
+import re
+
+# Directories which never contain sources, wherever they are in the tree.
+PRUNED_NAMES = frozenset(('.git', 'node_modules'))
+
+def isGlobPattern(pattern):
+    return any(character in pattern for character in '*?[')
 
 class Locator:
-    def __init__(self, buildExclude=None):
-        self.buildExclude = buildExclude
-        if not buildExclude:
-            self.buildExclude = []
+    """Finds files in a single traversal of the tree, without descending into
+    pruned directories. Exclusions are paths relative to the cwd, or glob
+    patterns matched against those paths (where '*' also matches '/')."""
+    def __init__(self, buildExclude=None, prunedDirectories=None):
+        self.buildExclude = set()
+        patterns = []
+        for exclusion in buildExclude if buildExclude else []:
+            if isGlobPattern(exclusion):
+                patterns.append(fnmatch.translate(path.normpath(exclusion)))
+            else:
+                self.buildExclude.add(path.normpath(exclusion))
+        self.excludeMatcher = None
+        if patterns:
+            self.excludeMatcher = re.compile('|'.join(patterns))
+        self.prunedDirectories = {
+            path.relpath(directory) for directory in prunedDirectories
+            if directory} if prunedDirectories else set()
 
     def isExcluded(self, filename):
-        if self.buildExclude and filename in self.buildExclude:
+        if filename in self.buildExclude or (
+                self.excludeMatcher and self.excludeMatcher.match(filename)):
             logging.info('Excluding %s', filename)
             return True
         return False
 
+    def isPruned(self, directory, name):
+        return name in PRUNED_NAMES or directory in self.prunedDirectories \
+            or self.isExcluded(directory)
+
     def locate(self, rootDirectory, extension):
-        # Locate all files with extension in rootDirectory
-        latexFiles = []
+        # Locate all files with extension (or any of a tuple of extensions)
+        # in rootDirectory
+        files = []
         logging.info('Recursively searching %s for %s files...',
                      rootDirectory, extension)
-        for dirpath, _, filenames in walk(rootDirectory):
-            for filename in filenames:
-                relativePath = path.relpath(path.join(dirpath, filename))
-                _, thisExtension = path.splitext(relativePath)
-                if thisExtension == extension \
-                   and not self.isExcluded(relativePath):
+        root = path.relpath(rootDirectory)
+        if root in self.prunedDirectories:
+            return files
+        directories = [root]
+        while directories:
+            directory = directories.pop()
+            try:
+                entries = sorted(scandir(directory), key=lambda e: e.name)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            subdirectories = []
+            for entry in entries:
+                # Paths are relative to the cwd, as relpath would give.
+                relativePath = entry.name if directory == '.' \
+                    else path.join(directory, entry.name)
+                if entry.is_dir():
+                    # Like os.walk, don't follow links to directories.
+                    if not entry.is_symlink() \
+                       and not self.isPruned(relativePath, entry.name):
+                        subdirectories.append(relativePath)
+                elif entry.name.endswith(extension) \
+                     and not self.isExcluded(relativePath):
                     logging.info('Adding %s', relativePath)
-                    latexFiles.append(relativePath)
-        return latexFiles
+                    files.append(relativePath)
+            directories.extend(reversed(subdirectories))
+        return files
 
 
 ###############################################################################
@@ -7,31 +7,85 @@
 #
 # CREATED:          02/23/2021
 #
-# LAST EDITED:      02/28/2021
+# LAST EDITED:      10/17/2026
 ###
 
+import os
 from datetime import datetime
+import re
 
 PREAMBLE = """
 # Generated by Makefile.py (Ethan D. Twardy),
 # on: {}
 """
+# Two Makefiles which differ only in this are the same
+PREAMBLE_TIMESTAMP = re.compile(r'^# on: .*$', re.MULTILINE)
 def getPreamble():
     return PREAMBLE.format(str(datetime.now()) + '\n')
 
+class Rule:
+    """A rule with a recipe. Recipe lines keep their backslash-newline
+    continuations, exactly as they are written to the Makefile."""
+    def __init__(self, targets, prerequisites, recipe, kind=None,
+                 sideOutputs=None):
+        self.targets = targets
+        self.prerequisites = prerequisites
+        self.recipe = recipe
+        # What the rule builds (e.g. 'pdf'), and any files it writes besides
+        # its targets.
+        self.kind = kind
+        self.sideOutputs = sideOutputs if sideOutputs else []
+
+    @classmethod
+    def fromText(cls, text, kind=None, sideOutputs=None):
+        """Parse a rule from the text of one of the *_RULE_FORMAT templates"""
+        lines = text.strip('\n').split('\n')
+        targets, _, prerequisites = lines[0].partition(':')
+        recipe = []
+        for line in lines[1:]:
+            if not line.startswith('\t'):
+                raise ValueError(f'Not a recipe line: {line}')
+            if recipe and recipe[-1].endswith('\\'):
+                recipe[-1] += '\n' + line
+            else:
+                recipe.append(line[1:])
+        return cls(targets.split(), prerequisites.split(), recipe, kind=kind,
+                   sideOutputs=sideOutputs)
+
+    def __str__(self):
+        text = '\n' + ' '.join(self.targets) + ':'
+        if self.prerequisites:
+            text += ' ' + ' '.join(self.prerequisites)
+        return text + '\n' + ''.join(f'\t{line}\n' for line in self.recipe)
+
 COPY_RULE = """
 {}: {}
 	mkdir -p $(@D)
-	cp -a -f $< $@
+	$(copyTimer) cp -a -f $< $@
 """
 def getCopyRule(target, prerequisite):
-    return COPY_RULE.format(target, prerequisite)
+    return Rule.fromText(COPY_RULE.format(target, prerequisite), kind='copy')
+
+COPY_PATTERN_RULE = """
+$(BuildDirectory)/%: %
+	mkdir -p $(@D)
+	$(copyTimer) cp -a -f $< $@
+"""
 
 class Makefile:
-    def __init__(self):
+    """Variables are ordered sets of values, and identical rules are only
+    added once, so that neither costs more as the project grows."""
+    def __init__(self, buildDirectory=''):
         self.defaultRule = {'target' : '', 'prerequisites': [], 'recipe': ''}
         self.rules = []
+        self.ruleKeys = set()
         self.variables = {}
+        # Copies from the DocumentRoot into here are written as one pattern
+        # rule, rather than a rule per file.
+        self.buildDirectory = buildDirectory
+        if buildDirectory:
+            self.appendToVariable('BuildDirectory',
+                                  buildDirectory.rstrip(os.sep))
 
     def setDefaultRuleTarget(self, newDefaultRuleTarget):
         self.defaultRule['target'] = newDefaultRuleTarget
@@ -43,37 +97,70 @@ class Makefile:
         self.defaultRule['recipe'] = recipe
 
     def addRule(self, newRule):
+        # Rules are either Rule objects, or raw text (e.g. assignments and
+        # conditionals) which is only meaningful to make.
+        key = str(newRule)
+        if key in self.ruleKeys:
+            return
+        self.ruleKeys.add(key)
         self.rules.append(newRule)
 
+    def getRules(self):
+        return [rule for rule in self.rules if isinstance(rule, Rule)]
+
+    def getDefaultRule(self):
+        recipe = Rule.fromText(f'{self.defaultRule["target"]}:'
+                               + self.defaultRule['recipe']).recipe
+        return Rule([self.defaultRule['target']],
+                    list(self.defaultRule['prerequisites']), recipe)
+
+    def getVariable(self, variableName):
+        return ' '.join(self.variables[variableName]['values'])
+
     def appendToVariable(self, variableName, value):
-        # assignmentType can be '', ':', '::', '?', '+', or others.
-        # We automatically switch to using '+' after the first assignment.
+        # The values are the keys of a dict: an ordered set.
         if variableName in self.variables:
-            self.variables[variableName]['values'].append(value)
+            self.variables[variableName]['values'][value] = None
         else:
-            self.variables[variableName] = {'values': [value]}
+            self.variables[variableName] = {'values': {value: None}}
 
     def variableIsSet(self, variableName):
         return variableName in self.variables
 
+    def variableContains(self, variableName, value):
+        return variableName in self.variables \
+            and value in self.variables[variableName]['values']
+
     def addCopyRule(self, target, prerequisite):
         copyFileVar = 'copyFiles'
-        if self.variableIsSet(copyFileVar) \
-           and target in self.variables[copyFileVar]['values']:
+        if self.variableContains(copyFileVar, target):
             return
         if not self.variableIsSet(copyFileVar):
             self.getDefaultRulePrerequisites().insert(0, f'$({copyFileVar})')
         self.appendToVariable(copyFileVar, target)
         self.addRule(getCopyRule(target, prerequisite))
 
+    def isPatternCopyRule(self, rule):
+        return self.buildDirectory and isinstance(rule, Rule) \
+            and rule.kind == 'copy' and len(rule.prerequisites) == 1 \
+            and rule.targets == [os.path.join(self.buildDirectory,
+                                              rule.prerequisites[0])]
+
+    def writeVariable(self, fileDescriptor, variable):
+        values = list(self.variables[variable]['values'])
+        if len(values) == 1:
+            fileDescriptor.write(f'{variable} = {values[0]}\n\n')
+            return
+        fileDescriptor.write(f'{variable} = \\\n\t')
+        fileDescriptor.write(' \\\n\t'.join(values))
+        fileDescriptor.write('\n\n')
+
     def write(self, fileDescriptor):
         fileDescriptor.write(getPreamble())
 
         # Write the variables
         for variable in self.variables:
-            for value in self.variables[variable]['values']:
-                fileDescriptor.write(f'{variable}+={value}\n')
-            fileDescriptor.write('\n')
+            self.writeVariable(fileDescriptor, variable)
 
         # Write default rule
         if not self.defaultRule['target']:
@@ -86,7 +173,13 @@ class Makefile:
             fileDescriptor.write(self.defaultRule['recipe'] + '\n')
 
         # Write the other rules
+        patternCopyRule = False
         for rule in self.rules:
-            fileDescriptor.write(rule)
+            if self.isPatternCopyRule(rule):
+                if not patternCopyRule:
+                    fileDescriptor.write(COPY_PATTERN_RULE)
+                    patternCopyRule = True
+                continue
+            fileDescriptor.write(str(rule))
 
 ###############################################################################
@@ -7,13 +7,16 @@
 #
 # CREATED:          07/18/2020
 #
-# LAST EDITED:      03/01/2021
+# LAST EDITED:      10/17/2026
 ###
 
 import os
 import argparse
-from bs4 import BeautifulSoup
-from .Files import WebFile
+import glob
+import hashlib
+from html.parser import HTMLParser
+import json
+from .Files import WebFile, getMetadataPath, writeIfChanged
 
 # TODO: This script should take a files_list.txt as an argument
 #    it will then parse this file and generate the navigation from it.
@@ -50,13 +53,43 @@ NAV_EPILOGUE = """
 </nav>
 """
 
-def getTitleFromHtml(htmlFilePath):
+class TitleParser(HTMLParser):
+    """Collects the text of the <title> element, and notes when it's done"""
+    def __init__(self):
+        super().__init__()
+        self.title = ''
+        self.inTitle = False
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title':
+            self.inTitle = True
+        elif tag == 'body':
+            self.done = True
+
+    def handle_endtag(self, tag):
+        if tag in ('title', 'head'):
+            self.inTitle = False
+            self.done = True
+
+    def handle_data(self, data):
+        if self.inTitle:
+            self.title += data
+
+def getTitleFromHtml(htmlFilePath, chunkSize=8192):
     """Obtains the title from the LaTeX document"""
+    parser = TitleParser()
     with open(htmlFilePath, 'r') as htmlFile:
-        soup = BeautifulSoup(htmlFile, 'html.parser')
-        if not soup.title or not soup.title.text:
-            raise RuntimeError(f'{htmlFilePath} does not specify a title!')
-        return soup.title.text
+        # Stop reading as soon as the title has been seen.
+        while not parser.done:
+            chunk = htmlFile.read(chunkSize)
+            if not chunk:
+                parser.close()
+                break
+            parser.feed(chunk)
+    if not parser.title:
+        raise RuntimeError(f'{htmlFilePath} does not specify a title!')
+    return parser.title
 
 def getLinkFromHtml(filename):
     """Obtain the link from the file path of the TeX file"""
@@ -65,6 +98,25 @@ def getLinkFromHtml(filename):
         link += filename.replace('.html', '/')
     return link
 
+def getLinkFromBuildPath(htmlFile, buildDirectory):
+    """Obtain the link from the path of the HTML file in the build directory"""
+    buildDirLen = len(WebFile.getComponentsOfPath(buildDirectory))
+    return getLinkFromHtml(os.path.join(
+        *WebFile.getComponentsOfPath(htmlFile)[buildDirLen:]))
+
+def getPageMetadata(htmlFile, buildDirectory):
+    """Obtain the navigation data for a page, preferably from its sidecar"""
+    metadataPath = getMetadataPath(htmlFile)
+    try:
+        if os.stat(metadataPath).st_mtime_ns \
+           >= os.stat(htmlFile).st_mtime_ns:
+            with open(metadataPath, 'r') as metadataFile:
+                return json.load(metadataFile)
+    except FileNotFoundError:
+        pass
+    return {'title': getTitleFromHtml(htmlFile),
+            'link': getLinkFromBuildPath(htmlFile, buildDirectory)}
+
 def getNavigationItem(link, title):
     """Obtain a navigation item"""
     attributeData = {'href': link}
@@ -108,6 +160,31 @@ def getNavigation(titles, book):
         navigation += BOOK_LINK.format('/' + book)
     return navigation + NAV_EPILOGUE
 
+COLORS_PARTIAL = '_colors.erb'
+COLORS_LINK = '<link rel="stylesheet" href="/stylesheets/{}"/>\n'
+
+def getColorStylesheet(colors):
+    """Obtain the site's colour stylesheet from the {class: declaration} of
+    every page"""
+    return ''.join(f'.{name}{{{colors[name]}}}\n' for name in sorted(colors))
+
+def writeColorStylesheet(colors, middlemanDirectory):
+    """Write the colour stylesheet under a name derived from its content, so
+    that browsers can cache it indefinitely, and the partial linking to it"""
+    stylesheet = getColorStylesheet(colors)
+    digest = hashlib.sha256(stylesheet.encode()).hexdigest()[:16]
+    stylesheetName = f'colors-{digest}.css'
+    stylesheetDirectory = os.path.join(middlemanDirectory, 'stylesheets')
+    os.makedirs(stylesheetDirectory, exist_ok=True)
+    for oldStylesheet in glob.glob(
+            os.path.join(stylesheetDirectory, 'colors-*.css')):
+        if os.path.basename(oldStylesheet) != stylesheetName:
+            os.remove(oldStylesheet)
+    writeIfChanged(os.path.join(stylesheetDirectory, stylesheetName),
+                   stylesheet)
+    writeIfChanged(os.path.join(middlemanDirectory, COLORS_PARTIAL),
+                   COLORS_LINK.format(stylesheetName))
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -121,20 +198,26 @@ def main():
         '--build-dir', '-d',
         help=('The path of the build directory. This is excluded from'
               ' navigation data.'), default='')
+    parser.add_argument(
+        '--colors', metavar='MIDDLEMAN_DIRECTORY', default='',
+        help=('Collect the colour rules of the pages prepared with'
+              ' --shared-colors into one stylesheet in this directory'))
     parser.add_argument(
         'htmlFiles', help=('The HTML files for which to generate navigation'),
         nargs='*')
     arguments = parser.parse_args()
 
-    buildDirLen = len(WebFile.getComponentsOfPath(arguments.build_dir))
-    htmlFilesNoBuildDir = [
-        os.path.join(*WebFile.getComponentsOfPath(htmlFile)[buildDirLen:])
-        for htmlFile in arguments.htmlFiles]
-    titles = dict(zip(
-        [getLinkFromHtml(htmlFile) for htmlFile in htmlFilesNoBuildDir],
-        [getTitleFromHtml(htmlFile) for htmlFile in arguments.htmlFiles]))
-    with open(arguments.output, 'w') as outputFile:
-        outputFile.write(getNavigation(titles, arguments.book))
+    titles = {}
+    colors = {}
+    for htmlFile in arguments.htmlFiles:
+        metadata = getPageMetadata(htmlFile, arguments.build_dir)
+        titles[metadata['link']] = metadata['title']
+        colors.update(metadata.get('colors', {}))
+    if arguments.colors:
+        writeColorStylesheet(colors, arguments.colors)
+    # Every page's layout includes this, so an unchanged navigation must not
+    # look like a new one.
+    writeIfChanged(arguments.output, getNavigation(titles, arguments.book))
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,124 @@
+###############################################################################
+# NAME:             Pdflatex.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      Runs pdflatex until its output stops changing.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+import argparse
+import hashlib
+import logging
+import os
+import re
+import subprocess
+import sys
+
+from .BuildStats import reportStats
+
+# Files that pdflatex reads back in on the next pass
+AUXILIARY_EXTENSIONS = ('.aux', '.toc', '.out', '.lof', '.lot')
+
+# Only the warnings themselves: e.g. "LaTeX Warning: Label(s) may have
+# changed. Rerun to get cross-references right.", the continuation line
+# "(rerunfilecheck)    Rerun to get outlines right", or biblatex's "Please
+# rerun LaTeX.". The word alone also appears in the banner of rerunfilecheck
+# (which hyperref loads), and in text quoted by overfull box messages.
+RERUN_WARNING = re.compile(
+    rb'^(?:(?:LaTeX|Package \w+) Warning:.*Rerun to get'
+    rb'|\(\w+\)\s+Rerun to get)|Please rerun LaTeX', re.MULTILINE)
+
+def getJobName(texFile, flags):
+    """Obtain the name pdflatex uses for its output files"""
+    for flag in flags:
+        if flag.startswith(('-jobname=', '--jobname=')):
+            return flag.split('=', 1)[1]
+    return os.path.splitext(os.path.basename(texFile))[0]
+
+def hashAuxiliaryFiles(jobName):
+    """Obtain the hashes of the auxiliary files that currently exist"""
+    digests = {}
+    for extension in AUXILIARY_EXTENSIONS:
+        try:
+            with open(jobName + extension, 'rb') as auxiliaryFile:
+                digests[extension] = hashlib.sha256(
+                    auxiliaryFile.read()).hexdigest()
+        except FileNotFoundError:
+            pass
+    return digests
+
+def logRequestsRerun(jobName):
+    """Whether the log of the last pass asks for another pass"""
+    try:
+        with open(jobName + '.log', 'rb') as logFile:
+            return bool(RERUN_WARNING.search(logFile.read()))
+    except FileNotFoundError:
+        return False
+
+def getFormatFlags(formatName):
+    """Obtain the argument which loads the format in the current directory,
+    unless it's empty: the format couldn't be dumped."""
+    try:
+        if formatName and os.path.getsize(formatName + '.fmt'):
+            return [f'&{formatName}']
+    except FileNotFoundError:
+        logging.warning('%s.fmt: No such format', formatName)
+    return []
+
+def runPdflatex(texFile, flags, maxPasses):
+    """Run pdflatex until the auxiliary files are stable. Returns the exit
+    status of pdflatex and the number of passes."""
+    jobName = getJobName(texFile, flags)
+    before = hashAuxiliaryFiles(jobName)
+    for passNumber in range(1, maxPasses + 1):
+        result = subprocess.run(['pdflatex', *flags, texFile], check=False)
+        if result.returncode != 0:
+            return result.returncode, passNumber
+        after = hashAuxiliaryFiles(jobName)
+        if after == before and not logRequestsRerun(jobName):
+            logging.info('%s: Converged after %d pass(es)', texFile,
+                         passNumber)
+            return 0, passNumber
+        before = after
+    logging.warning('%s: Output still changing after %d passes', texFile,
+                    maxPasses)
+    return 0, maxPasses
+
+def main():
+    """Runs pdflatex as many times as the document needs"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--max-passes', '-n', type=int, default=5,
+        help=('The maximum number of times to run pdflatex'))
+    parser.add_argument(
+        '--format', '-f', default='',
+        help=('Load the precompiled format FORMAT.fmt from the current'
+              ' directory, if one could be dumped'))
+    parser.add_argument(
+        'arguments', nargs=argparse.REMAINDER,
+        help=('The flags for pdflatex, followed by the TeX file. Separate'
+              ' these from the options above with "--".'))
+    arguments = parser.parse_args()
+    pdflatexArguments = arguments.arguments
+    if pdflatexArguments and pdflatexArguments[0] == '--':
+        pdflatexArguments = pdflatexArguments[1:]
+    if not pdflatexArguments:
+        parser.error('No TeX file given')
+    if arguments.max_passes < 1:
+        parser.error('--max-passes must be at least 1')
+
+    returnCode, passes = runPdflatex(
+        pdflatexArguments[-1],
+        pdflatexArguments[:-1] + getFormatFlags(arguments.format),
+        arguments.max_passes)
+    reportStats({'passes': passes})
+    sys.exit(returnCode)
+
+if __name__ == '__main__':
+    main()
+
+###############################################################################
@@ -8,12 +8,34 @@
 #
 # CREATED:          07/12/2020
 #
-# LAST EDITED:      03/01/2021
+# LAST EDITED:      10/17/2026
 ###
 
 import argparse
+import collections
+import functools
+import hashlib
+import html
+from html.parser import HTMLParser
+import io
+import json
+import logging
+import os
+import re
+import resource
+import sys
+import time
 
-from bs4 import BeautifulSoup
+from .BuildStats import appendRecord, getRunId
+from .Cache import OutputCache, getKey
+from .Files import getMetadataPath, getTermsPath, writeIfChanged
+from .Images import getImageSize, isLocalSource, resolveImage
+from .Navigation import getLinkFromBuildPath
+from .Search import getTermWeights, writeTerms
+
+# Increment this whenever the output of prepareTemplate changes, so that pages
+# in the cache are not reused.
+TEMPLATE_VERSION = '7'
 
 # TODO: Create intermediate build artifacts that contain navigation?
 #    wp-genmakefile creates *.prepare.txt files which contain YAML erb headers
@@ -43,43 +65,627 @@ def getRelevantStyle(cssFile):
             output += line
     return output
 
-def prepareTemplate(inputFile, outputFile, cssFile, pageData):
-    """Renders the input file to produce an ERB template"""
+# A make4ht colour rule, e.g. ".textcolor-red{color:#FF0000}"
+COLOR_RULE = re.compile(r'^\s*\.(textcolor-[\w-]+)\s*\{([^{}]*)\}\s*$')
+
+def getSharedColorClass(declaration):
+    """Name a colour class by its declaration, so that a colour has the same
+    class on every page"""
+    normalized = ''.join(declaration.split()).rstrip(';').lower()
+    return 'textcolor-' + hashlib.sha256(normalized.encode()).hexdigest()[:10]
+
+def splitRelevantStyle(cssFile):
+    """Split the relevant CSS styling from the cssFile into the colour rules
+    which can be shared between pages, {class: (sharedClass, declaration)},
+    and the page-specific rules."""
+    sharedColors = {}
+    output = ''
+    for line in cssFile.readlines():
+        if '.textcolor-' not in line:
+            continue
+        match = COLOR_RULE.match(line)
+        if match:
+            declaration = match.group(2).strip()
+            sharedColors[match.group(1)] = (
+                getSharedColorClass(declaration), declaration)
+        else:
+            output += line
+    # The page-specific rules may refer to the renamed classes.
+    if sharedColors and output:
+        output = re.sub(
+            r'\.(textcolor-[\w-]+)(?![\w-])',
+            lambda match: '.' + sharedColors.get(
+                match.group(1), (match.group(1),))[0], output)
+    return sharedColors, output
+
+###############################################################################
+# Minification
+###
+
+# Whitespace is significant inside these
+PRESERVE_WHITESPACE = ('pre', 'code', 'textarea', 'script', 'style')
+
+# Elements which render nothing when empty, unless they can be linked to
+DROPPABLE_ELEMENTS = ('span', 'em', 'strong', 'b', 'i', 'small', 'sub', 'sup',
+                      'div', 'p')
+
+WHITESPACE = re.compile(r'\s+')
+
+def normalizeStyle(style):
+    declarations = [declaration.strip() for declaration in style.split(';')]
+    return ';'.join(
+        ':'.join(part.strip() for part in declaration.split(':', 1))
+        for declaration in declarations if declaration)
+
+def minifyBody(body):
+    """Minify the markup make4ht generates in place. Returns the CSS rules for
+    the classes that replace inline styles."""
+    from bs4 import Comment # pylint: disable=import-outside-toplevel
+    for comment in body.find_all(string=lambda text: isinstance(
+            text, Comment)):
+        comment.extract()
+
+    # find_all is in document order, so this removes nested elements first.
+    # Styled ones are kept: tex4ht writes \hspace and vertical space as empty
+    # elements with a margin.
+    for element in reversed(body.find_all(DROPPABLE_ELEMENTS)):
+        if not element.contents and set(element.attrs) <= {'class'}:
+            element.decompose()
+
+    for string in body.find_all(string=True):
+        if string.find_parent(PRESERVE_WHITESPACE):
+            continue
+        collapsed = WHITESPACE.sub(' ', string)
+        if collapsed != string:
+            string.replace_with(collapsed)
+
+    # make4ht repeats the same inline styles over and over. Replace those
+    # that occur more than once with a class.
+    styledElements = body.find_all(style=True)
+    styles = collections.Counter(normalizeStyle(element['style'])
+                                 for element in styledElements)
+    rules = {}
+    for element in styledElements:
+        style = normalizeStyle(element['style'])
+        if not style:
+            del element['style']
+        elif styles[style] < 2:
+            element['style'] = style
+        else:
+            name = 'wp-' + hashlib.sha256(style.encode()).hexdigest()[:8]
+            rules[name] = style
+            element['class'] = element.get('class', []) + [name]
+            del element['style']
+    for element in body.find_all(class_=''):
+        del element['class']
+    return ''.join(f'.{name}{{{rules[name]}}}\n' for name in sorted(rules))
+
+###############################################################################
+# Templates
+###
+
+def getImageAttributes(attributes, index, htmlFilename, buildDirectory):
+    """Give the index'th image of the page its dimensions, so the layout
+    doesn't shift as it loads, and defer loading all but the first until
+    they're scrolled to"""
+    attributes = dict(attributes)
+    source = attributes.get('src', '')
+    if 'width' not in attributes and 'height' not in attributes \
+       and source and isLocalSource(source):
+        imagePath = resolveImage(htmlFilename, source, buildDirectory)
+        size = getImageSize(imagePath) if imagePath else None
+        if size:
+            attributes['width'], attributes['height'] = map(str, size)
+    if index > 0:
+        attributes.setdefault('loading', 'lazy')
+    attributes.setdefault('decoding', 'async')
+    return attributes
+
+def setImageAttributes(body, htmlFilename, buildDirectory):
+    for index, image in enumerate(body.find_all('img')):
+        image.attrs = getImageAttributes(image.attrs, index, htmlFilename,
+                                         buildDirectory)
+
+# Elements whose text isn't shown, and so isn't searchable
+HIDDEN_ELEMENTS = ('script', 'style', 'template')
+
+def getBodyText(body):
+    """Obtain the text of the body which is shown on the page"""
+    # pylint: disable=import-outside-toplevel
+    from bs4 import Comment
+    return ' '.join(text for text in body.find_all(string=True)
+                    if not isinstance(text, Comment)
+                    and text.parent.name not in HIDDEN_ELEMENTS)
+
+def prepareTemplateFromSoup(inputFile, outputFile, cssFile, pageData,
+                            sharedColors=False, buildDirectory='',
+                            bodyText=None):
+    """Renders the input file to produce a minified ERB template. Returns the
+    shared colour rules the page uses, {class: declaration}."""
+    # bs4 is slow to import, and only minification needs the whole tree.
+    from bs4 import BeautifulSoup # pylint: disable=import-outside-toplevel
     soup = BeautifulSoup(inputFile, 'html.parser')
-    if soup.title.text:
+    if soup.title and soup.title.text:
         pageData['title'] = soup.title.text
     else:
         raise RuntimeError('No title in the HTML head!')
     pageData['pdfLink'] = f'/{getPdfPath(inputFile.name)}'
     prologue = getPrologue(pageData)
-
-    style = soup.new_tag('style')
-    style.string = getRelevantStyle(cssFile)
     outputFile.write(prologue)
-    outputFile.write(style.decode(formatter="html"))
-    for childElement in soup.find('body').findChildren(recursive=False):
+
+    colors = {}
+    body = soup.find('body')
+    if bodyText is not None:
+        bodyText.append(getBodyText(body))
+    if sharedColors:
+        # The rules are in the site's colour stylesheet, which the colors
+        # partial links to. Rename the classes to match.
+        pageColors, relevantStyle = splitRelevantStyle(cssFile)
+        for element in body.find_all(class_=True):
+            element['class'] = [
+                pageColors[name][0] if name in pageColors else name
+                for name in element['class']]
+        colors = dict(pageColors.values())
+        outputFile.write('<%= partial "colors" %>\n')
+    else:
+        relevantStyle = getRelevantStyle(cssFile)
+    setImageAttributes(body, inputFile.name, buildDirectory)
+    relevantStyle += minifyBody(body)
+
+    if relevantStyle:
+        style = soup.new_tag('style')
+        style.string = relevantStyle
+        outputFile.write(style.decode(formatter="html"))
+    for childElement in body.findChildren(recursive=False):
         outputFile.write(childElement.decode(formatter="html"))
+    return colors
+
+# Elements which have no end tag
+VOID_ELEMENTS = ('area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                 'link', 'meta', 'param', 'source', 'track', 'wbr')
+
+def getStartTag(tag, attributes, selfClosing=False):
+    text = '<' + tag
+    for name, value in attributes.items():
+        text += f' {name}' if value is None \
+            else f' {name}="{html.escape(value)}"'
+    return text + (' />' if selfClosing else '>')
+
+class TemplateParser(HTMLParser):
+    """Collects the title of a page, and the elements of its body as they are
+    written, rewriting only the start tags that need it. Like findChildren,
+    the text between the elements of the body is dropped. The text shown on
+    the page is collected for the search index."""
+    def __init__(self, htmlFilename, buildDirectory, classes=None):
+        super().__init__(convert_charrefs=False)
+        self.htmlFilename = htmlFilename
+        self.buildDirectory = buildDirectory
+        # {class: the class to rename it to}
+        self.classes = classes if classes else {}
+        self.title = None
+        self.inTitle = False
+        self.inBody = False
+        self.depth = 0
+        self.images = 0
+        self.body = []
+        self.text = []
+        self.hidden = 0
+
+    def rewriteStartTag(self, tag, attrs, selfClosing=False):
+        attributes = None
+        if tag == 'img':
+            attributes = getImageAttributes(
+                attrs, self.images, self.htmlFilename, self.buildDirectory)
+            self.images += 1
+        classes = dict(attrs).get('class')
+        if classes and self.classes:
+            renamed = ' '.join(self.classes.get(name, name)
+                               for name in classes.split())
+            if renamed != classes:
+                attributes = attributes if attributes else dict(attrs)
+                attributes['class'] = renamed
+        if attributes is None:
+            return self.get_starttag_text()
+        return getStartTag(tag, attributes, selfClosing)
+
+    def handle_starttag(self, tag, attrs):
+        if self.inBody:
+            self.body.append(self.rewriteStartTag(tag, attrs))
+            # Words either side of an element are separate words.
+            self.text.append(' ')
+            if tag not in VOID_ELEMENTS:
+                self.depth += 1
+            if tag in HIDDEN_ELEMENTS:
+                self.hidden += 1
+        elif tag == 'title':
+            self.inTitle = True
+            self.title = ''
+        elif tag == 'body':
+            self.inBody = True
+
+    def handle_startendtag(self, tag, attrs):
+        if self.inBody:
+            self.body.append(self.rewriteStartTag(tag, attrs, True))
+            self.text.append(' ')
+
+    def handle_endtag(self, tag):
+        if self.inBody and self.depth and tag not in VOID_ELEMENTS:
+            self.depth -= 1
+            self.body.append(f'</{tag}>')
+            self.text.append(' ')
+            if tag in HIDDEN_ELEMENTS and self.hidden:
+                self.hidden -= 1
+        elif tag == 'title':
+            self.inTitle = False
+        elif tag == 'body':
+            self.inBody = False
+
+    def handle_text(self, text, shown=True):
+        if self.inTitle:
+            self.title += text
+        elif self.inBody:
+            if self.depth:
+                self.body.append(text)
+            if shown and not self.hidden:
+                self.text.append(text)
+
+    def handle_data(self, data):
+        self.handle_text(data)
+
+    def handle_entityref(self, name):
+        self.handle_text(f'&{name};')
+
+    def handle_charref(self, name):
+        self.handle_text(f'&#{name};')
+
+    def handle_comment(self, data):
+        if not self.inTitle:
+            self.handle_text(f'<!--{data}-->', shown=False)
+
+    def getText(self):
+        return html.unescape(''.join(self.text))
+
+def getTermsFromHtml(htmlFilename, buildDirectory=''):
+    """Obtain the {term: weight} of a page from its HTML file"""
+    parser = TemplateParser(htmlFilename, buildDirectory)
+    with open(htmlFilename, 'r') as htmlFile:
+        parser.feed(htmlFile.read())
+    parser.close()
+    return getTermWeights(html.unescape(parser.title or ''), parser.getText())
+
+def prepareTemplate(inputFile, outputFile, cssFile, pageData,
+                    sharedColors=False, minify=False, buildDirectory='',
+                    bodyText=None):
+    """Renders the input file to produce an ERB template. Returns the shared
+    colour rules the page uses, {class: declaration}. The text of the body is
+    appended to bodyText, if it's given."""
+    if minify:
+        return prepareTemplateFromSoup(inputFile, outputFile, cssFile,
+                                       pageData, sharedColors, buildDirectory,
+                                       bodyText)
+    pageColors = {}
+    if sharedColors:
+        pageColors, relevantStyle = splitRelevantStyle(cssFile)
+    else:
+        relevantStyle = getRelevantStyle(cssFile)
+    parser = TemplateParser(inputFile.name, buildDirectory, {
+        name: sharedClass for name, (sharedClass, _) in pageColors.items()})
+    parser.feed(inputFile.read())
+    parser.close()
+    if not parser.title:
+        raise RuntimeError('No title in the HTML head!')
+    pageData['title'] = html.unescape(parser.title)
+    if bodyText is not None:
+        bodyText.append(parser.getText())
+    pageData['pdfLink'] = f'/{getPdfPath(inputFile.name)}'
+    outputFile.write(getPrologue(pageData))
+
+    if sharedColors:
+        # The rules are in the site's colour stylesheet, which the colors
+        # partial links to.
+        outputFile.write('<%= partial "colors" %>\n')
+    if relevantStyle:
+        outputFile.write(f'<style>{relevantStyle}</style>')
+    outputFile.write(''.join(parser.body))
+    return dict(pageColors.values())
+
+def parsePageData(pageDataString):
+    """Parse a comma-separated list of key=value pairs into a dict"""
+    pageData = {}
+    if pageDataString:
+        for entry in pageDataString.split(','):
+            key, value = entry.split('=')
+            pageData[key] = value
+    return pageData
+
+def writeMetadata(inputFilename, pageData, buildDirectory, colors=None):
+    """Write the navigation data for the page into its sidecar"""
+    metadata = {
+        'title': pageData['title'],
+        'link': getLinkFromBuildPath(inputFilename, buildDirectory),
+        'pdfLink': pageData['pdfLink'],
+    }
+    if colors:
+        metadata['colors'] = colors
+    writeIfChanged(getMetadataPath(inputFilename), json.dumps(metadata),
+                   touch=True)
+
+def prepareFile(inputFilename, cssFilename, outputFilename, pageData,
+                buildDirectory='', sharedColors=False, minify=False):
+    """Renders the ERB template, and the metadata and terms sidecars for a
+    single page. An unchanged template is only touched, for make."""
+    outFile = io.StringIO()
+    bodyText = []
+    with open(inputFilename, 'r') as inFile, \
+         open(cssFilename, 'r') as cssFile:
+        colors = prepareTemplate(inFile, outFile, cssFile, pageData,
+                                 sharedColors, minify, buildDirectory,
+                                 bodyText)
+    writeIfChanged(outputFilename, outFile.getvalue(), touch=True)
+    writeMetadata(inputFilename, pageData, buildDirectory, colors)
+    writeTerms(inputFilename, getTermWeights(pageData['title'],
+                                             ' '.join(bodyText)))
+
+###############################################################################
+# Batch Mode
+#
+# The generated Makefile appends one line per stale page to a manifest, and
+# the build rule prepares all of them in a single process.
+###
+
+def readManifest(manifestFilename):
+    """Obtain the (input, css, output, pageData) entries from the manifest"""
+    entries = {}
+    try:
+        with open(manifestFilename, 'r') as manifestFile:
+            for line in manifestFile.readlines():
+                if not line.strip():
+                    continue
+                fields = line.rstrip('\n').split('\t')
+                if len(fields) != 4:
+                    logging.warning('%s: Malformed manifest entry: %s',
+                                    manifestFilename, line.strip())
+                    continue
+                # A page may be listed more than once if an earlier build was
+                # interrupted, so key the entries on the output file.
+                entries[fields[2]] = tuple(fields)
+    except FileNotFoundError:
+        pass
+    return list(entries.values())
+
+# Options which don't change the pages
+UNCACHED_OPTIONS = ('cacheMaxSize', 'pageBudget', 'budgetAction', 'statsLog')
+
+PAGE_SIZES = 'page-sizes.json'
+def getPageSizesPath(buildDirectory):
+    return os.path.join(buildDirectory, PAGE_SIZES)
+
+def getPageCacheKey(entry, options):
+    """Obtain the cache key of a page from its inputs and the options"""
+    digests = []
+    for filename in entry[:2]:
+        with open(filename, 'rb') as inputFile:
+            digests.append(hashlib.sha256(inputFile.read()).hexdigest())
+    pageOptions = {key: value for key, value in options.items()
+                   if key not in UNCACHED_OPTIONS}
+    return getKey(TEMPLATE_VERSION, *entry, *digests,
+                  json.dumps(pageOptions, sort_keys=True))
+
+def checkBudget(outputFilename, size, options):
+    """Report a page larger than the budget. Returns an error, if the budget
+    is enforced."""
+    if not options['pageBudget'] or size <= options['pageBudget']:
+        return None
+    message = (f'{size} bytes exceeds the page budget of'
+               f' {options["pageBudget"]} bytes')
+    if options['budgetAction'] == 'error':
+        return message
+    logging.warning('%s: %s', outputFilename, message)
+    return None
+
+def preparePage(options, entry):
+    """Prepare the page for one manifest entry, reporting instead of raising.
+    Returns (outputFilename, error, cacheHit, size)."""
+    inputFilename, cssFilename, outputFilename, pageData = entry
+    cacheHit = False
+    error = None
+    startTime = time.time()
+    start, startCpu = time.perf_counter(), time.process_time()
+    try:
+        cache, cacheKey = None, None
+        outputs = [outputFilename, getMetadataPath(inputFilename),
+                   getTermsPath(inputFilename)]
+        if options['cacheDirectory']:
+            cache = OutputCache(options['cacheDirectory'])
+            cacheKey = getPageCacheKey(entry, options)
+            cacheHit = cache.restore(cacheKey, outputs)
+        if not cacheHit:
+            prepareFile(inputFilename, cssFilename, outputFilename,
+                        parsePageData(pageData), options['buildDirectory'],
+                        options['sharedColors'], options['minify'])
+            if cache:
+                cache.store(cacheKey, outputs)
+        size = os.path.getsize(outputFilename)
+        error = checkBudget(outputFilename, size, options)
+        if error:
+            # Otherwise, make would consider the page up to date next time.
+            os.remove(outputFilename)
+    except Exception as e: # pylint: disable=broad-except
+        error, size = f'{type(e).__name__}: {e}', 0
+    if options['statsLog']:
+        appendRecord(options['statsLog'], {
+            'run': getRunId(),
+            'time': startTime,
+            'target': outputFilename,
+            'phase': 'erb',
+            'wall': round(time.perf_counter() - start, 3),
+            'cpu': round(time.process_time() - startCpu, 3),
+            # The peak of this worker, so far
+            'maxrss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            'status': 1 if error else 0,
+            'cacheHit': cacheHit,
+        })
+    return outputFilename, error, cacheHit, size
+
+def writePageSizes(buildDirectory, results):
+    """Record the size of each page prepared in the report in the build
+    directory, and log a summary"""
+    sizesPath = getPageSizesPath(buildDirectory)
+    try:
+        with open(sizesPath, 'r') as sizesFile:
+            sizes = json.load(sizesFile)
+    except (FileNotFoundError, ValueError):
+        sizes = {}
+    for outputFilename, _, _, size in results:
+        if size:
+            sizes[outputFilename] = size
+    sizes = {outputFilename: size for outputFilename, size in sizes.items()
+             if os.path.isfile(outputFilename)}
+    with open(sizesPath, 'w') as sizesFile:
+        json.dump(sizes, sizesFile, indent=1, sort_keys=True)
+    if sizes:
+        largest = max(sizes, key=sizes.get)
+        logging.info('%d page(s), %d bytes, largest: %s (%d bytes)',
+                     len(sizes), sum(sizes.values()), largest, sizes[largest])
+
+def writeFailures(manifestFilename, entries, failures):
+    """Leave only the entries of the pages that failed in the manifest, so
+    that they're prepared again next time, or remove it"""
+    if not failures:
+        os.remove(manifestFilename)
+        return
+    failures = set(failures)
+    temporaryFileName = manifestFilename + '.tmp'
+    with open(temporaryFileName, 'w') as manifestFile:
+        for entry in entries:
+            if entry[2] in failures:
+                manifestFile.write('\t'.join(entry) + '\n')
+    os.replace(temporaryFileName, manifestFilename)
+
+def prepareBatch(manifestFilename, jobs=None, options=None):
+    """Prepare every page in the manifest. Returns the pages that failed."""
+    options = {'buildDirectory': '', 'cacheDirectory': '', 'cacheMaxSize': 0,
+               'sharedColors': False, 'minify': False, 'pageBudget': 0,
+               'budgetAction': 'warn', 'statsLog': '',
+               **(options if options else {})}
+    entries = readManifest(manifestFilename)
+    if not entries:
+        return []
+    logging.info('Preparing %d pages from %s', len(entries), manifestFilename)
+
+    # The size limit only matters to eviction, not to the pages.
+    pageOptions = {key: value for key, value in options.items()
+                   if key != 'cacheMaxSize'}
+    if len(entries) == 1:
+        results = [preparePage(pageOptions, entries[0])]
+    else:
+        # multiprocessing is slow to import, and most runs have little to do.
+        # pylint: disable=import-outside-toplevel
+        from concurrent.futures import ProcessPoolExecutor
+        jobs = jobs or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(
+                functools.partial(preparePage, pageOptions), entries,
+                chunksize=max(1, len(entries) // (jobs * 4))))
+
+    failures = []
+    for outputFilename, error, _, _ in results:
+        if error:
+            logging.error('%s: %s', outputFilename, error)
+            failures.append(outputFilename)
+    if options['cacheDirectory']:
+        hits = sum(1 for _, _, cacheHit, _ in results if cacheHit)
+        evicted = OutputCache(options['cacheDirectory'],
+                              options['cacheMaxSize']).evict()
+        logging.info('Cache: %d hit(s), %d miss(es), %d evicted', hits,
+                     len(results) - hits, evicted)
+    if options['buildDirectory']:
+        writePageSizes(options['buildDirectory'], results)
+    writeFailures(manifestFilename, entries, failures)
+    return failures
 
 def main():
     """Prepares generated HTML files to be build with Middleman"""
     parser = argparse.ArgumentParser()
-    parser.add_argument('inputFilename')
-    parser.add_argument('cssFilename')
-    parser.add_argument('outputFilename')
+    parser.add_argument('inputFilename', nargs='?')
+    parser.add_argument('cssFilename', nargs='?')
+    parser.add_argument('outputFilename', nargs='?')
     parser.add_argument('--page-data', '-d',
                         help=('Additional data for the yaml template header'),
                         default='')
+    parser.add_argument(
+        '--batch', '-b', metavar='MANIFEST', default='',
+        help=('Prepare every page listed in MANIFEST, one tab-separated'
+              ' "input css output page-data" entry per line. The manifest is'
+              ' removed once it has been processed, unless pages failed:'
+              ' then only theirs are left in it.'))
+    parser.add_argument(
+        '--jobs', '-j', type=int, default=None,
+        help=('The number of worker processes to use in batch mode'))
+    parser.add_argument(
+        '--build-dir', default='',
+        help=('The path of the build directory, which is stripped from the'
+              ' page links written to the metadata sidecars'))
+    parser.add_argument(
+        '--cache-dir', default='',
+        help=('In batch mode, restore unchanged pages from (and store new'
+              ' pages in) this output cache'))
+    parser.add_argument(
+        '--cache-size', type=int, default=0,
+        help=('Trim the cache to this many bytes after a batch'))
+    parser.add_argument(
+        '--shared-colors', action='store_true', default=False,
+        help=('Link to the site\'s colour stylesheet (see wp-navigation'
+              ' --colors) instead of inlining the colour rules'))
+    parser.add_argument(
+        '--minify', action='store_true', default=False,
+        help=('Collapse whitespace, drop comments and empty elements, and'
+              ' replace repeated inline styles with classes'))
+    parser.add_argument(
+        '--budget', type=int, default=0,
+        help=('Report pages larger than this many bytes'))
+    parser.add_argument(
+        '--budget-action', choices=['warn', 'error'], default='warn',
+        help=('Whether a page over the budget is a warning, or fails'))
+    parser.add_argument(
+        '--stats', default='',
+        help=('In batch mode, append the cost of preparing each page to this'
+              ' build statistics log'))
     arguments = parser.parse_args()
-    pageData = {}
-    if arguments.page_data:
-        for entry in arguments.page_data.split(','):
-            key, value = entry.split('=')
-            pageData[key] = value
+    positionals = [arguments.inputFilename, arguments.cssFilename,
+                   arguments.outputFilename]
+
+    if arguments.batch:
+        if any(positionals):
+            parser.error('--batch does not take input or output files')
+        failures = prepareBatch(arguments.batch, arguments.jobs, {
+            'buildDirectory': arguments.build_dir,
+            'cacheDirectory': arguments.cache_dir,
+            'cacheMaxSize': arguments.cache_size,
+            'sharedColors': arguments.shared_colors,
+            'minify': arguments.minify,
+            'pageBudget': arguments.budget,
+            'budgetAction': arguments.budget_action,
+            'statsLog': arguments.stats,
+        })
+        if failures:
+            sys.exit(f'Failed to prepare {len(failures)} page(s)')
+        return
 
-    with open(arguments.inputFilename, 'r') as inFile, \
-         open(arguments.outputFilename, 'w') as outFile, \
-         open(arguments.cssFilename, 'r') as cssFile:
-        prepareTemplate(inFile, outFile, cssFile, pageData)
+    if not all(positionals):
+        parser.error('inputFilename, cssFilename and outputFilename are'
+                     ' required')
+    prepareFile(*positionals, parsePageData(arguments.page_data),
+                arguments.build_dir, arguments.shared_colors, arguments.minify)
+    error = checkBudget(positionals[2], os.path.getsize(positionals[2]), {
+        'pageBudget': arguments.budget,
+        'budgetAction': arguments.budget_action,
+    })
+    if error:
+        # As in batch mode, so that make doesn't take the page to be up to
+        # date next time.
+        os.remove(positionals[2])
+        sys.exit(f'{positionals[2]}: {error}')
 
 if __name__ == '__main__':
     main()
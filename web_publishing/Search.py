@@ -0,0 +1,297 @@
+###############################################################################
+# NAME:             Search.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      Merges the terms wp-prepare records for each page into an
+#                   inverted index for the site, split into shards by the
+#                   prefix of the terms and named by their content, so that
+#                   the browser only fetches the shards a query needs.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+import argparse
+import collections
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import statistics
+import time
+
+from .Files import getTermsPath, writeIfChanged
+from .Navigation import getPageMetadata
+
+###############################################################################
+# Terms
+#
+# search.js splits and filters queries the same way.
+###
+
+TERM = re.compile(r'\w+')
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 32
+STOP_WORDS = frozenset((
+    'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'from', 'has',
+    'have', 'if', 'in', 'into', 'is', 'it', 'its', 'not', 'of', 'on', 'or',
+    'so', 'such', 'that', 'the', 'their', 'then', 'there', 'these', 'this',
+    'to', 'was', 'were', 'which', 'will', 'with'))
+# An occurrence in the title counts as this many in the body
+TITLE_WEIGHT = 5
+
+def isIndexed(term):
+    return MIN_TERM_LENGTH <= len(term) <= MAX_TERM_LENGTH \
+        and term not in STOP_WORDS
+
+def getTermWeights(title, text):
+    """Obtain the {term: weight} of a page"""
+    # Filtering the distinct words is much cheaper than filtering every one.
+    weights = collections.Counter(TERM.findall(text.lower()))
+    for term in TERM.findall(title.lower()):
+        weights[term] += TITLE_WEIGHT
+    return {term: weight for term, weight in weights.items()
+            if isIndexed(term)}
+
+def writeTerms(htmlFilename, weights):
+    """Write the terms of the page into its sidecar"""
+    writeIfChanged(getTermsPath(htmlFilename),
+                   json.dumps(weights, separators=(',', ':')), touch=True)
+
+def readTerms(htmlFilename, buildDirectory):
+    try:
+        with open(getTermsPath(htmlFilename), 'r') as termsFile:
+            return json.load(termsFile)
+    except (FileNotFoundError, ValueError):
+        pass
+    # The page was prepared by an older wp-prepare, which didn't record them.
+    # pylint: disable=import-outside-toplevel,cyclic-import
+    from .Prepare import getTermsFromHtml
+    logging.info('%s: No terms recorded, reading them from the page',
+                 htmlFilename)
+    weights = getTermsFromHtml(htmlFilename, buildDirectory)
+    writeTerms(htmlFilename, weights)
+    return weights
+
+###############################################################################
+# Index
+#
+# Each shard holds {term: [id, weight, id, weight, ...]} for the terms with
+# one prefix. A shard larger than SHARD_SIZE is split by a longer prefix
+# (unless it holds one term), and the titles and links of the pages are in
+# blocks of BLOCK_SIZE ids. Pages keep their ids from one build to the next,
+# so a changed page only changes the shards of the terms it gained, lost or
+# changed the weight of.
+###
+
+INDEX_VERSION = 1
+SEARCH_DIRECTORY = 'search'
+INDEX_MANIFEST = 'index.json'
+SHARD_SIZE = 16 * 1024
+BLOCK_SIZE = 256
+CLIENT = 'search.js'
+CLIENT_PATH = os.path.join('javascripts', 'wp-search.js')
+
+SEARCH_STATE = 'search-state.json'
+def getSearchStatePath(buildDirectory):
+    return os.path.join(buildDirectory, SEARCH_STATE)
+
+def readState(stateFileName):
+    try:
+        with open(stateFileName, 'r') as stateFile:
+            state = json.load(stateFile)
+        if state.get('version') == INDEX_VERSION:
+            return state
+    except (FileNotFoundError, ValueError):
+        pass
+    return {}
+
+def writeState(stateFileName, state):
+    temporaryFileName = stateFileName + '.tmp'
+    with open(temporaryFileName, 'w') as stateFile:
+        json.dump(state, stateFile)
+    os.replace(temporaryFileName, stateFileName)
+
+def assignIds(links, previousIds):
+    """Obtain the {link: id} of the pages, keeping the ids they had before.
+    New pages take the ids of removed ones first."""
+    ids = {link: previousIds[link] for link in links if link in previousIds}
+    taken = set(ids.values())
+    freeIds = (documentId for documentId in range(len(links) + len(taken))
+               if documentId not in taken)
+    for link in sorted(links):
+        if link not in ids:
+            ids[link] = next(freeIds)
+    return ids
+
+def getPostings(pages):
+    """Obtain the {term: [id, weight, ...]} of the (id, weights) of each page,
+    in order of id"""
+    postings = collections.defaultdict(list)
+    for documentId, weights in sorted(pages):
+        for term, weight in weights.items():
+            postings[term] += (documentId, weight)
+    return postings
+
+def dumpJson(value):
+    return json.dumps(value, sort_keys=True, separators=(',', ':'))
+
+def getShards(sizes, terms, prefixLength=1):
+    """Divide the terms into {prefix: [term]} by their first prefixLength
+    characters, dividing any shard larger than SHARD_SIZE further. The terms
+    no longer than the prefix stay in its shard. sizes is the {term: size} of
+    the postings of each term."""
+    groups = collections.defaultdict(list)
+    for term in terms:
+        groups[term[:prefixLength]].append(term)
+    shards = {}
+    for prefix, group in groups.items():
+        if len(group) == 1 \
+           or sum(sizes[term] for term in group) <= SHARD_SIZE:
+            shards[prefix] = group
+            continue
+        shortTerms = [term for term in group if len(term) <= prefixLength]
+        if shortTerms:
+            shards[prefix] = shortTerms
+        shards.update(getShards(
+            sizes, [term for term in group if len(term) > prefixLength],
+            prefixLength + 1))
+    return shards
+
+def getDigest(text):
+    """Name a file by its content, so that it can be cached indefinitely. The
+    manifest holds only the digest, to keep it small."""
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+def getIndexFiles(documents, pages):
+    """Obtain the manifest and the {name: text} of the shards and document
+    blocks for the {id: (link, title)} of the documents, and the (id,
+    weights) of the pages"""
+    postings = getPostings(pages)
+    # "term":[...],
+    sizes = {term: len(term) + 4 + len(dumpJson(postingList))
+             for term, postingList in postings.items()}
+    files = {}
+    shards = {}
+    for prefix, terms in getShards(sizes, list(postings)).items():
+        text = dumpJson({term: postings[term] for term in terms})
+        shards[prefix] = getDigest(text)
+        files[shards[prefix] + '.json'] = text
+
+    blocks = []
+    lastId = max(documents, default=-1)
+    for start in range(0, lastId + 1, BLOCK_SIZE):
+        text = dumpJson([documents.get(documentId) for documentId
+                         in range(start, min(start + BLOCK_SIZE, lastId + 1))])
+        blocks.append(getDigest(text))
+        files[blocks[-1] + '.json'] = text
+
+    manifest = {
+        'version': INDEX_VERSION,
+        'documents': len(documents),
+        'blockSize': BLOCK_SIZE,
+        'blocks': blocks,
+        'shards': shards,
+        'maxPrefixLength': max(map(len, shards), default=0),
+        'minTermLength': MIN_TERM_LENGTH,
+        'maxTermLength': MAX_TERM_LENGTH,
+        'stopWords': sorted(STOP_WORDS),
+    }
+    return manifest, files
+
+def writeIndexFiles(searchDirectory, manifest, files):
+    """Write the files of the index which aren't there yet, and remove those
+    no longer in it. Returns the names of the files written."""
+    os.makedirs(searchDirectory, exist_ok=True)
+    written = []
+    for name, text in files.items():
+        path = os.path.join(searchDirectory, name)
+        # The name is derived from the content.
+        if not os.path.isfile(path):
+            writeIfChanged(path, text)
+            written.append(name)
+    for path in glob.glob(os.path.join(searchDirectory, '*.json')):
+        name = os.path.basename(path)
+        if name not in files and name != INDEX_MANIFEST:
+            os.remove(path)
+    # Unlike the others, this is fetched by name, so an unchanged one mustn't
+    # look new.
+    writeIfChanged(os.path.join(searchDirectory, INDEX_MANIFEST),
+                   dumpJson(manifest))
+    return written
+
+def writeClient(middlemanDirectory):
+    with open(os.path.join(os.path.dirname(__file__), CLIENT), 'r') \
+         as clientFile:
+        writeIfChanged(os.path.join(middlemanDirectory, CLIENT_PATH),
+                       clientFile.read())
+
+def buildIndex(htmlFiles, buildDirectory, middlemanDirectory):
+    """Index the pages of the HTML files into the search directory of the
+    Middleman source. Returns the manifest, and the {name: (size, written)}
+    of the files of the index."""
+    stateFileName = getSearchStatePath(buildDirectory)
+    state = readState(stateFileName)
+    metadata = {htmlFile: getPageMetadata(htmlFile, buildDirectory)
+                for htmlFile in htmlFiles}
+    ids = assignIds({data['link'] for data in metadata.values()},
+                    state.get('ids', {}))
+
+    documents = {}
+    pages = []
+    for htmlFile, data in metadata.items():
+        documentId = ids[data['link']]
+        documents[documentId] = [data['link'], data['title']]
+        pages.append((documentId, readTerms(htmlFile, buildDirectory)))
+    manifest, files = getIndexFiles(documents, pages)
+    written = writeIndexFiles(
+        os.path.join(middlemanDirectory, SEARCH_DIRECTORY), manifest, files)
+    writeClient(middlemanDirectory)
+    writeState(stateFileName, {'version': INDEX_VERSION, 'ids': ids})
+    return manifest, {name: (len(text), name in written)
+                      for name, text in files.items()}
+
+def reportIndex(manifest, files, elapsed):
+    shardSizes = [files[digest + '.json'][0]
+                  for digest in manifest['shards'].values()]
+    blockSize = sum(files[digest + '.json'][0]
+                    for digest in manifest['blocks'])
+    written = sum(1 for _, isWritten in files.values() if isWritten)
+    report = (f'wp-search: {manifest["documents"]} page(s),'
+              f' {len(shardSizes)} shard(s) of {sum(shardSizes)} bytes')
+    if shardSizes:
+        report += (f' (median {int(statistics.median(shardSizes))},'
+                   f' largest {max(shardSizes)})')
+    print(report + f', {blockSize} bytes of titles, {written} file(s)'
+          f' written in {elapsed:.2f}s')
+
+def main():
+    """Builds the search index of the site"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--build-dir', '-d', default='',
+        help=('The path of the build directory, where the ids of the pages'
+              ' are kept between builds'))
+    parser.add_argument(
+        '--output', '-o', default='source',
+        help=('The Middleman source directory. The index is written to its'
+              ' search directory, and the client to'
+              f' {CLIENT_PATH}.'))
+    parser.add_argument(
+        'htmlFiles', nargs='*',
+        help=('The HTML files of the pages to index'))
+    arguments = parser.parse_args()
+
+    start = time.perf_counter()
+    manifest, files = buildIndex(arguments.htmlFiles, arguments.build_dir,
+                                 arguments.output)
+    reportIndex(manifest, files, time.perf_counter() - start)
+
+if __name__ == '__main__':
+    main()
+
+###############################################################################
@@ -0,0 +1,93 @@
+###############################################################################
+# NAME:             Timer.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      Runs a recipe's command, and records what it cost.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from .BuildStats import STATS_FILE_VARIABLE, appendRecord, getRunId
+
+def runTimed(command, target, phase):
+    """Run command, and obtain its exit status and the record of it"""
+    statsFile, statsFileName = tempfile.mkstemp(prefix='wp-stats-',
+                                                suffix='.json')
+    os.close(statsFile)
+    environment = dict(os.environ, **{STATS_FILE_VARIABLE: statsFileName})
+    startTime = time.time()
+    start = time.perf_counter()
+    try:
+        status = subprocess.run(command, env=environment,
+                                check=False).returncode
+        if status < 0:
+            # Killed by a signal, as the shell would report it
+            status = 128 - status
+    except FileNotFoundError:
+        status = 127
+    wall = time.perf_counter() - start
+
+    # We only ever have the one child.
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    record = {
+        'run': getRunId(),
+        'time': startTime,
+        'target': target,
+        'phase': phase,
+        'wall': round(wall, 3),
+        'cpu': round(usage.ru_utime + usage.ru_stime, 3),
+        'maxrss': usage.ru_maxrss,
+        'status': status,
+    }
+    try:
+        with open(statsFileName, 'r') as statsFile:
+            record.update(json.load(statsFile))
+    except ValueError:
+        pass
+    finally:
+        os.remove(statsFileName)
+    return status, record
+
+def main():
+    """Runs a command, and appends its cost to the build statistics"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--log', '-l', required=True,
+        help=('The log to append the record to'))
+    parser.add_argument(
+        '--target', '-t', default='',
+        help=('The target the command builds'))
+    parser.add_argument(
+        '--phase', '-p', default='',
+        help=('The kind of rule, e.g. pdf, html or copy'))
+    parser.add_argument(
+        'command', nargs=argparse.REMAINDER,
+        help=('The command to run. Separate this from the options above'
+              ' with "--".'))
+    arguments = parser.parse_args()
+    command = arguments.command
+    if command and command[0] == '--':
+        command = command[1:]
+    if not command:
+        parser.error('No command given')
+
+    status, record = runTimed(command, arguments.target, arguments.phase)
+    appendRecord(arguments.log, record)
+    sys.exit(status)
+
+if __name__ == '__main__':
+    main()
+
+###############################################################################
@@ -0,0 +1,190 @@
+###############################################################################
+# NAME:             Watch.py
+#
+# AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+#
+# DESCRIPTION:      Watches the project and rebuilds what a change affects.
+#
+# CREATED:          10/17/2026
+#
+# LAST EDITED:      10/17/2026
+###
+
+import argparse
+import logging
+import os
+import subprocess
+import time
+
+from .Dependencies import TEX_EXTENSIONS
+from .Locator import PRUNED_NAMES
+from .GenerateMakefile import addArguments, addProjectDocumentRules, \
+    addRegenerateRule, getConfig, getDependencyGraph, getDocuments, \
+    locateLaTeXFiles, saveFingerprint, setUpMakefile, writeMakefile
+
+class Project:
+    """The in-memory model of the project: its configuration, documents and
+    their dependencies."""
+    def __init__(self, args, makeArguments=None):
+        self.args = args
+        self.makeArguments = makeArguments if makeArguments else []
+        self.config = {}
+        self.dependencyGraph = None
+        self.latexFiles = []
+        self.documents = []
+        self.snapshot = {}
+        self.load()
+
+    def load(self):
+        self.config = getConfig(self.args)
+        self.dependencyGraph = getDependencyGraph(self.config)
+        self.latexFiles = locateLaTeXFiles(self.config)
+        self.snapshot = self.getSnapshot()
+        self.regenerate()
+
+    def regenerate(self):
+        """Rebuild the documents and their rules, and write the Makefile"""
+        # The cache still saves us from re-scanning files that haven't
+        # changed, but the graph's own memo must be dropped.
+        self.dependencyGraph = getDependencyGraph(self.config)
+        makefile = setUpMakefile(self.config, self.config['CopyFiles'])
+        addRegenerateRule(makefile, self.args)
+        self.documents = getDocuments(
+            self.latexFiles, self.config, self.dependencyGraph,
+            bookFiles=list(self.config['Books'].keys()))
+        addProjectDocumentRules(makefile, self.config, self.documents,
+                                self.dependencyGraph)
+        writeMakefile(makefile)
+        saveFingerprint(self.config, self.args.config_file, self.latexFiles,
+                        makefile)
+
+    def getPrunedDirectories(self):
+        return {os.path.relpath(directory) for directory in (
+            self.config['BuildDirectory'], self.config['MiddlemanDirectory'],
+            self.config['ServerPDFPath'], 'build')}
+
+    def getSnapshot(self):
+        """Obtain the (mtime, size) of every source file in the project"""
+        snapshot = {}
+        pruned = self.getPrunedDirectories()
+        for dirpath, dirnames, filenames in os.walk(
+                self.config['DocumentRoot']):
+            dirnames[:] = [
+                dirname for dirname in dirnames
+                if not dirname.startswith('.') and dirname not in PRUNED_NAMES
+                and os.path.relpath(os.path.join(dirpath, dirname))
+                not in pruned]
+            for filename in filenames:
+                filePath = os.path.relpath(os.path.join(dirpath, filename))
+                try:
+                    status = os.stat(filePath)
+                except FileNotFoundError:
+                    continue
+                snapshot[filePath] = (status.st_mtime_ns, status.st_size)
+        return snapshot
+
+    def poll(self):
+        """Obtain the set of files added, removed or modified since the last
+        poll."""
+        snapshot = self.getSnapshot()
+        changed = {filePath for filePath in snapshot.keys() | \
+                   self.snapshot.keys()
+                   if snapshot.get(filePath) != self.snapshot.get(filePath)}
+        self.snapshot = snapshot
+        return changed
+
+    def getInputs(self, document):
+        inputs = {document.getPath(), *document.getProjectDependencies()}
+        inputs.update(os.path.relpath(filename)
+                      for filename in self.config['CopyFiles'])
+        if not document.conf['isbook'] and document.conf['tex4htconfig']:
+            inputs.add('tex4ht.cfg')
+        return inputs
+
+    def getAffectedTargets(self, changed):
+        """Obtain the make goals that need to be rebuilt for the changes"""
+        goals = []
+        rebuildSite = False
+        for document in self.documents:
+            inputs = self.getInputs(document)
+            sourcesDirectory = document.getSourcesDirectory() + os.sep
+            if not changed & inputs and not any(
+                    filePath.startswith(sourcesDirectory)
+                    for filePath in changed):
+                continue
+            # While editing, a book's draft is enough.
+            goals.append(document.files['draft'] or document.files['pdf'])
+            if not document.conf['isbook']:
+                goals.append(document.files['erb'])
+                rebuildSite = True
+        if rebuildSite:
+            goals.append('build')
+        return goals
+
+    def update(self, changed):
+        """Bring the model up to date, and rebuild what the changes affect"""
+        logging.info('Changed: %s', ', '.join(sorted(changed)))
+        if os.path.relpath(self.args.config_file) in changed:
+            logging.info('Configuration changed, reloading the project')
+            self.load()
+            return self.make(['build'])
+
+        added = {filePath for filePath in changed
+                 if filePath.endswith('.tex') and filePath in self.snapshot}
+        removed = {filePath for filePath in changed
+                   if filePath.endswith('.tex')
+                   and filePath not in self.snapshot}
+        if (added - set(self.latexFiles)) or (removed & set(self.latexFiles)):
+            # Documents come and go: the Makefile and navigation change.
+            self.latexFiles = locateLaTeXFiles(self.config)
+            self.regenerate()
+            return self.make(['build'])
+
+        if any(filePath.endswith(TEX_EXTENSIONS) for filePath in changed):
+            # The references in these may have changed.
+            self.regenerate()
+        goals = self.getAffectedTargets(changed)
+        if not goals:
+            return 0
+        return self.make(goals)
+
+    def make(self, goals):
+        command = ['make', *self.makeArguments, *goals]
+        logging.info('Running %s', ' '.join(command))
+        result = subprocess.run(command, check=False)
+        if result.returncode != 0:
+            logging.error('make exited with status %d', result.returncode)
+        return result.returncode
+
+def watch(project, interval):
+    while True:
+        time.sleep(interval)
+        changed = project.poll()
+        if changed:
+            project.update(changed)
+
+def main():
+    """Keeps the project built while its sources are edited"""
+    parser = addArguments(argparse.ArgumentParser())
+    parser.add_argument(
+        '-i', '--interval', type=float, default=1.0,
+        help=('The number of seconds between polls of the DocumentRoot'))
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help=('The number of jobs make may run in parallel'))
+    args = parser.parse_args()
+    if args.v:
+        logging.basicConfig(level=logging.DEBUG)
+
+    makeArguments = [f'-j{args.jobs}'] if args.jobs else []
+    project = Project(args, makeArguments)
+    project.make([])
+    try:
+        watch(project, args.interval)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
+
+###############################################################################
@@ -0,0 +1,160 @@
+/*
+ * NAME:             search.js
+ *
+ * AUTHOR:           Ethan D. Twardy <edtwardy@mtu.edu>
+ *
+ * DESCRIPTION:      Searches the index wp-search writes to /search/, fetching
+ *                   only the shards holding the terms of the query. Pages
+ *                   containing every term are ranked by the weight of the
+ *                   terms on them, rarer terms counting for more.
+ *
+ *                   wpSearch(query) resolves to [{link, title, score}]. An
+ *                   input with the data-wp-search attribute lists the results
+ *                   in the element with data-wp-search-results as it's typed
+ *                   in.
+ *
+ * CREATED:          10/17/2026
+ *
+ * LAST EDITED:      10/17/2026
+ */
+
+(function () {
+  'use strict';
+
+  var ROOT = '/search/';
+  var TERM = /[\p{L}\p{N}\p{M}_]+/gu;
+  var MAX_RESULTS = 20;
+  var manifest = null;
+  var files = {};
+
+  function fetchJson(url, options) {
+    return fetch(url, options).then(function (response) {
+      if (!response.ok) {
+        throw new Error(url + ': ' + response.status);
+      }
+      return response.json();
+    });
+  }
+
+  function getManifest() {
+    // The manifest is the only file of the index that isn't named by its
+    // content.
+    if (!manifest) {
+      manifest = fetchJson(ROOT + 'index.json', {cache: 'no-cache'});
+      manifest.catch(function () { manifest = null; });
+    }
+    return manifest;
+  }
+
+  function getFile(digest) {
+    if (!files[digest]) {
+      files[digest] = fetchJson(ROOT + digest + '.json');
+    }
+    return files[digest];
+  }
+
+  function getTerms(query, index) {
+    var terms = [];
+    (query.toLowerCase().match(TERM) || []).forEach(function (term) {
+      var length = Array.from(term).length;
+      if (length >= index.minTermLength && length <= index.maxTermLength
+          && index.stopWords.indexOf(term) < 0 && terms.indexOf(term) < 0) {
+        terms.push(term);
+      }
+    });
+    return terms;
+  }
+
+  function getShard(term, index) {
+    // Shards are split by longer prefixes where they grew too large.
+    var characters = Array.from(term);
+    for (var length = Math.min(characters.length, index.maxPrefixLength);
+         length > 0; length--) {
+      var digest = index.shards[characters.slice(0, length).join('')];
+      if (digest) {
+        return digest;
+      }
+    }
+    return null;
+  }
+
+  function rank(terms, postingLists, documents) {
+    var scores = {};
+    var matches = {};
+    postingLists.forEach(function (postings) {
+      var weight = Math.log(1 + documents / (postings.length / 2));
+      for (var i = 0; i < postings.length; i += 2) {
+        scores[postings[i]] = (scores[postings[i]] || 0)
+          + postings[i + 1] * weight;
+        matches[postings[i]] = (matches[postings[i]] || 0) + 1;
+      }
+    });
+    return Object.keys(scores).filter(function (id) {
+      return matches[id] === terms.length;
+    }).sort(function (a, b) {
+      return scores[b] - scores[a];
+    }).slice(0, MAX_RESULTS).map(function (id) {
+      return {id: Number(id), score: scores[id]};
+    });
+  }
+
+  function search(query) {
+    return getManifest().then(function (index) {
+      var terms = getTerms(query, index);
+      var shards = terms.map(function (term) {
+        return getShard(term, index);
+      });
+      if (!terms.length || shards.indexOf(null) >= 0) {
+        return [];
+      }
+      return Promise.all(shards.map(getFile)).then(function (loaded) {
+        var postingLists = terms.map(function (term, i) {
+          return loaded[i][term] || [];
+        });
+        var results = rank(terms, postingLists, index.documents);
+        return Promise.all(results.map(function (result) {
+          return getFile(index.blocks[Math.floor(
+            result.id / index.blockSize)]);
+        })).then(function (blocks) {
+          return results.map(function (result, i) {
+            var page = blocks[i][result.id % index.blockSize];
+            return {link: page[0], title: page[1], score: result.score};
+          });
+        });
+      });
+    });
+  }
+
+  function bind() {
+    var input = document.querySelector('[data-wp-search]');
+    var list = document.querySelector('[data-wp-search-results]');
+    if (!input || !list) {
+      return;
+    }
+    var latest = 0;
+    input.addEventListener('input', function () {
+      var request = ++latest;
+      search(input.value).then(function (results) {
+        if (request !== latest) {
+          return;
+        }
+        list.textContent = '';
+        results.forEach(function (result) {
+          var item = document.createElement('li');
+          var link = document.createElement('a');
+          link.href = result.link;
+          link.textContent = result.title;
+          item.appendChild(link);
+          list.appendChild(item);
+        });
+      });
+    });
+  }
+
+  window.wpSearch = search;
+  if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', bind);
+  } else {
+    bind();
+  }
+}());